@@ -70,10 +70,11 @@ ACHIEVEMENTS = [
 def init_achievements():
     """Inicializar conquistas no banco de dados"""
     for achievement_data in ACHIEVEMENTS:
-        achievement_id = achievement_data.pop('id')
+        # O 'id' textual é só uma referência; o modelo usa chave numérica
+        defaults = {key: value for key, value in achievement_data.items() if key not in ('id', 'name')}
         Achievement.objects.update_or_create(
-            id=achievement_id,
-            defaults=achievement_data
+            name=achievement_data['name'],
+            defaults=defaults
         )
 
 def check_achievements_for_session(session):
@@ -85,8 +86,12 @@ def check_achievements_for_session(session):
     user_achievements = user.achievements.values_list('achievement_id', flat=True)
     
     # Verifica conquista de primeiro treino
-    if 'first_workout' not in user_achievements:
-        achievement = Achievement.objects.get(id='first_workout')
+    first_workout_achievements = Achievement.objects.filter(
+        requirement_type='workout_count',
+        requirement_value__lte=1
+    ).exclude(id__in=user_achievements)
+    
+    for achievement in first_workout_achievements:
         earn_achievement(user, achievement)
         earned_achievements.append(achievement)
     
@@ -125,7 +130,7 @@ def earn_achievement(user, achievement):
     )
     
     # Adicionar XP
-    user.add_xp(achievement.xp_reward)
+    user.add_xp(achievement.xp_reward, 'achievement', achievement.pk)
     
     # Enviar notificação
     from .models import Notification
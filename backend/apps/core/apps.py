@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+    label = 'core'
+    
+    def ready(self):
+        # Registrar os receivers de signals do app
+        from . import signals  # noqa: F401
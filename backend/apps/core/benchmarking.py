@@ -0,0 +1,317 @@
+"""
+Dados sintéticos e banco isolado para os benchmarks.
+
+SyntheticDataset gera usuários, catálogo de exercícios, treinos, sessões com
+séries, medidas e notificações com bulk_create. A mesma semente produz os
+mesmos dados, o que torna comparáveis as medições antes e depois de uma
+mudança. bulk_create não dispara signals, então os dados derivados
+(DailyActivity, totais de XP, streaks, contadores de notificações e rankings)
+são reconstruídos no final pelos comandos rebuild_* de sempre, restritos às
+contas geradas: usuários que já existiam no banco não são tocados.
+
+isolated_database() cria um banco de testes descartável (SQLite com
+DB_ENGINE=sqlite) com cache, channels e rankings em memória; é usado por
+check_query_budgets e benchmark_api.
+"""
+import io
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from . import caching, leaderboards
+from .models import (
+    User, UserBodyMeasurement, MuscleGroup, Exercise, Workout, WorkoutExercise,
+    WorkoutSession, ExerciseRecord, SetRecord, XPEvent, Notification
+)
+
+ISOLATED_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'CHANNEL_LAYERS': {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    'LEADERBOARD_BACKEND': 'memory',
+    'QUERY_INSPECTION': False,
+}
+
+MUSCLE_GROUPS = [
+    'Peito', 'Costas', 'Ombros', 'Bíceps', 'Tríceps', 'Quadríceps',
+    'Posteriores', 'Glúteos', 'Panturrilhas', 'Abdômen',
+]
+MOVEMENTS = [
+    'Supino', 'Remada', 'Desenvolvimento', 'Rosca', 'Extensão', 'Agachamento',
+    'Levantamento terra', 'Afundo', 'Elevação lateral', 'Puxada', 'Crucifixo', 'Prancha',
+]
+VARIATIONS = [
+    'com barra', 'com halteres', 'na máquina', 'no cabo', 'unilateral',
+    'inclinado', 'declinado', 'com kettlebell', 'com elástico', 'no smith',
+]
+
+# Parâmetros de SyntheticDataset.generate por tamanho de base
+SCALES = {
+    'small': {'users': 20, 'exercises': 80, 'templates': 5, 'workouts_per_user': 3, 'sessions_per_user': 30,
+              'sets_per_exercise': 3, 'measurements_per_user': 6, 'notifications_per_user': 20},
+    'medium': {'users': 200, 'exercises': 150, 'templates': 10, 'workouts_per_user': 4, 'sessions_per_user': 120,
+               'sets_per_exercise': 3, 'measurements_per_user': 12, 'notifications_per_user': 50},
+    'large': {'users': 1000, 'exercises': 300, 'templates': 20, 'workouts_per_user': 5, 'sessions_per_user': 250,
+              'sets_per_exercise': 4, 'measurements_per_user': 24, 'notifications_per_user': 100},
+}
+
+
+@contextmanager
+def isolated_database(keepdb=False):
+    """Banco de testes descartável com serviços externos substituídos por versões em memória"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        with override_settings(**ISOLATED_SETTINGS):
+            leaderboards._backend = None
+            yield
+    finally:
+        leaderboards._backend = None
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def percentile(values, p):
+    """Percentil pelo método do posto mais próximo (sem interpolação)"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Desliga auto_now_add para que o bulk_create grave as datas geradas"""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SyntheticDataset:
+    """Gerador determinístico: mesma semente e mesmos parâmetros, mesmos dados"""
+
+    def __init__(self, seed=0, batch_size=2000, days=180, prefix='load', stdout=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.prefix = prefix
+        self.stdout = stdout
+        self.now = timezone.now().replace(microsecond=0)
+        self.counts = {}
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def create(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(created)
+        return created
+
+    def generate(self, users=100, exercises=150, templates=10, workouts_per_user=4, sessions_per_user=60,
+                 sets_per_exercise=3, measurements_per_user=12, notifications_per_user=30, chunk_size=50):
+        owner = self.catalog_owner()
+        catalog = self.exercises(owner, exercises)
+        self.workouts([owner] * templates, catalog, sets_per_exercise, is_template=True)
+
+        accounts = self.users(users)
+        for index, chunk in enumerate(batched(accounts, chunk_size)):
+            workouts = self.workouts(
+                [user for user in chunk for _ in range(workouts_per_user)], catalog, sets_per_exercise
+            )
+            self.sessions(chunk, workouts, sessions_per_user)
+            self.measurements(chunk, measurements_per_user)
+            self.notifications(chunk, notifications_per_user)
+            self.log(f'Generated history for {min((index + 1) * chunk_size, len(accounts))}/{len(accounts)} users...')
+
+        self.rebuild_derived([user.pk for user in accounts])
+        return self.counts
+
+    def catalog_owner(self):
+        owner, _ = User.objects.get_or_create(
+            username=f'{self.prefix}-catalog',
+            defaults={'email': f'{self.prefix}-catalog@example.com', 'is_staff': True},
+        )
+        return owner
+
+    def users(self, count):
+        # Um único hash para todos: PBKDF2 por usuário dominaria o tempo de geração
+        password = make_password(self.prefix)
+        offset = User.objects.filter(username__startswith=f'{self.prefix}-user-').count()
+        accounts = []
+        for number in range(offset, offset + count):
+            accounts.append(User(
+                username=f'{self.prefix}-user-{number}',
+                email=f'{self.prefix}-user-{number}@example.com',
+                password=password,
+                weight=round(self.random.uniform(55, 110), 1),
+                height=round(self.random.uniform(155, 200), 1),
+                date_joined=self.now - timedelta(days=self.days),
+            ))
+        return self.create(User, accounts)
+
+    def exercises(self, owner, count):
+        groups = [MuscleGroup.objects.get_or_create(name=name)[0] for name in MUSCLE_GROUPS]
+        difficulties = [value for value, _ in Exercise.DIFFICULTY_CHOICES]
+        exercises = self.create(Exercise, [
+            Exercise(
+                name=f'{MOVEMENTS[number % len(MOVEMENTS)]} {VARIATIONS[number // len(MOVEMENTS) % len(VARIATIONS)]}',
+                description='Exercício gerado para testes de carga',
+                instructions='Execute o movimento com controle.',
+                difficulty=self.random.choice(difficulties),
+                user=owner,
+            )
+            for number in range(count)
+        ])
+
+        through = Exercise.muscle_groups.through
+        self.create(through, [
+            through(exercise_id=exercise.pk, musclegroup_id=group.pk)
+            for exercise in exercises
+            for group in self.random.sample(groups, self.random.randint(1, 3))
+        ])
+        caching.invalidate('muscle-groups')
+        return exercises
+
+    def workouts(self, owners, catalog, sets_per_exercise, is_template=False):
+        workouts = self.create(Workout, [
+            Workout(
+                name=f'Treino {chr(ord("A") + number % 5)}',
+                user=owner,
+                is_template=is_template,
+                estimated_duration=self.random.choice([30, 45, 60, 75, 90]),
+            )
+            for number, owner in enumerate(owners)
+        ])
+        workout_exercises = self.create(WorkoutExercise, [
+            WorkoutExercise(
+                workout=workout,
+                exercise=exercise,
+                order=order,
+                sets=sets_per_exercise,
+                target_reps=self.random.choice([6, 8, 10, 12, 15]),
+                rest_duration=self.random.choice([45, 60, 90, 120]),
+            )
+            for workout in workouts
+            for order, exercise in enumerate(self.random.sample(catalog, min(self.random.randint(4, 8), len(catalog))))
+        ])
+
+        plans = {}
+        for workout_exercise in workout_exercises:
+            plans.setdefault(workout_exercise.workout_id, []).append(workout_exercise)
+        for workout in workouts:
+            workout.plan = plans.get(workout.pk, [])
+        if is_template:
+            caching.invalidate('workout-templates')
+        return workouts
+
+    def sessions(self, users, workouts, per_user):
+        by_user = {}
+        for workout in workouts:
+            by_user.setdefault(workout.user_id, []).append(workout)
+
+        sessions = []
+        for user in users:
+            starts = sorted(
+                self.now - timedelta(days=self.random.uniform(0.1, self.days)) for _ in range(per_user)
+            )
+            for start in starts:
+                workout = self.random.choice(by_user[user.pk])
+                minutes = self.random.randint(25, 90)
+                session = WorkoutSession(
+                    user=user,
+                    workout=workout,
+                    start_time=start,
+                    end_time=start + timedelta(minutes=minutes),
+                    duration=minutes * 60,
+                    calories_burned=round(5.5 * (user.weight or 70) * minutes / 60),
+                    xp_earned=max(50 + min(minutes // 5, 50) + 5 * len(workout.plan) + self.random.randint(-10, 10), 10),
+                    completed=True,
+                )
+                session.plan = workout.plan
+                sessions.append(session)
+
+        with explicit_timestamps(WorkoutSession._meta.get_field('start_time')):
+            sessions = self.create(WorkoutSession, sessions)
+
+        self.create(XPEvent, [
+            XPEvent(user_id=session.user_id, source_type='session', source_id=session.pk,
+                    amount=session.xp_earned, created_at=session.end_time)
+            for session in sessions
+        ])
+
+        for chunk in batched(sessions, self.batch_size // 8 or 1):
+            records = self.create(ExerciseRecord, [
+                ExerciseRecord(session=session, exercise_id=item.exercise_id, workout_exercise=item)
+                for session in chunk
+                for item in session.plan
+            ])
+            self.create(SetRecord, [
+                SetRecord(
+                    exercise_record=record,
+                    set_number=number,
+                    actual_reps=max(record.workout_exercise.target_reps + self.random.randint(-3, 2), 1),
+                    weight=Decimal(self.random.randint(4, 60) * 25) / 10,
+                )
+                for record in records
+                for number in range(1, record.workout_exercise.sets + 1)
+            ])
+
+    def measurements(self, users, per_user):
+        measurements = []
+        for user in users:
+            weight = user.weight or 70
+            for number in range(per_user):
+                weight += self.random.uniform(-0.8, 0.6)
+                measurements.append(UserBodyMeasurement(
+                    user=user,
+                    date=(self.now - timedelta(days=self.days * (per_user - number) / per_user)).date(),
+                    weight=round(weight, 1),
+                    body_fat=round(self.random.uniform(10, 30), 1),
+                    waist=round(self.random.uniform(70, 105), 1),
+                ))
+        with explicit_timestamps(UserBodyMeasurement._meta.get_field('date')):
+            self.create(UserBodyMeasurement, measurements)
+
+    def notifications(self, users, per_user):
+        types = [value for value, _ in Notification.NOTIFICATION_TYPES]
+        notifications = [
+            Notification(
+                user=user,
+                title='Notificação de teste',
+                message='Mensagem gerada para testes de carga',
+                type=self.random.choice(types),
+                created_at=self.now - timedelta(days=self.random.uniform(0, self.days)),
+                read=self.random.random() < 0.7,
+            )
+            for user in users
+            for _ in range(per_user)
+        ]
+        with explicit_timestamps(Notification._meta.get_field('created_at')):
+            self.create(Notification, notifications)
+
+    def rebuild_derived(self, user_ids):
+        """Mesmo caminho de um backfill em produção: os comandos rebuild_* a partir das tabelas base"""
+        output = self.stdout if self.stdout is not None else io.StringIO()
+        if user_ids:
+            for command in (
+                'rebuild_daily_activity', 'rebuild_xp_totals', 'backfill_max_streaks',
+                'reconcile_notification_counters',
+            ):
+                call_command(command, user_ids=user_ids, stdout=output)
+        # Os rankings só leem o banco e trocam cada chave de uma vez
+        call_command('rebuild_leaderboards', stdout=output)
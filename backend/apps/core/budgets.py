@@ -0,0 +1,88 @@
+"""
+Orçamento de consultas SQL por view e detecção de N+1.
+
+Cada ViewSet declara query_budgets: {ação: máximo de consultas}, montado com
+measured() a partir das consultas que check_query_budgets mede em cada rota na
+sua fixture, mais QUERY_BUDGET_MARGIN. Ao mudar uma view, rode o comando e
+atualize o número medido; a margem não é para absorver consultas novas. O comando
+check_query_budgets percorre todas as rotas de apps/core/urls.py num banco de
+testes e falha quando alguma passa do orçamento (ou não tem um declarado).
+Os mesmos cenários rodam na suíte de testes (tests/test_query_budgets.py).
+Em staging, QueryInspectionMiddleware aplica os mesmos orçamentos às
+requisições reais e registra o stack trace quando o mesmo formato de SQL se
+repete QUERY_REPEAT_THRESHOLD vezes numa requisição.
+"""
+import logging
+import re
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# Folga para variações de dados que a fixture não cobre, como o contador de
+# notificações ausente que get_unread reconcilia com duas consultas
+QUERY_BUDGET_MARGIN = 2
+
+_in_list = re.compile(r'IN \((?:%s, )*%s\)')
+_numbers = re.compile(r'\b\d+\b')
+
+
+def measured(counts, extra=None):
+    """query_budgets a partir das consultas medidas: cada ação ganha a margem padrão e o extra declarado"""
+    extra = extra or {}
+    return {action: count + QUERY_BUDGET_MARGIN + extra.get(action, 0) for action, count in counts.items()}
+
+
+def sql_shape(sql):
+    """SQL sem valores: listas IN de qualquer tamanho e números literais viram marcadores"""
+    return _numbers.sub('?', _in_list.sub('IN (...)', sql))
+
+
+def view_action(resolver_match):
+    """(classe da view, ação) de uma rota resolvida, ou (None, None)"""
+    if resolver_match is None:
+        return None, None
+    view = resolver_match.func
+    cls = getattr(view, 'cls', None)
+    actions = getattr(view, 'actions', None) or {}
+    return cls, actions
+
+
+def budget_for(resolver_match, method):
+    cls, actions = view_action(resolver_match)
+    if cls is None:
+        return None
+    action = actions.get(method.lower())
+    return getattr(cls, 'query_budgets', {}).get(action)
+
+
+def _caller_stack():
+    """Stack trace apenas com os frames do projeto"""
+    frames = [
+        frame for frame in traceback.extract_stack()[:-3]
+        if 'site-packages' not in frame.filename and '/lib/python' not in frame.filename
+    ]
+    return ''.join(traceback.format_list(frames))
+
+
+class RepeatedQueryDetector:
+    """execute_wrapper que conta consultas e avisa sobre formatos de SQL repetidos"""
+
+    def __init__(self, threshold, label=''):
+        self.threshold = threshold
+        self.label = label
+        self.queries = 0
+        self.shapes = {}
+        self.repeated = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        shape = sql_shape(sql)
+        count = self.shapes.get(shape, 0) + 1
+        self.shapes[shape] = count
+        if count == self.threshold:
+            self.repeated.append(shape)
+            logger.warning(
+                "Possível N+1 em %s: a mesma consulta rodou %d vezes\n%s\n%s",
+                self.label, count, shape, _caller_stack()
+            )
+        return execute(sql, params, many, context)
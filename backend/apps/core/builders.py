@@ -0,0 +1,206 @@
+"""
+Montagem rápida, só leitura, do detalhe de sessões de treino.
+
+WorkoutSessionDetailSerializer aninha treino → exercícios do treino →
+exercício → grupos musculares e repete o exercício em cada registro, com o
+custo de um ModelSerializer por objeto. Aqui cada tabela é lida uma vez com
+values() e cada exercício é montado uma única vez e reaproveitado.
+
+Dois formatos:
+
+- nested: exatamente o mesmo JSON do WorkoutSessionDetailSerializer;
+- flat: cada exercício aparece uma vez em "exercises" e os registros e
+  exercícios do treino apenas o referenciam por id.
+"""
+from rest_framework import serializers
+
+from .models import Workout, Exercise, WorkoutExercise, ExerciseRecord, SetRecord
+
+SHAPES = ('nested', 'flat')
+
+_datetime = serializers.DateTimeField()
+_decimal = serializers.DecimalField(max_digits=6, decimal_places=2)
+
+WORKOUT_FIELDS = ('id', 'name', 'description', 'is_template', 'estimated_duration',
+                  'difficulty', 'created_at')
+WORKOUT_EXERCISE_FIELDS = ('id', 'workout_id', 'exercise_id', 'order', 'sets',
+                           'target_reps', 'rest_duration', 'notes')
+EXERCISE_FIELDS = ('id', 'name', 'description', 'instructions', 'difficulty',
+                   'equipment_needed', 'image', 'video_url', 'met_value', 'created_at')
+
+
+def _format_datetime(value):
+    return _datetime.to_representation(value) if value is not None else None
+
+
+def _image_url(name, request):
+    if not name:
+        return None
+    url = Exercise._meta.get_field('image').storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class SessionDetailBuilder:
+    """Monta o detalhe de várias sessões com um número fixo de consultas"""
+
+    def __init__(self, request=None):
+        self.request = request
+
+    def load(self, sessions):
+        """sessions: instâncias de WorkoutSession (com o treino já carregado ou não)"""
+        self.sessions = list(sessions)
+        session_ids = [session.pk for session in self.sessions]
+        workout_ids = {session.workout_id for session in self.sessions}
+
+        self.workouts = {
+            row['id']: row
+            for row in Workout.objects.filter(pk__in=workout_ids).values(*WORKOUT_FIELDS)
+        }
+        self.workout_exercises = {}
+        self.by_workout = {}
+        for row in WorkoutExercise.objects.filter(workout_id__in=workout_ids).order_by('order', 'pk').values(
+            *WORKOUT_EXERCISE_FIELDS
+        ):
+            self.workout_exercises[row['id']] = row
+            self.by_workout.setdefault(row['workout_id'], []).append(row)
+
+        self.records = {}
+        for row in ExerciseRecord.objects.filter(session_id__in=session_ids).order_by('pk').values(
+            'id', 'session_id', 'exercise_id', 'workout_exercise_id'
+        ):
+            self.records.setdefault(row['session_id'], []).append(row)
+
+        self.sets = {}
+        for row in SetRecord.objects.filter(exercise_record__session_id__in=session_ids).order_by('pk').values(
+            'id', 'exercise_record_id', 'set_number', 'actual_reps', 'weight', 'completed'
+        ):
+            self.sets.setdefault(row['exercise_record_id'], []).append({
+                'id': row['id'],
+                'set_number': row['set_number'],
+                'actual_reps': row['actual_reps'],
+                'weight': _decimal.to_representation(row['weight']) if row['weight'] is not None else None,
+                'completed': row['completed'],
+            })
+
+        # Registros podem apontar para exercícios de outros treinos (ex.: treino editado)
+        extra_workout_exercises = {
+            record['workout_exercise_id']
+            for records in self.records.values() for record in records
+        } - set(self.workout_exercises)
+        for row in WorkoutExercise.objects.filter(pk__in=extra_workout_exercises).values(*WORKOUT_EXERCISE_FIELDS):
+            self.workout_exercises[row['id']] = row
+
+        exercise_ids = {row['exercise_id'] for row in self.workout_exercises.values()}
+        exercise_ids |= {record['exercise_id'] for records in self.records.values() for record in records}
+        self.exercises = self._build_exercises(exercise_ids)
+        return self
+
+    def _build_exercises(self, exercise_ids):
+        muscle_groups = {}
+        through = Exercise.muscle_groups.through
+        # Mesma ordem de MuscleGroup.Meta.ordering, usada pelo ExerciseSerializer
+        for row in through.objects.filter(exercise_id__in=exercise_ids).order_by('musclegroup_id').values(
+            'exercise_id', 'musclegroup__id', 'musclegroup__name', 'musclegroup__description', 'musclegroup__icon'
+        ):
+            muscle_groups.setdefault(row['exercise_id'], []).append({
+                'id': row['musclegroup__id'],
+                'name': row['musclegroup__name'],
+                'description': row['musclegroup__description'],
+                'icon': row['musclegroup__icon'],
+            })
+
+        exercises = {}
+        for row in Exercise.objects.filter(pk__in=exercise_ids).values(*EXERCISE_FIELDS):
+            exercises[row['id']] = {
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['description'],
+                'instructions': row['instructions'],
+                'difficulty': row['difficulty'],
+                'equipment_needed': row['equipment_needed'],
+                'image': _image_url(row['image'], self.request),
+                'video_url': row['video_url'],
+                'met_value': row['met_value'],
+                'muscle_groups': muscle_groups.get(row['id'], []),
+                'created_at': _format_datetime(row['created_at']),
+            }
+        return exercises
+
+    def _workout_exercise(self, pk, nested=True):
+        row = self.workout_exercises[pk]
+        return {
+            'id': row['id'],
+            'exercise_detail' if nested else 'exercise_id': (
+                self.exercises[row['exercise_id']] if nested else row['exercise_id']
+            ),
+            'order': row['order'],
+            'sets': row['sets'],
+            'target_reps': row['target_reps'],
+            'rest_duration': row['rest_duration'],
+            'notes': row['notes'],
+        }
+
+    def _workout(self, workout_id, nested=True):
+        row = self.workouts[workout_id]
+        data = {field: row[field] for field in WORKOUT_FIELDS}
+        data['created_at'] = _format_datetime(row['created_at'])
+        data['workout_exercises'] = [
+            self._workout_exercise(workout_exercise['id'], nested)
+            for workout_exercise in self.by_workout.get(workout_id, [])
+        ]
+        return data
+
+    def _session_fields(self, session):
+        return {
+            'id': session.pk,
+            'workout': session.workout_id,
+            'workout_detail': None,
+            'start_time': _format_datetime(session.start_time),
+            'end_time': _format_datetime(session.end_time),
+            'duration': session.duration,
+            'calories_burned': session.calories_burned,
+            'notes': session.notes,
+            'xp_earned': session.xp_earned,
+            'completed': session.completed,
+        }
+
+    def nested(self, session):
+        """Mesmo JSON do WorkoutSessionDetailSerializer"""
+        data = self._session_fields(session)
+        data['workout_detail'] = self._workout(session.workout_id)
+        data['exercise_records'] = [
+            {
+                'id': record['id'],
+                'exercise_detail': self.exercises[record['exercise_id']],
+                'workout_exercise_detail': self._workout_exercise(record['workout_exercise_id']),
+                'set_records': self.sets.get(record['id'], []),
+            }
+            for record in self.records.get(session.pk, [])
+        ]
+        return data
+
+    def flat(self, session):
+        """Cada exercício uma única vez; o restante referencia por id"""
+        data = self._session_fields(session)
+        data['workout_detail'] = self._workout(session.workout_id, nested=False)
+        records = self.records.get(session.pk, [])
+        data['exercise_records'] = [
+            {
+                'id': record['id'],
+                'exercise_id': record['exercise_id'],
+                'workout_exercise_id': record['workout_exercise_id'],
+                'set_records': self.sets.get(record['id'], []),
+            }
+            for record in records
+        ]
+        exercise_ids = {row['exercise_id'] for row in self.by_workout.get(session.workout_id, [])}
+        exercise_ids |= {record['exercise_id'] for record in records}
+        data['exercises'] = {str(pk): self.exercises[pk] for pk in sorted(exercise_ids)}
+        return data
+
+    def build(self, session, shape='nested'):
+        return self.flat(session) if shape == 'flat' else self.nested(session)
+
+
+def session_detail(session, request=None, shape='nested'):
+    return SessionDetailBuilder(request).load([session]).build(session, shape)
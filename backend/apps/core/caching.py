@@ -0,0 +1,162 @@
+"""
+Camada de cache da aplicação.
+
+As chaves são agrupadas por entidade (e opcionalmente por escopo, ex.: o id do
+usuário) e carregam a versão do namespace. Invalidar um namespace apenas
+incrementa essa versão; as entradas antigas deixam de ser lidas e expiram
+sozinhas. Os receivers em signals.py fazem a invalidação, sempre depois do
+commit: invalidando antes, uma leitura concorrente ainda veria os dados antigos
+no banco e os gravaria no cache sob a versão nova.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'app'
+
+# Entidades cacheadas (também usadas para os contadores de hit/miss)
+ENTITIES = (
+    'muscle-groups',
+    'achievements',
+    'challenges',
+    'workout-templates',
+    'user-profile',
+    'user-stats',
+)
+
+_MISSING = object()
+
+
+def _namespace(entity, scope=None):
+    return entity if scope is None else f"{entity}:{scope}"
+
+
+def _version_key(entity, scope=None):
+    return f"{KEY_PREFIX}:ns:{_namespace(entity, scope)}"
+
+
+def _counter_key(entity, kind):
+    return f"{KEY_PREFIX}:stats:{entity}:{kind}"
+
+
+def _new_version():
+    # Baseada no relógio para nunca reaproveitar uma versão se a chave for despejada
+    # ou apagada por invalidate_many; em milissegundos, apagar e recriar a chave no
+    # mesmo milissegundo devolvia a versão antiga
+    return time.time_ns()
+
+
+def namespace_version(entity, scope=None):
+    """Versão atual do namespace, criando-a se necessário"""
+    key = _version_key(entity, scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def make_key(entity, key, scope=None):
+    version = namespace_version(entity, scope)
+    return f"{KEY_PREFIX}:{_namespace(entity, scope)}:v{version}:{key}"
+
+
+def _count(entity, kind):
+    key = _counter_key(entity, kind)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_or_set(entity, key, producer, scope=None, timeout=None):
+    """
+    Retorna o valor cacheado ou calcula com producer() e armazena.
+
+    Falhas do backend de cache não derrubam a requisição: o valor é
+    calculado normalmente e o erro é registrado no log.
+    """
+    try:
+        full_key = make_key(entity, key, scope)
+        value = cache.get(full_key, _MISSING)
+    except Exception:
+        logger.exception("Falha ao ler do cache (%s)", entity)
+        return producer()
+
+    if value is not _MISSING:
+        _count(entity, 'hits')
+        return value
+
+    _count(entity, 'misses')
+    value = producer()
+    try:
+        cache.set(full_key, value, timeout or settings.APP_CACHE_TIMEOUT)
+    except Exception:
+        logger.exception("Falha ao gravar no cache (%s)", entity)
+    return value
+
+
+def invalidate(entity, scope=None):
+    """Invalidar todas as entradas do namespace"""
+    key = _version_key(entity, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
+    except Exception:
+        logger.exception("Falha ao invalidar o cache (%s)", entity)
+
+
+def invalidate_many(entity, scopes):
+    """Invalidar vários escopos de uma vez (jobs em lote)"""
+    # Sem a chave de versão, a próxima leitura cria uma nova baseada no relógio
+    try:
+        cache.delete_many([_version_key(entity, scope) for scope in scopes])
+    except Exception:
+        logger.exception("Falha ao invalidar o cache (%s)", entity)
+
+
+def invalidate_on_commit(entity, scope=None):
+    """invalidate() quando a transação atual for confirmada"""
+    transaction.on_commit(lambda: invalidate(entity, scope))
+
+
+def invalidate_many_on_commit(entity, scopes):
+    scopes = list(scopes)
+    transaction.on_commit(lambda: invalidate_many(entity, scopes))
+
+
+def stats():
+    """Contadores de hit/miss por entidade"""
+    keys = {
+        (entity, kind): _counter_key(entity, kind)
+        for entity in ENTITIES
+        for kind in ('hits', 'misses')
+    }
+    values = cache.get_many(list(keys.values()))
+
+    result = {}
+    for entity in ENTITIES:
+        hits = values.get(keys[(entity, 'hits')], 0)
+        misses = values.get(keys[(entity, 'misses')], 0)
+        total = hits + misses
+        result[entity] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else None,
+        }
+    return result
+
+
+def reset_stats():
+    cache.delete_many([
+        _counter_key(entity, kind)
+        for entity in ENTITIES
+        for kind in ('hits', 'misses')
+    ])
@@ -0,0 +1,129 @@
+"""
+Estimativa de calorias por MET (equivalente metabólico).
+
+kcal = MET × peso (kg) × horas. Cada série registrada conta como trabalho
+no MET do exercício (Exercise.met_value ou o padrão da dificuldade), com um
+acréscimo proporcional à carga em relação ao peso corporal; o descanso
+previsto após a série conta no MET de recuperação. O tempo da sessão que
+sobra (aquecimento, transições) entra no MET leve. Sessões sem séries
+registradas usam o MET médio dos exercícios do treino durante toda a duração.
+
+As funções de cálculo são puras e recebem tuplas, para que o recálculo em
+lote (recompute_calories) processe milhares de sessões por consulta.
+"""
+from collections import defaultdict
+
+from .models import SetRecord, WorkoutExercise
+
+DEFAULT_WEIGHT_KG = 70
+
+# MET padrão por dificuldade quando o exercício não define met_value
+DIFFICULTY_MET = {
+    'beginner': 3.5,
+    'intermediate': 5.0,
+    'advanced': 6.0,
+}
+REST_MET = 2.0
+LIGHT_MET = 3.0
+
+SECONDS_PER_REP = 3
+# Carga igual ao peso corporal aumenta o MET da série em 20% (limitado a 2x o peso)
+LOAD_MET_FACTOR = 0.2
+MAX_LOAD_RATIO = 2.0
+
+# Colunas lidas por set_rows(): sessão, met_value, dificuldade, reps, carga, descanso
+SET_COLUMNS = (
+    'exercise_record__session_id',
+    'exercise_record__exercise__met_value',
+    'exercise_record__exercise__difficulty',
+    'actual_reps',
+    'weight',
+    'exercise_record__workout_exercise__rest_duration',
+)
+
+
+def exercise_met(met_value, difficulty):
+    return met_value or DIFFICULTY_MET.get(difficulty, DIFFICULTY_MET['intermediate'])
+
+
+def estimate(duration, body_weight, sets, fallback_met=None):
+    """
+    Calorias de uma sessão.
+
+    duration em segundos; sets é [(met, reps, carga_kg, descanso_s)] das
+    séries concluídas; fallback_met é usado quando não há séries.
+    """
+    duration = max(duration or 0, 0)
+    body_weight = float(body_weight or DEFAULT_WEIGHT_KG)
+
+    if not sets:
+        met = fallback_met or DIFFICULTY_MET['intermediate']
+        return int(met * body_weight * duration / 3600)
+
+    work = rest = 0.0
+    met_seconds = 0.0
+    for met, reps, load, rest_duration in sets:
+        seconds = reps * SECONDS_PER_REP
+        ratio = min(float(load or 0) / body_weight, MAX_LOAD_RATIO)
+        met_seconds += met * (1 + LOAD_MET_FACTOR * ratio) * seconds
+        work += seconds
+        rest += rest_duration or 0
+
+    # Registros maiores que a duração real (ex.: sessão concluída às pressas)
+    # são escalonados para caber nela
+    logged = work + rest
+    scale = min(duration / logged, 1.0) if logged and duration else 1.0
+    met_seconds += REST_MET * rest
+    met_seconds *= scale
+    met_seconds += LIGHT_MET * max(duration - logged * scale, 0)
+
+    return int(met_seconds * body_weight / 3600)
+
+
+def set_rows(session_ids):
+    """Séries concluídas das sessões: {session_id: [(met, reps, carga, descanso)]}"""
+    rows = defaultdict(list)
+    queryset = SetRecord.objects.filter(
+        exercise_record__session_id__in=session_ids, completed=True
+    ).values_list(*SET_COLUMNS)
+    for session_id, met_value, difficulty, reps, load, rest_duration in queryset.iterator():
+        rows[session_id].append((exercise_met(met_value, difficulty), reps, load, rest_duration))
+    return rows
+
+
+def fallback_mets(workout_ids):
+    """MET médio dos exercícios de cada treino: {workout_id: met}"""
+    mets = defaultdict(list)
+    queryset = WorkoutExercise.objects.filter(workout_id__in=workout_ids).values_list(
+        'workout_id', 'exercise__met_value', 'exercise__difficulty'
+    )
+    for workout_id, met_value, difficulty in queryset:
+        mets[workout_id].append(exercise_met(met_value, difficulty))
+    return {workout_id: sum(values) / len(values) for workout_id, values in mets.items()}
+
+
+def estimate_session(session):
+    """Calorias de uma sessão já com duration calculada"""
+    sets = set_rows([session.pk]).get(session.pk, [])
+    fallback = None if sets else fallback_mets([session.workout_id]).get(session.workout_id)
+    return estimate(session.duration, session.user.weight, sets, fallback)
+
+
+def recompute(sessions):
+    """
+    Reestimar um lote de sessões concluídas.
+
+    sessions é [(pk, workout_id, duration, peso do usuário, calorias atuais)];
+    retorna [(pk, calorias)] só das que mudaram.
+    """
+    session_ids = [row[0] for row in sessions]
+    sets = set_rows(session_ids)
+    missing = {workout_id for pk, workout_id, *_ in sessions if pk not in sets}
+    fallback = fallback_mets(missing) if missing else {}
+
+    changed = []
+    for pk, workout_id, duration, body_weight, current in sessions:
+        calories = estimate(duration, body_weight, sets.get(pk, []), fallback.get(workout_id))
+        if calories != current:
+            changed.append((pk, calories))
+    return changed
@@ -0,0 +1,246 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import realtime
+from .days import local_date
+from .models import (
+    User, Challenge, UserChallenge, UserChallengeExercise,
+    Notification, NotificationCounter
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def required_exercise_counts(challenge_ids):
+    """Quantidade de exercícios exigidos por desafio: {challenge_id: n}"""
+    through = Challenge.required_exercises.through
+    return dict(
+        through.objects.filter(challenge_id__in=challenge_ids)
+        .values('challenge_id')
+        .annotate(total=Count('exercise_id'))
+        .values_list('challenge_id', 'total')
+    )
+
+
+def update_challenge_progress(session):
+    """
+    Atualiza os contadores das participações afetadas por uma sessão concluída
+    e conclui os desafios cujos requisitos foram atingidos.
+
+    Só entram desafios ativos cuja janela contém a data da sessão (índice
+    challenge_active_window_idx) e participações feitas antes do fim dela.
+    Deve rodar dentro da transação de complete_session.
+    """
+    day = local_date(session.user, session.end_time)
+    participations = list(
+        UserChallenge.objects.filter(
+            user_id=session.user_id,
+            completed=False,
+            joined_at__lte=session.end_time,
+            challenge__is_active=True,
+            challenge__start_date__lte=day,
+            challenge__end_date__gte=day,
+        ).select_related('challenge')
+    )
+    if not participations:
+        return []
+
+    ids = [participation.pk for participation in participations]
+    by_challenge = {participation.challenge_id: participation for participation in participations}
+
+    # Exercícios exigidos realizados nesta sessão. start_session cria um
+    # ExerciseRecord para cada exercício do treino; só conta o que tem série concluída
+    performed = set(
+        session.exercise_records.filter(set_records__completed=True).values_list('exercise_id', flat=True)
+    )
+    through = Challenge.required_exercises.through
+    done = [
+        UserChallengeExercise(user_challenge_id=by_challenge[challenge_id].pk, exercise_id=exercise_id)
+        for challenge_id, exercise_id in through.objects.filter(
+            challenge_id__in=by_challenge, exercise_id__in=performed
+        ).values_list('challenge_id', 'exercise_id')
+    ]
+    if done:
+        UserChallengeExercise.objects.bulk_create(done, ignore_conflicts=True)
+
+    distinct_done = (
+        UserChallengeExercise.objects.filter(user_challenge=OuterRef('pk'))
+        .values('user_challenge')
+        .annotate(total=Count('exercise_id'))
+        .values('total')
+    )
+    UserChallenge.objects.filter(pk__in=ids).update(
+        workouts_done=F('workouts_done') + 1,
+        exercises_done=Coalesce(Subquery(distinct_done), Value(0)),
+    )
+
+    counters = {
+        pk: (workouts_done, exercises_done)
+        for pk, workouts_done, exercises_done in UserChallenge.objects.filter(pk__in=ids)
+        .values_list('pk', 'workouts_done', 'exercises_done')
+    }
+    required = required_exercise_counts(by_challenge)
+
+    finished = []
+    for participation in participations:
+        participation.workouts_done, participation.exercises_done = counters[participation.pk]
+        if participation.is_satisfied(required.get(participation.challenge_id, 0)):
+            participation.finish()
+            finished.append(participation)
+    return finished
+
+
+def enroll_users(challenge, user_ids, chunk_size=None):
+    """
+    Inscrever vários usuários num desafio, em lotes.
+    
+    Quem já participa é ignorado (unique_together com ignore_conflicts).
+    Retorna quantos usuários da lista ainda não participavam quando o lote foi
+    lido; um join concorrente que vença o INSERT também entra nessa conta, então
+    o número é aproximado.
+    """
+    chunk_size = chunk_size or settings.CHALLENGE_BATCH_SIZE
+    user_ids = list(dict.fromkeys(user_ids))
+    created = 0
+    
+    for chunk in _chunks(user_ids, chunk_size):
+        existing = set(
+            UserChallenge.objects.filter(challenge=challenge, user_id__in=chunk)
+            .values_list('user_id', flat=True)
+        )
+        new = [UserChallenge(user_id=user_id, challenge=challenge) for user_id in chunk if user_id not in existing]
+        UserChallenge.objects.bulk_create(new, ignore_conflicts=True)
+        created += len(new)
+    
+    return created
+
+
+def _reward_chunk(challenge, participation_ids, now):
+    """Concluir um lote de participações: XP, notificações e contadores em poucas consultas"""
+    with transaction.atomic():
+        rows = list(
+            UserChallenge.objects.select_for_update()
+            .filter(pk__in=participation_ids, completed=False)
+            .values_list('pk', 'user_id')
+        )
+        if not rows:
+            return 0
+        
+        UserChallenge.objects.filter(pk__in=[pk for pk, _ in rows]).update(completed=True, completed_at=now)
+        User.add_xp_many(challenge.xp_reward, 'challenge', [(user_id, pk) for pk, user_id in rows])
+        
+        user_ids = [user_id for _, user_id in rows]
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                title=f"Desafio Concluído: {challenge.name}",
+                message=f"Parabéns! Você concluiu o desafio '{challenge.name}' e ganhou {challenge.xp_reward} XP!",
+                type='achievement',
+                icon='challenge_complete',
+                action_url='/challenges'
+            )
+            for user_id in user_ids
+        ])
+        NotificationCounter.adjust_many(user_ids, 1)
+        realtime.push_notifications(notifications)
+    return len(rows)
+
+
+def _notify_missed_chunk(challenge, participation_ids, now):
+    """Avisar um lote de participações incompletas, marcando-as para que um novo job não avise de novo"""
+    with transaction.atomic():
+        rows = list(
+            UserChallenge.objects.select_for_update()
+            .filter(pk__in=participation_ids, completed=False, missed_notified_at__isnull=True)
+            .values_list('pk', 'user_id')
+        )
+        if not rows:
+            return 0
+        
+        UserChallenge.objects.filter(pk__in=[pk for pk, _ in rows]).update(missed_notified_at=now)
+        user_ids = [user_id for _, user_id in rows]
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                title=f"Desafio Encerrado: {challenge.name}",
+                message=f"O desafio '{challenge.name}' terminou. Continue treinando para o próximo!",
+                type='system',
+                icon='challenge',
+                action_url='/challenges'
+            )
+            for user_id in user_ids
+        ])
+        NotificationCounter.adjust_many(user_ids, 1)
+        realtime.push_notifications(notifications)
+    return len(rows)
+
+
+def close_challenge(challenge, now=None, chunk_size=None):
+    """
+    Encerrar um desafio expirado: conclui quem atingiu os requisitos pelos
+    contadores, avisa os demais participantes e desativa o desafio.
+    
+    Cada lote roda na sua própria transação, então um job interrompido pode
+    ser repetido sem pagar XP nem avisar duas vezes (missed_notified_at).
+    """
+    now = now or timezone.now()
+    chunk_size = chunk_size or settings.CHALLENGE_BATCH_SIZE
+    required = required_exercise_counts([challenge.pk]).get(challenge.pk, 0)
+    
+    pending = UserChallenge.objects.filter(challenge=challenge, completed=False).order_by('pk')
+    eligible = pending.filter(
+        workouts_done__gte=challenge.required_workouts,
+        exercises_done__gte=required
+    )
+    
+    completed = 0
+    while True:
+        chunk = list(eligible.values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            break
+        completed += _reward_chunk(challenge, chunk, now)
+    
+    # Os restantes continuam incompletos: percorrer por faixa de pk
+    missed = last_pk = 0
+    unnotified = pending.filter(missed_notified_at__isnull=True)
+    while True:
+        chunk = list(unnotified.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            break
+        missed += _notify_missed_chunk(challenge, chunk, now)
+        last_pk = chunk[-1]
+    
+    # save() dispara a nova versão da tabela e a invalidação do cache
+    challenge.is_active = False
+    challenge.save(update_fields=['is_active'])
+    return {'completed': completed, 'missed': missed}
+
+
+def close_expired_challenges(chunk_size=None):
+    """Job diário: encerra os desafios ativos cujo end_date já passou"""
+    started = time.monotonic()
+    now = timezone.now()
+    
+    closed = {}
+    for challenge in Challenge.objects.filter(is_active=True, end_date__lt=timezone.localdate(now)):
+        closed[challenge.pk] = close_challenge(challenge, now=now, chunk_size=chunk_size)
+    
+    metrics = {
+        'challenges_closed': len(closed),
+        'completed': sum(result['completed'] for result in closed.values()),
+        'missed': sum(result['missed'] for result in closed.values()),
+        'duration_seconds': round(time.monotonic() - started, 3),
+    }
+    logger.info("Encerramento de desafios: %s", metrics)
+    return metrics
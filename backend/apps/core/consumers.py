@@ -0,0 +1,92 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .models import NotificationCounter, WorkoutSession, WorkoutSessionEvent
+from .realtime import user_group, session_group
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """Canal por usuário com as notificações novas e o contador de não lidas"""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.group_name = user_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        # Estado inicial, substitui a primeira chamada a unread_count
+        unread = await database_sync_to_async(NotificationCounter.get_unread)(user.pk)
+        await self.send_json({'type': 'unread_count', 'unread_count': unread})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send_json({
+            'type': 'notification',
+            'notification': event['notification'],
+            'unread_count': event['unread_count'],
+        })
+
+    async def notification_unread(self, event):
+        await self.send_json({'type': 'unread_count', 'unread_count': event['unread_count']})
+
+
+class WorkoutSessionConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Canal por sessão de treino com os deltas de record_set e complete.
+
+    O cliente informa ?since=<seq> ao reconectar e recebe os eventos
+    perdidos antes dos novos. Eventos podem chegar repetidos na fronteira
+    entre o replay e o grupo; o cliente descarta seq já aplicados.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        session_id = self.scope['url_route']['kwargs']['session_id']
+        exists = await database_sync_to_async(
+            WorkoutSession.objects.filter(pk=session_id, user=user).exists
+        )()
+        if not exists:
+            await self.close(code=4404)
+            return
+
+        self.group_name = session_group(session_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            since = int(query.get('since', ['0'])[0])
+        except ValueError:
+            since = 0
+
+        events = await database_sync_to_async(self.get_events)(session_id, since)
+        for event in events:
+            await self.send_json(event)
+        last_seq = events[-1]['seq'] if events else since
+        await self.send_json({'type': 'synced', 'session': session_id, 'seq': last_seq})
+
+    def get_events(self, session_id, since):
+        return [
+            event.as_message()
+            for event in WorkoutSessionEvent.objects.filter(session_id=session_id, seq__gt=since)
+        ]
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def session_event(self, event):
+        await self.send_json(event['event'])
@@ -0,0 +1,58 @@
+"""
+Divisão do tempo em dias locais do usuário.
+
+Todo caminho baseado em datas (streak, estatísticas, suplementos do dia,
+rollups diários) deve passar por aqui em vez de usar timezone.now().date(),
+que devolve o dia no fuso do servidor. Os limites de um dia são calculados
+pelo zoneinfo, então dias de 23 ou 25 horas (horário de verão) saem certos.
+"""
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.utils import timezone
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """ZoneInfo pelo nome; nomes inválidos caem no fuso padrão do projeto"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(settings.TIME_ZONE)
+
+
+def is_valid_zone(name):
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def user_zone(user):
+    return get_zone(getattr(user, 'timezone', None) or settings.TIME_ZONE)
+
+
+def local_now(user):
+    return timezone.now().astimezone(user_zone(user))
+
+
+def local_date(user, when=None):
+    """Dia local do usuário para o instante informado (padrão: agora)"""
+    when = when or timezone.now()
+    return when.astimezone(user_zone(user)).date()
+
+
+def day_bounds(user, day):
+    """Intervalo [início, fim) do dia local, como datetimes com fuso"""
+    zone = user_zone(user)
+    start = datetime.combine(day, time.min, tzinfo=zone)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=zone)
+    return start, end
+
+
+def range_bounds(user, first_day, last_day):
+    """Intervalo [início de first_day, fim de last_day) no fuso do usuário"""
+    return day_bounds(user, first_day)[0], day_bounds(user, last_day)[1]
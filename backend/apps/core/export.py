@@ -0,0 +1,91 @@
+"""
+Exportação do histórico completo de um usuário em NDJSON ou CSV.
+
+Os registros são lidos com values() e .iterator(chunk_size=...), que no
+Postgres usa cursores do lado do servidor: a memória fica constante e a
+primeira linha sai antes de o resto ser lido, mesmo com centenas de
+milhares de séries. Cada linha carrega um campo "type" com o tipo do
+registro; as referências entre registros usam os ids originais.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import (
+    UserBodyMeasurement, WorkoutSession, ExerciseRecord, SetRecord,
+    Supplement, SupplementRecord
+)
+
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# (tipo, queryset do usuário, campos) na ordem em que aparecem na exportação
+RECORD_TYPES = [
+    ('session', lambda user: WorkoutSession.objects.filter(user=user), [
+        'id', 'workout_id', 'workout__name', 'start_time', 'end_time', 'duration',
+        'calories_burned', 'notes', 'xp_earned', 'completed',
+    ]),
+    ('exercise_record', lambda user: ExerciseRecord.objects.filter(session__user=user), [
+        'id', 'session_id', 'exercise_id', 'exercise__name', 'workout_exercise_id',
+    ]),
+    ('set', lambda user: SetRecord.objects.filter(exercise_record__session__user=user), [
+        'id', 'exercise_record_id', 'set_number', 'actual_reps', 'weight', 'completed',
+    ]),
+    ('measurement', lambda user: UserBodyMeasurement.objects.filter(user=user), [
+        'id', 'date', 'weight', 'body_fat', 'chest', 'waist', 'hips', 'biceps', 'thighs', 'calves',
+    ]),
+    ('supplement', lambda user: Supplement.objects.filter(user=user), [
+        'id', 'name', 'description', 'frequency', 'time_type', 'time',
+        'minutes_before_workout', 'minutes_after_workout', 'days',
+    ]),
+    ('supplement_record', lambda user: SupplementRecord.objects.filter(supplement__user=user), [
+        'id', 'supplement_id', 'timestamp', 'taken',
+    ]),
+]
+
+
+def iter_records(user, chunk_size=CHUNK_SIZE):
+    """Gera (tipo, dict) de todos os registros do usuário, um tipo por vez, em ordem de id"""
+    for record_type, queryset, fields in RECORD_TYPES:
+        rows = queryset(user).order_by('pk').values(*fields)
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield record_type, row
+
+
+def iter_ndjson(user, chunk_size=CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for record_type, row in iter_records(user, chunk_size):
+        yield encoder.encode({'type': record_type, **row}) + '\n'
+
+
+class _Echo:
+    """Buffer falso: csv.writer devolve a linha em vez de gravá-la"""
+
+    def write(self, value):
+        return value
+
+
+def csv_columns():
+    """Cabeçalho único: type seguido da união dos campos de todos os tipos"""
+    columns = ['type']
+    for _, _, fields in RECORD_TYPES:
+        columns.extend(field for field in fields if field not in columns)
+    return columns
+
+
+def iter_csv(user, chunk_size=CHUNK_SIZE):
+    columns = csv_columns()
+    writer = csv.DictWriter(_Echo(), fieldnames=columns)
+    yield writer.writerow(dict(zip(columns, columns)))
+    for record_type, row in iter_records(user, chunk_size):
+        yield writer.writerow({'type': record_type, **row})
+
+
+def stream(user, export_format, chunk_size=CHUNK_SIZE):
+    if export_format == 'csv':
+        return iter_csv(user, chunk_size)
+    return iter_ndjson(user, chunk_size)
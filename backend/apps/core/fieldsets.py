@@ -0,0 +1,168 @@
+"""
+Seleção de campos (?fields=) e de objetos embutidos (?expand=) nas respostas.
+
+- ?fields=id,start_time,workout_detail.name devolve só esses campos; o ponto
+  seleciona campos dentro de um objeto embutido.
+- ?expand=workout_detail lista os objetos embutidos desejados; ?expand= vazio
+  remove todos. Sem ?fields=, os campos simples continuam todos presentes.
+- Sem nenhum dos dois, a resposta é a completa de sempre.
+- Nomes desconhecidos são ignorados; escritas (POST, PUT, PATCH) não usam
+  nenhum dos dois parâmetros.
+
+DynamicFieldsModelSerializer corta os campos do serializer e
+SparseFieldsetMixin (mixins.py) usa o mesmo recorte para reduzir o SQL com
+only(), select_related() e prefetch_related().
+"""
+import time
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+from . import metrics
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+# Marca "todos os campos" numa subárvore
+ALL = True
+
+
+def parse_spec(value):
+    """'id,workout_detail.name' -> {'id': ALL, 'workout_detail': {'name': ALL}}"""
+    tree = {}
+    for part in value.split(','):
+        path = [name for name in part.strip().split('.') if name]
+        if not path:
+            continue
+        node = tree
+        for name in path[:-1]:
+            child = node.get(name)
+            if child is ALL:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[path[-1]] = ALL
+    return tree
+
+
+def requested(request):
+    """(fields, expand) do request; None quando o parâmetro não foi enviado"""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, None
+    params = request.query_params
+    fields = parse_spec(params[FIELDS_PARAM]) if FIELDS_PARAM in params else None
+    expand = parse_spec(params[EXPAND_PARAM]) if EXPAND_PARAM in params else None
+    if fields is not None and expand:
+        for name, subtree in expand.items():
+            fields.setdefault(name, subtree)
+    return fields, expand
+
+
+def nested_serializer(field):
+    """O serializer embutido de um campo (desembrulhando many=True), ou None"""
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    return field if isinstance(field, serializers.BaseSerializer) else None
+
+
+def trim(serializer, fields, expand):
+    """Remover do serializer os campos não pedidos"""
+    for name, field in list(serializer.fields.items()):
+        nested = nested_serializer(field)
+        if fields is not None:
+            if name not in fields:
+                serializer.fields.pop(name)
+            elif nested is not None and fields[name] is not ALL:
+                trim(nested, fields[name], None)
+        elif expand is not None and nested is not None:
+            if name not in expand:
+                serializer.fields.pop(name)
+            elif expand[name] is not ALL:
+                trim(nested, expand[name], None)
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer que respeita ?fields= e ?expand= nas leituras e soma o
+    tempo de serialização às métricas da requisição (metrics.py).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = requested(self.context.get('request'))
+        if fields is not None or expand is not None:
+            trim(self, fields, expand)
+
+    def to_representation(self, instance):
+        stats = metrics.current()
+        parent = self.parent
+        # Só o serializer de topo (ou os itens de uma lista de topo) é medido
+        if stats is None or (parent is not None and (
+            parent.parent is not None or not isinstance(parent, serializers.ListSerializer)
+        )):
+            return super().to_representation(instance)
+
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+
+
+def query_plan(serializer, model, prefix=''):
+    """
+    Colunas e relações necessárias para um serializer já recortado.
+
+    Retorna (colunas, select_related, prefetch_related); colunas é None quando
+    algum campo não corresponde a uma coluna (propriedade, método), caso em
+    que o only() não é seguro.
+    """
+    columns = {prefix + model._meta.pk.name}
+    select = []
+    prefetch = []
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            # SerializerMethodField e afins podem ler qualquer atributo
+            columns = None
+            continue
+        attr = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            columns = None
+            continue
+
+        nested = nested_serializer(field)
+        if model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+            if columns is not None:
+                columns.add(prefix + model_field.name)
+            if nested is None and '.' in field.source:
+                # source='user.username': junta a tabela, mas sem restringir colunas
+                select.append(prefix + attr)
+                columns = None
+            elif nested is not None:
+                select.append(prefix + attr)
+                sub_columns, sub_select, sub_prefetch = query_plan(
+                    nested, model_field.related_model, f'{prefix}{attr}__'
+                )
+                select.extend(sub_select)
+                prefetch.extend(sub_prefetch)
+                if sub_columns is None:
+                    columns = None
+                elif columns is not None:
+                    columns |= sub_columns
+        elif model_field.is_relation:
+            # Relações para muitos (e reversas) vêm em consultas separadas
+            prefetch.append(prefix + attr)
+            if nested is not None:
+                _, sub_select, sub_prefetch = query_plan(
+                    nested, model_field.related_model, f'{prefix}{attr}__'
+                )
+                prefetch.extend(sub_select + sub_prefetch)
+        elif columns is not None:
+            columns.add(prefix + model_field.name)
+
+    return columns, select, prefetch
@@ -0,0 +1,341 @@
+"""
+Importação em lote do histórico de treinos vindo de outros apps.
+
+Formatos aceitos:
+
+- csv: uma linha por série, com as colunas start_time (obrigatória),
+  end_time, workout, exercise (obrigatória), set_number, reps, weight e
+  notes. As linhas com o mesmo (start_time, workout) formam uma sessão.
+  Horários sem fuso são lidos no fuso do usuário.
+- ndjson: o formato gerado pela exportação (export.py); apenas os registros
+  session, exercise_record e set são usados.
+
+A entrada é lida em streaming e gravada com bulk_create em lotes, cada um na
+sua transação. Sessões importadas não passam por complete_session: não
+geram XP, conquistas nem eventos. Rollups diários, calorias e a maior
+sequência são recalculados uma única vez no final. O app não guarda recordes
+pessoais (PRs) derivados, então não há recordes a recalcular.
+
+Reimportar o mesmo arquivo não duplica o histórico: sessões que já existem
+(mesmo usuário, treino e start_time) são ignoradas e contadas em duplicates.
+Valores fora dos limites das colunas viram erros de linha, antes de chegar
+ao banco.
+"""
+import csv
+import json
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching, calories, days, streaks
+from .models import (
+    User, Exercise, Workout, WorkoutExercise, WorkoutSession,
+    ExerciseRecord, SetRecord, DailyActivity
+)
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'ndjson')
+DEFAULT_WORKOUT_NAME = 'Treino importado'
+MAX_REPORTED_ERRORS = 50
+# Limites das colunas: PositiveIntegerField e DecimalField(max_digits=6, decimal_places=2)
+MAX_INT = 2147483647
+MAX_WEIGHT = Decimal('9999.99')
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def _parse_time(user, value, field):
+    when = parse_datetime(value or '') if isinstance(value, str) else None
+    if when is None:
+        raise ImportRowError(f"{field} inválido: {value!r}")
+    if timezone.is_naive(when):
+        # Apps de treino exportam a hora local de quem treinou, não a do servidor
+        when = when.replace(tzinfo=days.user_zone(user))
+    return when
+
+
+def _parse_int(value, field, default=None):
+    if value in (None, ''):
+        if default is None:
+            raise ImportRowError(f"{field} obrigatório")
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{field} inválido: {value!r}")
+    if not 0 <= number <= MAX_INT:
+        raise ImportRowError(f"{field} inválido: {value!r}")
+    return number
+
+
+def _parse_weight(value):
+    if value in (None, ''):
+        return None
+    try:
+        weight = Decimal(str(value)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ImportRowError(f"weight inválido: {value!r}")
+    if not weight.is_finite() or not 0 <= weight <= MAX_WEIGHT:
+        raise ImportRowError(f"weight inválido: {value!r}")
+    return weight
+
+
+def _set_row(user, start_time, end_time, workout, exercise, set_number, reps, weight, notes=''):
+    """Linha normalizada: uma série com os dados da sua sessão"""
+    if not exercise:
+        raise ImportRowError("exercise obrigatório")
+    start_time = _parse_time(user, start_time, 'start_time')
+    end_time = _parse_time(user, end_time, 'end_time') if end_time else None
+    return {
+        'session_key': (start_time, workout or DEFAULT_WORKOUT_NAME),
+        'start_time': start_time,
+        'end_time': end_time,
+        'workout': workout or DEFAULT_WORKOUT_NAME,
+        'exercise': exercise.strip(),
+        'set_number': _parse_int(set_number, 'set_number', default=0),
+        'reps': _parse_int(reps, 'reps'),
+        'weight': _parse_weight(weight),
+        'notes': notes or '',
+    }
+
+
+def parse_csv(user, lines):
+    for line_number, row in enumerate(csv.DictReader(lines), start=2):
+        try:
+            yield _set_row(
+                user, row.get('start_time'), row.get('end_time'), row.get('workout'), row.get('exercise'),
+                row.get('set_number'), row.get('reps'), row.get('weight'), row.get('notes')
+            )
+        except ImportRowError as error:
+            yield ImportRowError(f"linha {line_number}: {error}")
+
+
+def parse_ndjson(user, lines):
+    # Só os ids de sessões e registros ficam em memória; as séries passam direto
+    sessions = {}
+    records = {}
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            record_type = row.get('type')
+            if record_type == 'session':
+                sessions[row['id']] = row
+            elif record_type == 'exercise_record':
+                records[row['id']] = (row['session_id'], row['exercise__name'])
+            elif record_type == 'set':
+                session_id, exercise = records[row['exercise_record_id']]
+                session = sessions[session_id]
+                yield _set_row(
+                    user, session['start_time'], session.get('end_time'), session.get('workout__name'),
+                    exercise, row.get('set_number'), row.get('actual_reps'), row.get('weight'),
+                    session.get('notes')
+                )
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            yield ImportRowError(f"linha {line_number}: {error}")
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ndjson': parse_ndjson,
+}
+
+
+class WorkoutImporter:
+    """Grava as linhas normalizadas em lotes; uma instância por importação"""
+
+    def __init__(self, user, batch_size=None):
+        self.user = user
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.stats = {
+            'sessions': 0, 'exercise_records': 0, 'sets': 0,
+            'exercises_created': 0, 'workouts_created': 0, 'duplicates': 0, 'errors': 0,
+        }
+        self.errors = []
+
+        # Caches de nomes -> ids, carregados uma vez
+        self.exercises = {}
+        visible = Exercise.objects.filter(Q(user=user) | Q(user__is_staff=True)).order_by('pk')
+        for pk, name, owner_id in visible.values_list('pk', 'name', 'user_id'):
+            # Exercícios do próprio usuário têm prioridade sobre os globais
+            key = name.strip().lower()
+            if key not in self.exercises or owner_id == user.pk:
+                self.exercises[key] = pk
+        self.workouts = {
+            name.strip().lower(): pk
+            for pk, name in Workout.objects.filter(user=user).order_by('-pk').values_list('pk', 'name')
+        }
+        self.workout_exercises = {
+            (workout_id, exercise_id): pk
+            for pk, workout_id, exercise_id in WorkoutExercise.objects.filter(
+                workout__user=user
+            ).values_list('pk', 'workout_id', 'exercise_id')
+        }
+        # Sessões e registros já gravados por esta importação
+        self.sessions = {}
+        # Sessões que já existiam antes da importação: suas linhas são ignoradas
+        self.duplicates = set()
+        self.records = {}
+        self.pending = []
+
+    def run(self, rows):
+        for row in rows:
+            if isinstance(row, ImportRowError):
+                self.stats['errors'] += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append(str(row))
+                continue
+            self.pending.append(row)
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+        self.flush()
+        self.finish()
+        return {**self.stats, 'error_details': self.errors}
+
+    def exercise_id(self, name):
+        key = name.lower()
+        if key not in self.exercises:
+            exercise = Exercise.objects.create(name=name, description='', instructions='', user=self.user)
+            self.exercises[key] = exercise.pk
+            self.stats['exercises_created'] += 1
+        return self.exercises[key]
+
+    def workout_id(self, name):
+        key = name.strip().lower()
+        if key not in self.workouts:
+            workout = Workout.objects.create(name=name.strip(), user=self.user)
+            self.workouts[key] = workout.pk
+            self.stats['workouts_created'] += 1
+        return self.workouts[key]
+
+    def workout_exercise_id(self, workout_id, exercise_id):
+        key = (workout_id, exercise_id)
+        if key not in self.workout_exercises:
+            self.workout_exercises[key] = WorkoutExercise.objects.create(
+                workout_id=workout_id, exercise_id=exercise_id
+            ).pk
+        return self.workout_exercises[key]
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        rows = self.skip_existing(rows)
+        if not rows:
+            return
+
+        with transaction.atomic():
+            # Sessões novas deste lote
+            new_sessions = {}
+            for row in rows:
+                key = row['session_key']
+                if key in self.sessions or key in new_sessions:
+                    continue
+                end_time = row['end_time']
+                duration = int((end_time - row['start_time']).total_seconds()) if end_time else None
+                new_sessions[key] = WorkoutSession(
+                    user=self.user,
+                    workout_id=self.workout_id(row['workout']),
+                    end_time=end_time,
+                    duration=max(duration, 0) if duration is not None else None,
+                    notes=row['notes'],
+                    completed=end_time is not None,
+                )
+            if new_sessions:
+                created = WorkoutSession.objects.bulk_create(new_sessions.values())
+                # start_time é auto_now_add: o bulk_create grava a hora atual
+                for key, session in zip(new_sessions, created):
+                    session.start_time = key[0]
+                    self.sessions[key] = (session.pk, session.workout_id)
+                WorkoutSession.objects.bulk_update(created, ['start_time'])
+                self.stats['sessions'] += len(created)
+
+            # Registros de exercício novos deste lote
+            new_records = {}
+            for row in rows:
+                session_id, workout_id = self.sessions[row['session_key']]
+                exercise_id = self.exercise_id(row['exercise'])
+                key = (session_id, exercise_id)
+                row['record_key'] = key
+                if key in self.records or key in new_records:
+                    continue
+                new_records[key] = ExerciseRecord(
+                    session_id=session_id,
+                    exercise_id=exercise_id,
+                    workout_exercise_id=self.workout_exercise_id(workout_id, exercise_id),
+                )
+            if new_records:
+                created = ExerciseRecord.objects.bulk_create(new_records.values())
+                for key, record in zip(new_records, created):
+                    self.records[key] = record.pk
+                self.stats['exercise_records'] += len(created)
+
+            SetRecord.objects.bulk_create([
+                SetRecord(
+                    exercise_record_id=self.records[row['record_key']],
+                    set_number=row['set_number'],
+                    actual_reps=row['reps'],
+                    weight=row['weight'],
+                )
+                for row in rows
+            ])
+            self.stats['sets'] += len(rows)
+
+    def skip_existing(self, rows):
+        """Descartar as linhas de sessões (treino, start_time) que já estão no banco"""
+        unseen = {
+            row['session_key'] for row in rows
+            if row['session_key'] not in self.sessions and row['session_key'] not in self.duplicates
+        }
+        if unseen:
+            existing = set(
+                WorkoutSession.objects.filter(
+                    user=self.user, start_time__in={start for start, _ in unseen}
+                ).values_list('start_time', 'workout_id')
+            )
+            for key in unseen:
+                workout_id = self.workouts.get(key[1].strip().lower())
+                if workout_id is not None and (key[0], workout_id) in existing:
+                    self.duplicates.add(key)
+
+        kept = [row for row in rows if row['session_key'] not in self.duplicates]
+        self.stats['duplicates'] += len(rows) - len(kept)
+        return kept
+
+    def finish(self):
+        """Derivados recalculados uma vez: calorias, rollups diários e maior sequência"""
+        session_ids = [pk for pk, _ in self.sessions.values()]
+        for start in range(0, len(session_ids), self.batch_size):
+            chunk = session_ids[start:start + self.batch_size]
+            rows = WorkoutSession.objects.filter(pk__in=chunk, end_time__isnull=False).values_list(
+                'pk', 'workout_id', 'duration', 'user__weight', 'calories_burned'
+            )
+            changed = calories.recompute(list(rows))
+            WorkoutSession.objects.bulk_update(
+                [WorkoutSession(pk=pk, calories_burned=value) for pk, value in changed],
+                ['calories_burned']
+            )
+
+        DailyActivity.rebuild([self.user])
+        best = streaks.max_streaks([self.user.pk]).get(self.user.pk, 0)
+        if best > self.user.max_streak:
+            User.objects.filter(pk=self.user.pk).update(max_streak=best)
+            self.user.max_streak = best
+
+        caching.invalidate('user-profile', scope=self.user.pk)
+        caching.invalidate('user-stats', scope=self.user.pk)
+        logger.info("Importação de treinos do usuário %s: %s", self.user.pk, self.stats)
+
+
+def import_workouts(user, lines, input_format, batch_size=None):
+    """Importar as linhas (iterável de str) no formato informado; retorna as métricas"""
+    return WorkoutImporter(user, batch_size).run(PARSERS[input_format](user, lines))
@@ -0,0 +1,240 @@
+"""
+Rankings de XP (semanal, mensal e geral) e de streak.
+
+Os rankings ficam em sorted sets do Redis, atualizados incrementalmente a
+cada concessão de XP; posição e vizinhança saem em O(log n) com ZREVRANK e
+ZREVRANGE. Nos testes (LEADERBOARD_BACKEND = 'memory') um equivalente em
+memória substitui o Redis.
+
+Os rankings semanal e mensal viram no fuso settings.LEADERBOARD_TIME_ZONE
+(padrão: TIME_ZONE do projeto), o mesmo para todos os usuários; board_key e o
+rebuild_leaderboards usam period_start/board_key daqui para concordar.
+"""
+import bisect
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .days import get_zone
+
+logger = logging.getLogger(__name__)
+
+BOARDS = ('weekly', 'monthly', 'all-time', 'streak')
+
+# Rankings por período expiram depois que o período acaba
+PERIOD_TTL = {
+    'weekly': 14 * 24 * 3600,
+    'monthly': 62 * 24 * 3600,
+}
+
+
+class RedisSortedSets:
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def incr_many(self, items):
+        """items: [(key, member, amount, ttl)]"""
+        pipe = self.client.pipeline(transaction=False)
+        for key, member, amount, ttl in items:
+            pipe.zincrby(key, amount, member)
+            if ttl:
+                pipe.expire(key, ttl)
+        pipe.execute()
+
+    def set_many(self, key, scores):
+        if scores:
+            self.client.zadd(key, {str(member): score for member, score in scores.items()})
+
+    def remove(self, key, member):
+        self.client.zrem(key, member)
+
+    def rank(self, key, member):
+        return self.client.zrevrank(key, member)
+
+    def range(self, key, start, stop):
+        return [
+            (int(member), score)
+            for member, score in self.client.zrevrange(key, start, stop, withscores=True)
+        ]
+
+    def replace(self, key, tmp_key, ttl=None):
+        if self.client.exists(tmp_key):
+            self.client.rename(tmp_key, key)
+            if ttl:
+                self.client.expire(key, ttl)
+        else:
+            self.client.delete(key)
+
+
+class InMemorySortedSets:
+    """Sorted sets em memória com a mesma semântica de ordenação do Redis (para testes)"""
+
+    def __init__(self):
+        self.scores = {}
+        self.ordered = {}
+        self.lock = threading.Lock()
+
+    def _set(self, key, member, score):
+        member = str(member)
+        scores = self.scores.setdefault(key, {})
+        ordered = self.ordered.setdefault(key, [])
+        if member in scores:
+            ordered.pop(bisect.bisect_left(ordered, (-scores[member], _desc(member))))
+        scores[member] = score
+        bisect.insort(ordered, (-score, _desc(member)))
+
+    def incr_many(self, items):
+        with self.lock:
+            for key, member, amount, _ in items:
+                current = self.scores.get(key, {}).get(str(member), 0)
+                self._set(key, member, current + amount)
+
+    def set_many(self, key, scores):
+        with self.lock:
+            for member, score in scores.items():
+                self._set(key, member, score)
+
+    def remove(self, key, member):
+        with self.lock:
+            member = str(member)
+            scores = self.scores.get(key, {})
+            if member in scores:
+                ordered = self.ordered[key]
+                ordered.pop(bisect.bisect_left(ordered, (-scores.pop(member), _desc(member))))
+
+    def rank(self, key, member):
+        member = str(member)
+        scores = self.scores.get(key, {})
+        if member not in scores:
+            return None
+        return bisect.bisect_left(self.ordered[key], (-scores[member], _desc(member)))
+
+    def range(self, key, start, stop):
+        ordered = self.ordered.get(key, [])
+        # Como no ZREVRANGE: stop inclusivo e índices negativos contados do fim
+        start, stop = (index + len(ordered) if index < 0 else index for index in (start, stop))
+        return [
+            (int(_undesc(member)), -neg_score)
+            for neg_score, member in ordered[max(start, 0):stop + 1]
+        ]
+
+    def replace(self, key, tmp_key, ttl=None):
+        with self.lock:
+            self.scores[key] = self.scores.pop(tmp_key, {})
+            self.ordered[key] = self.ordered.pop(tmp_key, [])
+
+
+def _desc(member):
+    # Empates no Redis saem em ordem lexicográfica decrescente do membro; o 1
+    # final faz um prefixo ("1") vir depois da string maior ("10")
+    return tuple(-ord(char) for char in member) + (1,)
+
+
+def _undesc(member):
+    return ''.join(chr(-code) for code in member[:-1])
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if settings.LEADERBOARD_BACKEND == 'memory':
+            _backend = InMemorySortedSets()
+        else:
+            _backend = RedisSortedSets(settings.LEADERBOARD_REDIS_URL)
+    return _backend
+
+
+def period_now(when=None):
+    """O instante informado (padrão: agora) no fuso dos rankings"""
+    return (when or timezone.now()).astimezone(get_zone(settings.LEADERBOARD_TIME_ZONE))
+
+
+def period_start(board, when=None):
+    """Início do período (semana ou mês) do ranking que contém when"""
+    when = period_now(when)
+    if board == 'weekly':
+        when -= timedelta(days=when.weekday())
+    elif board == 'monthly':
+        when = when.replace(day=1)
+    else:
+        raise KeyError(board)
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def board_key(board, when=None):
+    when = period_now(when)
+    if board == 'weekly':
+        year, week, _ = when.isocalendar()
+        return f"lb:xp:week:{year}-W{week:02d}"
+    if board == 'monthly':
+        return f"lb:xp:month:{when:%Y-%m}"
+    if board == 'all-time':
+        return "lb:xp:all"
+    if board == 'streak':
+        return "lb:streak"
+    raise KeyError(board)
+
+
+def record_xp(user_id, amount, when=None):
+    """Somar XP aos rankings de XP depois do commit da transação corrente"""
+    items = [
+        (board_key(board, when), user_id, amount, PERIOD_TTL.get(board))
+        for board in ('weekly', 'monthly', 'all-time')
+    ]
+    transaction.on_commit(lambda: _safely(get_backend().incr_many, items))
+
+
+def record_xp_many(grants, when=None):
+    """grants: {user_id: amount}; usado nas concessões em lote"""
+    items = [
+        (board_key(board, when), user_id, amount, PERIOD_TTL.get(board))
+        for user_id, amount in grants.items()
+        for board in ('weekly', 'monthly', 'all-time')
+    ]
+    transaction.on_commit(lambda: _safely(get_backend().incr_many, items))
+
+
+def record_streak(user_id, streak_count):
+    key = board_key('streak')
+    transaction.on_commit(lambda: _safely(get_backend().set_many, key, {user_id: streak_count}))
+
+
+def remove_user(user_id):
+    """Retirar o usuário dos rankings sem período (os por período expiram)"""
+    for board in ('all-time', 'streak'):
+        key = board_key(board)
+        transaction.on_commit(lambda key=key: _safely(get_backend().remove, key, user_id))
+
+
+def _safely(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Falha ao atualizar ranking")
+
+
+def top(board, limit=10):
+    """Primeiras posições: [(posição, user_id, pontuação)]"""
+    entries = get_backend().range(board_key(board), 0, limit - 1)
+    return [(index + 1, user_id, score) for index, (user_id, score) in enumerate(entries)]
+
+
+def around(board, user_id, k=5):
+    """Posição do usuário e k vizinhos acima e abaixo"""
+    backend = get_backend()
+    key = board_key(board)
+    rank = backend.rank(key, user_id)
+    if rank is None:
+        return None, []
+
+    start = max(rank - k, 0)
+    entries = backend.range(key, start, rank + k)
+    return rank + 1, [(start + index + 1, member, score) for index, (member, score) in enumerate(entries)]
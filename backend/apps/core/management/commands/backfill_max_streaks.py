@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core import caching
+from apps.core.models import User
+from apps.core.streaks import max_streaks
+
+
+class Command(BaseCommand):
+    help = 'Backfills User.max_streak from the daily activity rollups (run rebuild_daily_activity first)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only backfill these user ids (repeatable)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        processed = changed = 0
+        last_id = 0
+        queryset = User.objects.all()
+        if options['user_ids']:
+            queryset = queryset.filter(pk__in=options['user_ids'])
+
+        while True:
+            users = list(
+                queryset.filter(pk__gt=last_id)
+                .order_by('pk')
+                .only('pk', 'streak_count', 'max_streak')[:chunk_size]
+            )
+            if not users:
+                break
+            last_id = users[-1].pk
+
+            best = max_streaks([user.pk for user in users])
+            updated = []
+            for user in users:
+                value = max(best.get(user.pk, 0), user.streak_count)
+                if value != user.max_streak:
+                    user.max_streak = value
+                    updated.append(user)
+
+            with transaction.atomic():
+                User.objects.bulk_update(updated, ['max_streak'])
+
+            caching.invalidate_many('user-profile', [user.pk for user in updated])
+            caching.invalidate_many('user-stats', [user.pk for user in updated])
+
+            processed += len(users)
+            changed += len(updated)
+            self.stdout.write(f'Processed {processed} users...')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {processed} users processed, {changed} updated'))
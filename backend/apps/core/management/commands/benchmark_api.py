@@ -0,0 +1,164 @@
+import json
+import platform
+import random
+import statistics
+import time
+from contextlib import nullcontext
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core import caching
+from apps.core.benchmarking import SCALES, SyntheticDataset, isolated_database, percentile
+from apps.core.models import User, Workout
+
+API = '/api/v1/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives the hot endpoints (stats, catalog list, start_session, record_set, complete) through the test '
+        'client on a generated dataset and prints p50/p95 latency and query counts as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', action='append', help='Run only this scenario (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs')
+        parser.add_argument(
+            '--existing-data', action='store_true',
+            help='Benchmark the configured database as is instead of a generated test database'
+        )
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        started = time.perf_counter()
+        database = nullcontext() if options['existing_data'] else isolated_database(options['keepdb'])
+
+        with database:
+            if not options['existing_data']:
+                self.stderr.write(f'Generating the {options["scale"]} dataset (seed {options["seed"]})...')
+                SyntheticDataset(seed=options['seed']).generate(**SCALES[options['scale']])
+            vendor = connection.vendor
+            results = self.run(options)
+
+        report = {
+            'meta': {
+                'database': vendor,
+                'dataset': 'existing' if options['existing_data'] else options['scale'],
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'elapsed_s': round(time.perf_counter() - started, 2),
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stderr.write(f'Report written to {options["output"]}')
+        else:
+            self.stdout.write(output)
+
+    def run(self, options):
+        # O usuário com mais sessões é o caso mais caro para stats e complete
+        user = User.objects.annotate(sessions=Count('workout_sessions')).order_by('-sessions', 'pk').first()
+        workout = (
+            Workout.objects.filter(user=user).annotate(exercises=Count('workout_exercises'))
+            .order_by('-exercises', 'pk').first()
+        )
+        if user is None or workout is None:
+            raise CommandError('No user with workouts to benchmark with; run generate_load_data first')
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        exercise_ids = list(workout.workout_exercises.order_by('order').values_list('exercise_id', flat=True))
+
+        def start():
+            return self.call('post', f'workouts/{workout.pk}/start_session/').data['id']
+
+        def record_sets(session_id):
+            for exercise_id in exercise_ids:
+                self.call('post', f'workout-sessions/{session_id}/record_set/',
+                          {'exercise_id': exercise_id, 'set_number': 1, 'actual_reps': 10, 'weight': '40.00'})
+
+        session_id = start()
+        set_numbers = iter(range(1, 1_000_000))
+
+        def record_set():
+            number = next(set_numbers)
+            return ('post', f'workout-sessions/{session_id}/record_set/', {
+                'exercise_id': exercise_ids[number % len(exercise_ids)],
+                'set_number': number, 'actual_reps': 10, 'weight': '40.00',
+            })
+
+        def complete():
+            # Cada iteração precisa de uma sessão aberta, preparada fora da medição
+            started_id = start()
+            record_sets(started_id)
+            return ('post', f'workout-sessions/{started_id}/complete/', None)
+
+        def stats_cold():
+            caching.invalidate('user-stats', scope=user.pk)
+            return ('get', 'users/stats/', None)
+
+        scenarios = {
+            'stats': stats_cold,
+            'stats_cached': lambda: ('get', 'users/stats/', None),
+            'catalog_list': lambda: ('get', 'exercises/', None),
+            'start_session': lambda: ('post', f'workouts/{workout.pk}/start_session/', None),
+            'record_set': record_set,
+            'complete': complete,
+        }
+        if options['only']:
+            unknown = set(options['only']) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+            scenarios = {name: prepare for name, prepare in scenarios.items() if name in options['only']}
+
+        results = {}
+        for name, prepare in scenarios.items():
+            self.stderr.write(f'Running {name}...')
+            for _ in range(options['warmup']):
+                self.measure(*prepare())
+            samples = [self.measure(*prepare()) for _ in range(options['iterations'])]
+            results[name] = self.summarize(samples)
+        return results
+
+    def call(self, method, path, data=None):
+        response = getattr(self.client, method)(API + path, data, format='json')
+        if response.status_code >= 400:
+            raise CommandError(f'{method.upper()} {path}: HTTP {response.status_code} {response.content[:200]!r}')
+        return response
+
+    def measure(self, method, path, data):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.call(method, path, data)
+            elapsed = time.perf_counter() - started
+        return {'ms': elapsed * 1000, 'queries': len(queries), 'status': response.status_code}
+
+    def summarize(self, samples):
+        latencies = [sample['ms'] for sample in samples]
+        queries = [sample['queries'] for sample in samples]
+        return {
+            'status': samples[-1]['status'],
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'max_ms': round(max(latencies), 3),
+            'queries_p50': percentile(queries, 50),
+            'queries_max': max(queries),
+        }
@@ -0,0 +1,119 @@
+import copy
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.db.utils import load_backend
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.benchmarking import percentile
+from apps.core.models import User
+
+API = '/api/v1/'
+DEFAULT_PATHS = ['notifications/unread_count/', 'users/me/']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares per-request latency of small endpoints with a new connection per request, persistent '
+        'connections (CONN_MAX_AGE) and the psycopg connection pool, against the configured database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths',
+                            help=f'API path to request (repeatable; default: {", ".join(DEFAULT_PATHS)})')
+        parser.add_argument('--user', help='Username to request as (default: user with the most notifications)')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.annotate(total=Count('notifications')).order_by('-total', 'pk').first()
+        if user is None:
+            raise CommandError('No user to benchmark with; run generate_load_data first')
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.connects = 0
+        connection_created.connect(self.count_connect)
+
+        base = copy.deepcopy(connections['default'].settings_dict)
+        base['OPTIONS'].pop('pool', None)
+        modes = [
+            ('per request', {**base, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}),
+            ('persistent', {**base, 'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True}),
+        ]
+        if connections['default'].vendor == 'postgresql':
+            pool_min, pool_max = settings.DB_POOL_SIZES['web']
+            modes.append(('pooled', {
+                **base, 'ENGINE': 'califit.postgresql_pool', 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True,
+                'OPTIONS': {**base['OPTIONS'], 'pool': {'min_size': pool_min, 'max_size': pool_max}},
+            }))
+        else:
+            self.stdout.write(self.style.WARNING('Not PostgreSQL: the pooled mode is skipped'))
+
+        self.stdout.write(
+            f'{options["requests"]} requests per endpoint and mode, connections closed as at the end of a request'
+        )
+        self.stdout.write(f'{"endpoint":<32}{"mode":<13}{"p50 ms":>9}{"p95 ms":>9}{"mean ms":>9}{"connects":>10}')
+        original = connections['default']
+        try:
+            for path in options['paths'] or DEFAULT_PATHS:
+                baseline = None
+                for mode, settings_dict in modes:
+                    connections['default'] = load_backend(settings_dict['ENGINE']).DatabaseWrapper(
+                        copy.deepcopy(settings_dict), 'default'
+                    )
+                    try:
+                        latencies, connects = self.run(path, options['requests'], options['warmup'])
+                    finally:
+                        self.release(connections['default'])
+
+                    p50 = percentile(latencies, 50)
+                    line = (
+                        f'{path:<32}{mode:<13}{p50:>9.3f}{percentile(latencies, 95):>9.3f}'
+                        f'{statistics.fmean(latencies):>9.3f}{connects:>10}'
+                    )
+                    if baseline is None:
+                        baseline = p50
+                    else:
+                        line += f'   saves {baseline - p50:.3f} ms/request (p50)'
+                    self.stdout.write(line)
+        finally:
+            connections['default'] = original
+            connection_created.disconnect(self.count_connect)
+
+    def count_connect(self, sender, connection, **kwargs):
+        self.connects += 1
+
+    def run(self, path, requests, warmup):
+        for _ in range(warmup):
+            self.request(path)
+        self.connects = 0
+        latencies = [self.request(path) for _ in range(requests)]
+        return latencies, self.connects
+
+    def request(self, path):
+        # O test client desliga o close_old_connections dos signals de
+        # request_started/request_finished; aqui ele roda como num servidor real
+        started = time.perf_counter()
+        close_old_connections()
+        response = self.client.get(API + path)
+        close_old_connections()
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise CommandError(f'GET {path}: HTTP {response.status_code}')
+        return elapsed * 1000
+
+    def release(self, connection):
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+        else:
+            connection.close()
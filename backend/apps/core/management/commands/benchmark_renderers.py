@@ -0,0 +1,87 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.core.middleware import brotli
+from apps.core.models import User, Workout, WorkoutSession
+from apps.core.renderers import ORJSONRenderer, MessagePackRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compares encode time and bytes on the wire (raw, gzip, brotli) of the JSON and MessagePack renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to request as (default: user with the most sessions)')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.annotate(sessions=Count('workout_sessions')).order_by('-sessions').first()
+        if user is None:
+            raise CommandError('No user to benchmark with; create some data first')
+
+        session = (
+            WorkoutSession.objects.filter(user=user).annotate(records=Count('exercise_records'))
+            .order_by('-records', '-pk').first()
+        )
+        workout = Workout.objects.filter(user=user).annotate(exercises=Count('workout_exercises')).order_by(
+            '-exercises', '-pk'
+        ).first()
+
+        endpoints = [
+            ('exercise catalog', '/api/v1/exercises/'),
+            ('workout templates', '/api/v1/workouts/templates/'),
+            ('session list', '/api/v1/workout-sessions/'),
+            ('stats', '/api/v1/users/stats/'),
+        ]
+        if session:
+            endpoints.append(('session detail', f'/api/v1/workout-sessions/{session.pk}/'))
+        if workout:
+            endpoints.append(('workout detail', f'/api/v1/workouts/{workout.pk}/'))
+
+        client = APIClient()
+        client.force_authenticate(user)
+        renderers = [
+            ('drf json', JSONRenderer()),
+            ('orjson', ORJSONRenderer()),
+            ('msgpack', MessagePackRenderer()),
+        ]
+
+        self.stdout.write(f'{options["repeat"]} rounds per renderer (averages); brotli: {"yes" if brotli else "not installed"}')
+        self.stdout.write(
+            f'{"endpoint":<20}{"renderer":<10}{"encode ms":>11}{"bytes":>10}{"gzip":>10}{"gzip ms":>9}{"br":>10}{"br ms":>8}'
+        )
+        for label, url in endpoints:
+            response = client.get(url, HTTP_ACCEPT='application/json')
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f'{label}: HTTP {response.status_code}, skipped'))
+                continue
+            data = response.data
+
+            for name, renderer in renderers:
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    body = renderer.render(data)
+                encode_ms = (time.perf_counter() - started) / options['repeat'] * 1000
+
+                gzipped, gzip_ms = self.timed(lambda: gzip.compress(body, compresslevel=6))
+                line = (
+                    f'{label:<20}{name:<10}{encode_ms:>11.3f}{len(body):>10}'
+                    f'{len(gzipped):>10}{gzip_ms:>9.3f}'
+                )
+                if brotli:
+                    compressed, br_ms = self.timed(lambda: brotli.compress(body, quality=4))
+                    line += f'{len(compressed):>10}{br_ms:>8.3f}'
+                self.stdout.write(line)
+
+    def timed(self, compress, rounds=10):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            result = compress()
+        return result, (time.perf_counter() - started) / rounds * 1000
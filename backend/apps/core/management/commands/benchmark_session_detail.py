@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import override_settings
+from django.test.client import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.core import builders
+from apps.core.models import WorkoutSession
+from apps.core.serializers import WorkoutSessionDetailSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compares WorkoutSessionDetailSerializer with the values()-based builders: time, queries and payload size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=20, help='Sessions with the most exercise records')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sessions = list(
+            WorkoutSession.objects.annotate(records=Count('exercise_records'))
+            .order_by('-records', '-pk')[:options['sessions']]
+        )
+        if not sessions:
+            raise CommandError('No sessions to benchmark; create some data first')
+
+        request = Request(RequestFactory().get('/'))
+        renderer = JSONRenderer()
+
+        variants = [
+            ('serializer', lambda session: WorkoutSessionDetailSerializer(session, context={'request': request}).data),
+            ('builder nested', lambda session: builders.session_detail(session, request, 'nested')),
+            ('builder flat', lambda session: builders.session_detail(session, request, 'flat')),
+        ]
+
+        reference = [renderer.render(variants[0][1](session)) for session in sessions]
+        nested = [renderer.render(variants[1][1](session)) for session in sessions]
+        if nested != reference:
+            self.stdout.write(self.style.WARNING('builder nested output differs from the serializer'))
+
+        self.stdout.write(f'{len(sessions)} sessions, {options["repeat"]} rounds (per session averages)')
+        self.stdout.write(f'{"variant":<16}{"ms":>10}{"queries":>10}{"bytes":>10}')
+        for label, build in variants:
+            # Refazer o objeto para não aproveitar caches de relações entre rodadas
+            fresh = [WorkoutSession.objects.get(pk=session.pk) for session in sessions]
+            with override_settings(DEBUG=True):
+                reset_queries()
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    payloads = [renderer.render(build(session)) for session in fresh]
+                elapsed = time.perf_counter() - started
+                queries = len(connection.queries)
+
+            runs = len(sessions) * options['repeat']
+            size = sum(len(payload) for payload in payloads) / len(sessions)
+            self.stdout.write(f'{label:<16}{elapsed / runs * 1000:>10.2f}{queries / runs:>10.1f}{size:>10.0f}')
@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.core import caching
+
+
+class Command(BaseCommand):
+    help = 'Shows hit/miss counters of the application cache layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing')
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(caching.stats(), indent=2))
+
+        if options['reset']:
+            caching.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
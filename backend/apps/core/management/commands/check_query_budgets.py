@@ -0,0 +1,338 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core import budgets
+from apps.core.benchmarking import isolated_database
+from apps.core.models import (
+    User, UserBodyMeasurement, MuscleGroup, Exercise, Workout, WorkoutExercise,
+    WorkoutSession, ExerciseRecord, SetRecord, Supplement, SupplementRecord,
+    Achievement, UserAchievement, Challenge, UserChallenge, Notification
+)
+from apps.core.urls import router
+
+API = '/api/v1/'
+
+
+def declared_routes():
+    """(viewset, ação) de todas as rotas registradas no router de apps/core/urls.py"""
+    routes = []
+    for _, viewset, _ in router.registry:
+        for route in router.get_routes(viewset):
+            for action in route.mapping.values():
+                if hasattr(viewset, action) and (viewset, action) not in routes:
+                    routes.append((viewset, action))
+    return routes
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives every route in apps/core/urls.py against a test database and fails when a view '
+        'runs more SQL queries than its query_budgets entry (or declares none)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs')
+
+    def handle(self, *args, **options):
+        with isolated_database(options['keepdb']):
+            failures = self.check_budgets()
+
+        if failures:
+            raise CommandError('Query budget check failed:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'{len(self.results)} requests within budget'))
+
+    def check_budgets(self):
+        """Roda os cenários no banco atual e devolve as falhas; também usado pela suíte de testes"""
+        routes = declared_routes()
+        missing = [
+            f'{viewset.__name__}.{action}' for viewset, action in routes
+            if action not in getattr(viewset, 'query_budgets', {})
+        ]
+
+        self.results = []
+        self.run_scenarios(self.build_fixture())
+
+        exercised = {(result['view'], result['action']) for result in self.results}
+        failures = [f'no query budget: {name}' for name in missing]
+
+        self.stdout.write(f'{"route":<48}{"status":>7}{"queries":>9}{"budget":>8}')
+        for result in self.results:
+            over = result['budget'] is not None and result['queries'] > result['budget']
+            line = (
+                f'{result["label"]:<48}{result["status"]:>7}{result["queries"]:>9}'
+                f'{result["budget"] if result["budget"] is not None else "-":>8}'
+            )
+            self.stdout.write(self.style.ERROR(line) if over else line)
+            if over:
+                failures.append(f'{result["label"]}: {result["queries"]} queries (budget {result["budget"]})')
+            if result['status'] >= 400:
+                failures.append(f'{result["label"]}: unexpected HTTP {result["status"]}')
+
+        for result in self.results:
+            for shape, count in result['repeated']:
+                self.stdout.write(self.style.WARNING(f'possible N+1 in {result["label"]}: {count}x {shape}'))
+
+        skipped = [
+            f'{viewset.__name__}.{action}' for viewset, action in routes
+            if (viewset.__name__, action) not in exercised
+        ]
+        if skipped:
+            failures.append(f'not exercised: {", ".join(skipped)}')
+        return failures
+
+    def request(self, method, path, data=None, client='user', fmt='json'):
+        path = API + path
+        match = resolve(path.split('?')[0])
+        view, actions = budgets.view_action(match)
+        action = actions.get(method)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.clients[client], method)(path, data, format=fmt)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        shapes = Counter(budgets.sql_shape(query['sql']) for query in queries.captured_queries)
+        self.results.append({
+            'label': f'{method.upper()} {path[len(API):]}',
+            'repeated': [(shape, count) for shape, count in shapes.items() if count >= settings.QUERY_REPEAT_THRESHOLD],
+            'view': view.__name__,
+            'action': action,
+            'status': response.status_code,
+            'queries': len(queries),
+            'budget': budgets.budget_for(match, method),
+        })
+        return response
+
+    def build_fixture(self):
+        """Dados suficientes para que um N+1 apareça como várias consultas"""
+        user = User.objects.create_user(username='budget', email='budget@example.com', password='x', weight=75)
+        admin = User.objects.create_user(
+            username='budget-admin', email='admin@example.com', password='x', is_staff=True
+        )
+        self.clients = {}
+        for name, account in (('user', user), ('admin', admin)):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(account)}')
+            self.clients[name] = client
+
+        groups = [MuscleGroup.objects.create(name=f'Grupo {index}') for index in range(3)]
+        exercises = []
+        for index in range(5):
+            exercise = Exercise.objects.create(
+                name=f'Exercício {index}', description='d', instructions='i', user=admin
+            )
+            exercise.muscle_groups.set(groups[:1 + index % 3])
+            exercises.append(exercise)
+
+        workout = Workout.objects.create(name='Treino', user=user)
+        template = Workout.objects.create(name='Template', user=admin, is_template=True)
+        for order, exercise in enumerate(exercises):
+            WorkoutExercise.objects.create(workout=workout, exercise=exercise, order=order)
+
+        for _ in range(3):
+            session = WorkoutSession.objects.create(user=user, workout=workout)
+            for workout_exercise in workout.workout_exercises.all():
+                record = ExerciseRecord.objects.create(
+                    session=session, exercise_id=workout_exercise.exercise_id, workout_exercise=workout_exercise
+                )
+                for number in range(1, 4):
+                    SetRecord.objects.create(exercise_record=record, set_number=number, actual_reps=10)
+            session.complete_session()
+
+        supplements = [
+            Supplement.objects.create(name=f'Suplemento {index}', user=user, frequency='daily')
+            for index in range(3)
+        ]
+        for supplement in supplements:
+            SupplementRecord.objects.create(supplement=supplement)
+
+        for index in range(3):
+            achievement = Achievement.objects.create(
+                name=f'Conquista {index}', description='d', requirement_type='workouts', requirement_value=100 + index
+            )
+            UserAchievement.objects.create(user=user, achievement=achievement)
+
+        today = timezone.localdate()
+        challenges = []
+        for index in range(3):
+            challenge = Challenge.objects.create(
+                name=f'Desafio {index}', description='d', icon='trophy', required_workouts=1,
+                start_date=today - timedelta(days=1), end_date=today + timedelta(days=30)
+            )
+            challenge.required_exercises.set(exercises[:2])
+            challenges.append(challenge)
+        for challenge in challenges[:2]:
+            UserChallenge.objects.create(user=user, challenge=challenge, workouts_done=1, exercises_done=2)
+
+        for index in range(5):
+            Notification.objects.create(user=user, title=f'Aviso {index}', message='m', type='system')
+        for weight in (76, 75, 74):
+            UserBodyMeasurement.objects.create(user=user, weight=weight)
+
+        return {
+            'user': user, 'groups': groups, 'exercises': exercises, 'workout': workout, 'template': template,
+            'supplement': supplements[0], 'challenges': challenges,
+        }
+
+    def run_scenarios(self, f):
+        user, workout, exercise, group = f['user'], f['workout'], f['exercises'][0], f['groups'][0]
+        request = self.request
+
+        # Usuários
+        request('get', 'users/')
+        request('get', f'users/{user.pk}/')
+        request('patch', f'users/{user.pk}/', {'first_name': 'Budget'})
+        for action in ('me', 'stats', 'xp_history', 'export', 'streak_calendar'):
+            request('get', f'users/{action}/')
+        new_user = request('post', 'users/', {'email': 'new@example.com', 'password': 'x-password-1'}).data['id']
+        request('put', f'users/{new_user}/', {
+            'username': 'new', 'email': 'new@example.com', 'password': 'x-password-2'
+        }, client='admin')
+        request('delete', f'users/{new_user}/', client='admin')
+
+        # Medidas
+        request('get', 'body-measurements/')
+        measurement = request('post', 'body-measurements/', {'weight': 80}).data['id']
+        request('get', f'body-measurements/{measurement}/')
+        request('put', f'body-measurements/{measurement}/', {'weight': 81})
+        request('patch', f'body-measurements/{measurement}/', {'weight': 82})
+        request('delete', f'body-measurements/{measurement}/')
+
+        # Grupos musculares e exercícios
+        request('get', 'muscle-groups/')
+        request('get', f'muscle-groups/{group.pk}/')
+        new_group = request('post', 'muscle-groups/', {'name': 'Novo grupo'}).data['id']
+        request('put', f'muscle-groups/{new_group}/', {'name': 'Outro grupo'})
+        request('patch', f'muscle-groups/{new_group}/', {'icon': 'x'})
+        request('delete', f'muscle-groups/{new_group}/')
+
+        request('get', 'exercises/')
+        request('get', f'exercises/{exercise.pk}/')
+        request('get', f'exercises/by_muscle_group/?muscle_group_id={group.pk}')
+        exercise_data = {
+            'name': 'Novo exercício', 'description': 'd', 'instructions': 'i',
+            'muscle_group_ids': [group.pk for group in f['groups']],
+        }
+        new_exercise = request('post', 'exercises/', exercise_data).data['id']
+        request('put', f'exercises/{new_exercise}/', exercise_data)
+        request('patch', f'exercises/{new_exercise}/', {'difficulty': 'advanced'})
+        request('delete', f'exercises/{new_exercise}/')
+
+        # Treinos
+        request('get', 'workouts/')
+        request('get', f'workouts/{workout.pk}/')
+        request('get', 'workouts/templates/')
+        workout_data = {
+            'name': 'Novo treino',
+            'workout_exercises': [{'exercise_id': item.pk, 'order': index} for index, item in enumerate(f['exercises'])],
+        }
+        new_workout = request('post', 'workouts/', workout_data).data['id']
+        request('put', f'workouts/{new_workout}/', workout_data)
+        request('patch', f'workouts/{new_workout}/', {'difficulty': 'beginner'})
+        clone = request('post', f'workouts/{workout.pk}/clone/').data
+        request('post', f'workouts/{f["template"].pk}/assign/', {'user_ids': [user.pk]}, client='admin')
+        request('delete', f'workouts/{new_workout}/')
+
+        workout_exercise = workout.workout_exercises.first()
+        request('post', 'workout-exercises/', {'workout': clone['id'], 'exercise_id': exercise.pk, 'order': 9})
+        request('get', 'workout-exercises/')
+        request('get', f'workout-exercises/{workout_exercise.pk}/')
+        request('put', f'workout-exercises/{workout_exercise.pk}/', {'exercise_id': exercise.pk, 'order': 0})
+        request('patch', f'workout-exercises/{workout_exercise.pk}/', {'notes': 'devagar'})
+        request('delete', f'workout-exercises/{clone["workout_exercises"][0]["id"]}/')
+
+        # Gamificação (antes das sessões, que concluiriam os desafios sozinhas)
+        achievement = UserAchievement.objects.filter(user=user).first()
+        request('get', 'achievements/')
+        request('get', f'achievements/{achievement.achievement_id}/')
+        request('get', 'achievements/my_achievements/')
+        request('get', 'user-achievements/')
+        request('get', f'user-achievements/{achievement.pk}/')
+
+        challenges = f['challenges']
+        request('get', 'challenges/')
+        request('get', f'challenges/{challenges[0].pk}/')
+        request('post', f'challenges/{challenges[2].pk}/join/')
+        request('post', f'challenges/{challenges[2].pk}/enroll/', {'user_ids': [user.pk]}, client='admin')
+        user_challenge = UserChallenge.objects.filter(user=user, challenge=challenges[0]).first()
+        request('get', 'user-challenges/')
+        request('get', f'user-challenges/{user_challenge.pk}/')
+        request('post', f'user-challenges/{user_challenge.pk}/complete/')
+
+        # Sessões
+        session = request('post', f'workouts/{workout.pk}/start_session/').data['id']
+        for number in (1, 2):
+            request('post', f'workout-sessions/{session}/record_set/', {
+                'exercise_id': exercise.pk, 'set_number': number, 'actual_reps': 10, 'weight': '40.00'
+            })
+        request('get', f'workout-sessions/{session}/events/')
+        request('post', f'workout-sessions/{session}/complete/')
+        request('get', 'workout-sessions/')
+        request('get', 'workout-sessions/recent/')
+        request('get', f'workout-sessions/{session}/')
+        request('put', f'workout-sessions/{session}/', {'workout': workout.pk, 'notes': 'ok'})
+        request('post', 'workout-sessions/', {'workout': workout.pk})
+        request('patch', f'workout-sessions/{session}/', {'notes': 'ok'})
+        upload = SimpleUploadedFile('history.csv', (
+            'start_time,workout,exercise,set_number,reps,weight\n'
+            '2024-01-02T10:00:00,Antigo,Agachamento,1,10,40\n'
+            '2024-01-02T10:00:00,Antigo,Agachamento,2,10,40\n'
+        ).encode())
+        request('post', 'workout-sessions/import/', {'file': upload}, fmt='multipart')
+
+        record = ExerciseRecord.objects.filter(session_id=session).first()
+        set_record = record.set_records.first()
+        request('get', 'exercise-records/')
+        request('get', f'exercise-records/{record.pk}/')
+        request('post', 'exercise-records/', {'session': session, 'workout_exercise': record.workout_exercise_id})
+        request('put', f'exercise-records/{record.pk}/', {})
+        request('patch', f'exercise-records/{record.pk}/', {})
+        request('get', 'set-records/')
+        request('get', f'set-records/{set_record.pk}/')
+        request('post', 'set-records/', {'exercise_record': record.pk, 'set_number': 3, 'actual_reps': 8})
+        request('put', f'set-records/{set_record.pk}/', {'set_number': 1, 'actual_reps': 12})
+        request('patch', f'set-records/{set_record.pk}/', {'actual_reps': 11})
+        request('delete', f'set-records/{set_record.pk}/')
+        request('delete', f'exercise-records/{record.pk}/')
+        request('delete', f'workout-sessions/{session}/')
+
+        # Suplementos
+        supplement = f['supplement']
+        request('get', 'supplements/')
+        request('get', f'supplements/{supplement.pk}/')
+        request('get', 'supplements/today/')
+        request('post', f'supplements/{supplement.pk}/take/')
+        request('post', f'supplements/{supplement.pk}/skip/')
+        new_supplement = request('post', 'supplements/', {'name': 'Creatina'}).data['id']
+        request('put', f'supplements/{new_supplement}/', {'name': 'Creatina', 'frequency': 'workout_day'})
+        request('patch', f'supplements/{new_supplement}/', {'description': '5 g'})
+        request('delete', f'supplements/{new_supplement}/')
+
+        request('get', 'supplement-records/')
+        supplement_record = request('post', 'supplement-records/', {'supplement': supplement.pk}).data['id']
+        request('get', f'supplement-records/{supplement_record}/')
+        request('put', f'supplement-records/{supplement_record}/', {'supplement': supplement.pk, 'taken': False})
+        request('patch', f'supplement-records/{supplement_record}/', {'taken': True})
+        request('delete', f'supplement-records/{supplement_record}/')
+
+        request('get', 'leaderboards/')
+        request('get', 'leaderboards/weekly/')
+        request('get', 'leaderboards/weekly/me/')
+
+        # Notificações
+        notification = Notification.objects.filter(user=user).first()
+        request('get', 'notifications/')
+        request('get', f'notifications/{notification.pk}/')
+        request('get', 'notifications/unread_count/')
+        request('post', f'notifications/{notification.pk}/mark_read/')
+        request('post', 'notifications/mark_all_read/')
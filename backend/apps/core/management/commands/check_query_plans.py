@@ -0,0 +1,82 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.models import (
+    User, UserBodyMeasurement, Workout, WorkoutSession,
+    Supplement, SupplementRecord, Notification, DailyActivity
+)
+
+
+def hot_queries():
+    """Consultas quentes das views, com os mesmos filtros e ordenações"""
+    user_id = 0
+    now = timezone.now()
+
+    return [
+        ('sessions list', WorkoutSession,
+         WorkoutSession.objects.filter(user_id=user_id).order_by('-start_time', '-id')[:20]),
+        ('completed sessions', WorkoutSession,
+         WorkoutSession.objects.filter(user_id=user_id, end_time__isnull=False)),
+        ('recent sessions', WorkoutSession,
+         WorkoutSession.objects.filter(
+             user_id=user_id, end_time__isnull=False, end_time__gte=now - timedelta(days=7)
+         ).order_by('-end_time')),
+        ('notifications list', Notification,
+         Notification.objects.filter(user_id=user_id).order_by('-created_at', '-id')[:20]),
+        ('unread notifications', Notification,
+         Notification.objects.filter(user_id=user_id, read=False)),
+        ('supplement records', SupplementRecord,
+         SupplementRecord.objects.filter(supplement_id=0).order_by('-timestamp', '-id')[:20]),
+        ('supplements by frequency', Supplement,
+         Supplement.objects.filter(user_id=user_id, frequency='daily')),
+        ('body measurements', UserBodyMeasurement,
+         UserBodyMeasurement.objects.filter(user_id=user_id).order_by('-date')),
+        ('workout templates', Workout,
+         Workout.objects.filter(is_template=True)),
+        ('streak warnings', User,
+         User.objects.filter(
+             streak_count__gte=3,
+             last_workout_date__gte=now.date() - timedelta(days=2),
+             last_workout_date__lte=now.date()
+         )),
+        ('daily activity', DailyActivity,
+         DailyActivity.objects.filter(user_id=user_id, date__gte=now.date() - timedelta(days=30))),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Fails if a hot query plan falls back to a sequential scan of its table'
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Unsupported database vendor: {connection.vendor}')
+
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Com tabelas pequenas o planner prefere seq scan; desligado, ele só
+                # o escolhe quando nenhum índice atende a consulta
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, model, queryset in hot_queries():
+                plan = queryset.explain()
+                if self.is_sequential_scan(plan, model._meta.db_table):
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'SEQ SCAN  {label}'))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'OK        {label}'))
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries use a sequential scan: {", ".join(failures)}')
+
+    def is_sequential_scan(self, plan, table):
+        if connection.vendor == 'postgresql':
+            return re.search(rf'Seq Scan on {table}\b', plan) is not None
+        # SQLite: "SCAN tabela" sem índice; buscas indexadas aparecem como SEARCH
+        return re.search(rf'\bSCAN {table}\b(?! USING (COVERING )?INDEX)', plan) is not None
@@ -0,0 +1,16 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.core.challenges import close_expired_challenges
+
+
+class Command(BaseCommand):
+    help = 'Closes expired challenges, paying out rewards and notifying participants in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        metrics = close_expired_challenges(chunk_size=options['chunk_size'])
+        self.stdout.write(json.dumps(metrics, indent=2))
@@ -0,0 +1,30 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import export
+from apps.core.models import User
+
+
+class Command(BaseCommand):
+    help = "Streams a user's complete training history as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='User id or email')
+        parser.add_argument('--export-format', choices=sorted(export.FORMATS), default='ndjson')
+        parser.add_argument('--output', help='File path (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lookup = {'pk': options['user']} if options['user'].isdigit() else {'email': options['user']}
+        try:
+            user = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"User not found: {options['user']}")
+
+        lines = export.stream(user, options['export_format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarking import SCALES, SyntheticDataset
+
+COUNTS = [
+    ('users', 'Users to create'),
+    ('exercises', 'Catalog exercises (owned by a staff user)'),
+    ('templates', 'Template workouts'),
+    ('workouts_per_user', 'Workouts per user'),
+    ('sessions_per_user', 'Completed sessions per user, spread over --days'),
+    ('sets_per_exercise', 'Sets recorded per exercise in each session'),
+    ('measurements_per_user', 'Body measurements per user'),
+    ('notifications_per_user', 'Notifications per user'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Generates a reproducible synthetic dataset with bulk_create and rebuilds the derived tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small',
+                            help='Preset sizes; the options below override individual counts')
+        for name, help_text in COUNTS:
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, help=help_text)
+        parser.add_argument('--days', type=int, default=180, help='Length of the generated history')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--prefix', default='load', help='Username prefix of the generated accounts')
+        parser.add_argument('--force', action='store_true', help='Allow running with DEBUG off')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('DEBUG is off; pass --force to write synthetic data to this database')
+
+        sizes = dict(SCALES[options['scale']])
+        sizes.update({name: options[name] for name, _ in COUNTS if options[name] is not None})
+
+        dataset = SyntheticDataset(
+            seed=options['seed'], batch_size=options['batch_size'], days=options['days'],
+            prefix=options['prefix'], stdout=self.stdout,
+        )
+        started = time.perf_counter()
+        counts = dataset.generate(**sizes)
+        elapsed = time.perf_counter() - started
+
+        for model, count in counts.items():
+            self.stdout.write(f'{model:<28}{count:>10}')
+        self.stdout.write(self.style.SUCCESS(f'Done in {elapsed:.1f}s'))
@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import importer
+from apps.core.models import User
+
+
+class Command(BaseCommand):
+    help = 'Bulk imports workout history (CSV with one row per set, or the NDJSON export) for a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='User id or email')
+        parser.add_argument('path')
+        parser.add_argument('--input-format', choices=importer.FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        lookup = {'pk': options['user']} if options['user'].isdigit() else {'email': options['user']}
+        try:
+            user = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"User not found: {options['user']}")
+
+        input_format = options['input_format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if input_format not in importer.FORMATS:
+            raise CommandError(f'Unknown input format: {input_format}')
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+            result = importer.import_workouts(user, lines, input_format, options['batch_size'])
+        self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,17 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.core.notifications import prune_notifications
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired notifications and compacts old read ones into digests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be removed')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        metrics = prune_notifications(dry_run=options['dry_run'], chunk_size=options['chunk_size'])
+        self.stdout.write(json.dumps(metrics, indent=2))
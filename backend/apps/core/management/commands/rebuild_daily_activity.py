@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apps.core import caching
+from apps.core.models import User, DailyActivity
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the DailyActivity rollups from completed sessions, bucketed by each user's time zone"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild these user ids (repeatable)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        processed = rows = 0
+        last_id = 0
+        queryset = User.objects.all()
+        if options['user_ids']:
+            queryset = queryset.filter(pk__in=options['user_ids'])
+
+        while True:
+            users = list(
+                queryset.filter(pk__gt=last_id)
+                .order_by('pk')
+                .only('pk', 'timezone')[:chunk_size]
+            )
+            if not users:
+                break
+            last_id = users[-1].pk
+
+            rows += DailyActivity.rebuild(users)
+            caching.invalidate_many('user-stats', [user.pk for user in users])
+
+            processed += len(users)
+            self.stdout.write(f'Rebuilt {processed} users...')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {processed} users, {rows} daily rows'))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.core import leaderboards
+from apps.core.models import User, XPEvent
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the leaderboard sorted sets from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        # Um único instante para o início do período e a chave, mesmo perto da virada
+        now = timezone.now()
+
+        self.rebuild('all-time', User.objects.filter(total_xp__gt=0).values_list('pk', 'total_xp'), chunk_size, now)
+        self.rebuild(
+            'streak', User.objects.filter(streak_count__gt=0).values_list('pk', 'streak_count'), chunk_size, now
+        )
+
+        for board in ('weekly', 'monthly'):
+            totals = (
+                XPEvent.objects.filter(created_at__gte=leaderboards.period_start(board, now))
+                .values_list('user_id')
+                .annotate(total=Sum('amount'))
+                .order_by('user_id')
+            )
+            self.rebuild(board, totals, chunk_size, now)
+
+    def rebuild(self, board, rows, chunk_size, now):
+        """Montar em uma chave temporária e trocar de uma vez"""
+        backend = leaderboards.get_backend()
+        key = leaderboards.board_key(board, now)
+        tmp_key = f"{key}:rebuild"
+
+        total = 0
+        chunk = {}
+        for user_id, score in rows.iterator(chunk_size=chunk_size):
+            chunk[user_id] = score
+            if len(chunk) >= chunk_size:
+                backend.set_many(tmp_key, chunk)
+                total += len(chunk)
+                chunk = {}
+        backend.set_many(tmp_key, chunk)
+        total += len(chunk)
+
+        backend.replace(key, tmp_key, leaderboards.PERIOD_TTL.get(board))
+        self.stdout.write(self.style.SUCCESS(f'{board}: {total} users'))
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from apps.core import caching
+from apps.core.models import User, XPEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds User.xp_points/total_xp/level from the XP ledger, keeping XP earned before the '
+        'ledger existed as a legacy event'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild these user ids (repeatable)')
+        parser.add_argument(
+            '--discard-legacy', action='store_true',
+            help=(
+                'Set totals to the ledger sum even when the stored total is higher. By default the '
+                'difference (XP earned before the ledger existed) is first recorded as a legacy event'
+            )
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        processed = seeded = 0
+        last_id = 0
+        queryset = User.objects.all()
+        if options['user_ids']:
+            queryset = queryset.filter(pk__in=options['user_ids'])
+
+        while True:
+            users = list(
+                queryset.filter(pk__gt=last_id)
+                .order_by('pk')
+                .only('pk', 'xp_points', 'total_xp', 'level', 'date_joined')[:chunk_size]
+            )
+            if not users:
+                break
+            last_id = users[-1].pk
+
+            with transaction.atomic():
+                totals = self.ledger_totals(users)
+
+                if not options['discard_legacy']:
+                    legacy = [
+                        # Datado no cadastro para não entrar nos rankings semanal e mensal
+                        XPEvent(user=user, source_type='legacy', source_id=user.pk,
+                                amount=user.total_xp - totals.get(user.pk, 0), created_at=user.date_joined)
+                        for user in users
+                        if user.total_xp > totals.get(user.pk, 0)
+                    ]
+                    XPEvent.objects.bulk_create(legacy, ignore_conflicts=True)
+                    seeded += len(legacy)
+                    totals = self.ledger_totals(users)
+
+                for user in users:
+                    total = totals.get(user.pk, 0)
+                    user.xp_points = total
+                    user.total_xp = total
+                    user.level = 1 + total // 100
+                User.objects.bulk_update(users, ['xp_points', 'total_xp', 'level'])
+
+            for user in users:
+                caching.invalidate('user-profile', scope=user.pk)
+                caching.invalidate('user-stats', scope=user.pk)
+
+            processed += len(users)
+            self.stdout.write(f'Rebuilt {processed} users...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {processed} users rebuilt, {seeded} legacy balances seeded'
+        ))
+
+    def ledger_totals(self, users):
+        return dict(
+            XPEvent.objects.filter(user__in=users)
+            .values_list('user_id')
+            .annotate(total=Sum('amount'))
+        )
@@ -0,0 +1,90 @@
+import multiprocessing
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from apps.core import calories
+from apps.core.models import WorkoutSession
+
+
+def recompute_range(bounds):
+    """Processa as sessões concluídas com pk em [low, high), em lotes"""
+    low, high, chunk_size = bounds
+    processed = updated = 0
+    last_id = low - 1
+
+    while True:
+        rows = list(
+            WorkoutSession.objects.filter(pk__gt=last_id, pk__lt=high, end_time__isnull=False)
+            .order_by('pk')
+            .values_list('pk', 'workout_id', 'duration', 'user__weight', 'calories_burned')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        changed = calories.recompute(rows)
+        with transaction.atomic():
+            WorkoutSession.objects.bulk_update(
+                [WorkoutSession(pk=pk, calories_burned=value) for pk, value in changed],
+                ['calories_burned'],
+                batch_size=chunk_size
+            )
+        processed += len(rows)
+        updated += len(changed)
+
+    return processed, updated
+
+
+def _close_connections():
+    # Conexões herdadas do processo pai não podem ser compartilhadas
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Re-estimates calories_burned for completed sessions with the MET engine, in parallel chunked passes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes, each taking a pk range')
+        parser.add_argument(
+            '--skip-rollups', action='store_true',
+            help='Do not rebuild the daily activity rollups afterwards'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        workers = max(options['workers'], 1)
+        started = time.monotonic()
+
+        span = WorkoutSession.objects.filter(end_time__isnull=False).aggregate(low=Min('pk'), high=Max('pk'))
+        if span['low'] is None:
+            self.stdout.write('No completed sessions')
+            return
+
+        step = (span['high'] - span['low']) // workers + 1
+        ranges = [
+            (span['low'] + index * step, span['low'] + (index + 1) * step, chunk_size)
+            for index in range(workers)
+        ]
+
+        if workers == 1:
+            results = [recompute_range(ranges[0])]
+        else:
+            _close_connections()
+            with multiprocessing.get_context('fork').Pool(workers, initializer=_close_connections) as pool:
+                results = pool.map(recompute_range, ranges)
+
+        processed = sum(result[0] for result in results)
+        updated = sum(result[1] for result in results)
+        self.stdout.write(
+            f'Processed {processed} sessions, updated {updated} in {time.monotonic() - started:.1f}s'
+        )
+
+        if not options['skip_rollups'] and updated:
+            call_command('rebuild_daily_activity', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS('Done'))
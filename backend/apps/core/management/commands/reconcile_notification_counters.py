@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.models import User, NotificationCounter
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized unread-notification counters from the notifications table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only reconcile these user ids (repeatable)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        if options['user_ids']:
+            NotificationCounter.reconcile(options['user_ids'])
+            self.stdout.write(self.style.SUCCESS(f"Reconciled {len(options['user_ids'])} users"))
+            return
+
+        processed = 0
+        last_id = 0
+        while True:
+            user_ids = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+
+            NotificationCounter.reconcile(user_ids)
+            processed += len(user_ids)
+            last_id = user_ids[-1]
+            self.stdout.write(f'Reconciled {processed} users...')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {processed} users reconciled'))
@@ -17,4 +17,9 @@ class Command(BaseCommand):
                 self.stdout.write('Database unavailable, waiting 1 second...')
                 time.sleep(1)
 
-        self.stdout.write(self.style.SUCCESS('Database available!'))
\ No newline at end of file
+        # Só uma sondagem: não deixar a conexão (ou um pool) aberta para os comandos seguintes
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+        else:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,99 @@
+"""
+Métricas de desempenho por rota no formato do Prometheus.
+
+RequestMetricsMiddleware (middleware.py) registra, para cada requisição, a latência, o número
+e o tempo das consultas SQL (via connection.execute_wrapper) e o tempo gasto
+nos serializers (medido em DynamicFieldsModelSerializer). A rota é o
+view_name do Django (ex.: "workoutsession-list"), o que mantém a
+cardinalidade baixa.
+
+Com vários workers do gunicorn, cada processo grava seus valores em arquivos
+mmap em PROMETHEUS_MULTIPROC_DIR (ver gunicorn.conf.py) e o endpoint
+/metrics agrega todos na leitura. Registrar uma observação custa só uma
+escrita em memória; a agregação acontece apenas quando o Prometheus coleta.
+"""
+import contextvars
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest, multiprocess
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REQUEST_LATENCY = Histogram(
+    'califit_http_request_duration_seconds', 'Latência das requisições HTTP',
+    ['method', 'route', 'status'], buckets=LATENCY_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'califit_db_queries_per_request', 'Consultas SQL por requisição',
+    ['route'], buckets=QUERY_COUNT_BUCKETS
+)
+DB_TIME = Histogram(
+    'califit_db_query_duration_seconds', 'Tempo total em SQL por requisição',
+    ['route'], buckets=LATENCY_BUCKETS
+)
+SERIALIZER_TIME = Histogram(
+    'califit_serializer_duration_seconds', 'Tempo total nos serializers por requisição',
+    ['route'], buckets=LATENCY_BUCKETS
+)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serializer_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: conta e cronometra cada consulta"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def activate(stats):
+    return _current.set(stats)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def current():
+    """Estatísticas da requisição em andamento (None fora do middleware)"""
+    return _current.get()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+def metrics_view(request):
+    """Exposição no formato texto do Prometheus (agregando os workers quando houver)"""
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Sem token só em desenvolvimento: em produção o endpoint expõe tráfego e latência por rota
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
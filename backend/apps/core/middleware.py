@@ -0,0 +1,112 @@
+"""
+Middlewares da aplicação.
+"""
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from . import budgets, metrics
+
+try:
+    import brotli
+except ImportError:  # sem o pacote Brotli, só gzip
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compressão das respostas com brotli (quando o cliente aceita e o pacote
+    está instalado) ou gzip.
+
+    Respostas menores que COMPRESSION_MIN_SIZE saem sem compressão: abaixo de
+    ~1 KB o ganho em bytes não paga o tempo de CPU. Respostas em streaming
+    (exportação) usam gzip, que comprime pedaço a pedaço.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or response.streaming or not re_accepts_brotli.search(accept_encoding):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+
+        # Mesmo tratamento do GZipMiddleware: o ETag forte passa a fraco
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+class RequestMetricsMiddleware:
+    """Latência, consultas SQL e tempo de serialização por rota (ver metrics.py)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED or request.path == settings.METRICS_PATH:
+            return self.get_response(request)
+
+        stats = metrics.RequestStats()
+        token = metrics.activate(stats)
+        started = time.perf_counter()
+        try:
+            with connections['default'].execute_wrapper(stats):
+                response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        elapsed = time.perf_counter() - started
+
+        route = metrics.route_name(request)
+        metrics.REQUEST_LATENCY.labels(request.method, route, response.status_code).observe(elapsed)
+        metrics.DB_QUERIES.labels(route).observe(stats.queries)
+        metrics.DB_TIME.labels(route).observe(stats.db_time)
+        metrics.SERIALIZER_TIME.labels(route).observe(stats.serializer_time)
+        return response
+
+
+class QueryInspectionMiddleware:
+    """
+    Para staging: aplica os orçamentos de consultas (budgets.py) às
+    requisições reais e registra possíveis N+1. Desligado por padrão
+    (QUERY_INSPECTION); o número de consultas vai no cabeçalho X-Query-Count.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_INSPECTION:
+            return self.get_response(request)
+
+        detector = budgets.RepeatedQueryDetector(
+            settings.QUERY_REPEAT_THRESHOLD, f'{request.method} {request.path}'
+        )
+        with connections['default'].execute_wrapper(detector):
+            response = self.get_response(request)
+
+        budget = budgets.budget_for(getattr(request, 'resolver_match', None), request.method)
+        if budget is not None and detector.queries > budget:
+            budgets.logger.warning(
+                "%s %s fez %d consultas (orçamento: %d)",
+                request.method, request.path, detector.queries, budget
+            )
+        response.headers['X-Query-Count'] = str(detector.queries)
+        return response
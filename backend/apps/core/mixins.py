@@ -0,0 +1,123 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from . import caching, fieldsets
+from .models import TableVersion
+
+
+class ConditionalGetMixin:
+    """
+    Suporte a GET condicional (ETag / Last-Modified) para endpoints de catálogo.
+    
+    O ETag é derivado das versões em TableVersion (incrementadas por signals),
+    então um If-None-Match válido é respondido com 304 antes de qualquer
+    consulta ao catálogo ou serialização.
+    
+    Com cache_entity definido, o payload das respostas 200 é guardado na
+    camada de cache usando o próprio ETag como chave.
+    """
+    conditional_models = ()
+    cache_entity = None
+    
+    def get_conditional_state(self, request):
+        """Retorna (etag, last_modified) para a requisição atual"""
+        state = TableVersion.current(self.conditional_models)
+        
+        parts = [f"{table}:{version}" for table, (version, _) in sorted(state.items())]
+        # A mesma versão gera corpos diferentes conforme filtros, página e formato
+        parts.append(request.get_full_path())
+        parts.append(request.META.get('HTTP_ACCEPT', ''))
+        etag = quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+        
+        timestamps = [updated_at for _, updated_at in state.values() if updated_at]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        return etag, last_modified
+    
+    def conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_conditional_state(request)
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            if self.cache_entity:
+                data = caching.get_or_set(
+                    self.cache_entity, etag,
+                    lambda: handler(request, *args, **kwargs).data
+                )
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+        
+        if response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            # Dados autenticados: o cliente pode guardar, mas deve revalidar
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """
+    Reduz o SQL de list/retrieve aos campos pedidos em ?fields= / ?expand=.
+    
+    O serializer recortado (ver fieldsets.py) define as colunas do only(), os
+    JOINs do select_related() e as relações do prefetch_related(). Quando
+    algum campo não é uma coluna (propriedade, SerializerMethodField) o
+    only() é omitido e só as relações são ajustadas.
+    """
+    sparse_actions = ('list', 'retrieve')
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.sparse_actions:
+            queryset = self.sparse_queryset(queryset)
+        return queryset
+    
+    def sparse_queryset(self, queryset, serializer_class=None):
+        fields, expand = fieldsets.requested(self.request)
+        if fields is None and expand is None:
+            return queryset
+        
+        serializer_class = serializer_class or self.get_serializer_class()
+        serializer = serializer_class(context=self.get_serializer_context())
+        columns, select, prefetch = fieldsets.query_plan(serializer, queryset.model)
+        
+        if columns is None:
+            select, _ = self._without_prefetched(select, (), queryset._prefetch_related_lookups)
+            if select:
+                queryset = queryset.select_related(*select)
+            return queryset.prefetch_related(*prefetch)
+        
+        # Com only(), relações carregadas que não foram pedidas precisam sair
+        needed = select + prefetch
+        existing = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if any(
+                path == through or path.startswith(through + '__')
+                for through in [getattr(lookup, 'prefetch_through', lookup)] for path in needed
+            )
+        ]
+        select, columns = self._without_prefetched(select, columns, existing)
+        keyset_field = getattr(self, 'keyset_field', None)
+        if keyset_field:
+            columns.add(keyset_field)
+        queryset = queryset.select_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        return queryset.prefetch_related(None).prefetch_related(*existing, *prefetch).only(*columns)
+    
+    def _without_prefetched(self, select, columns, lookups):
+        """Relações que a view já busca com Prefetch (ex.: queryset anotado) não viram JOIN"""
+        prefetched = tuple(getattr(lookup, 'prefetch_to', lookup) + '__' for lookup in lookups)
+        select = [path for path in select if not (path + '__').startswith(prefetched)]
+        columns = {column for column in columns if not column.startswith(prefetched)}
+        return select, columns
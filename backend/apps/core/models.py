@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q, Count
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -17,12 +19,23 @@ class User(AbstractUser):
     xp_points = models.PositiveIntegerField(default=0)
     total_xp = models.PositiveIntegerField(default=0)
     streak_count = models.PositiveIntegerField(default=0)
+    max_streak = models.PositiveIntegerField(default=0, help_text=_("Longest streak of consecutive training days"))
     last_workout_date = models.DateField(null=True, blank=True)
     streak_last_date = models.DateField(null=True, blank=True)
+    timezone = models.CharField(max_length=64, default='America/Sao_Paulo', help_text=_("IANA time zone used for daily stats and streaks"))
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # check_streak_warnings: streak_count >= 3 e último treino ontem
+            models.Index(
+                fields=['last_workout_date'], name='user_streak_warning_idx',
+                condition=Q(streak_count__gte=3)
+            ),
+        ]
+    
     def save(self, *args, **kwargs):
         # Ao criar um usuário, gerar automaticamente um username a partir do email se não for fornecido
         if not self.username:
@@ -50,26 +63,92 @@ class User(AbstractUser):
         xp_in_current_level = self.xp_points % xp_for_level
         return int((xp_in_current_level / xp_for_level) * 100)
     
-    def add_xp(self, points):
-        """Adiciona pontos de XP e atualiza o nível, se necessário"""
-        self.xp_points += points
-        self.total_xp += points
+    def add_xp(self, points, source_type, source_id):
+        """
+        Registra o XP no ledger e atualiza totais e nível no banco.
         
-        # Verificar se o usuário subiu de nível
-        old_level = self.level
-        new_level = 1 + (self.xp_points // 100)
+        Cada origem (source_type, source_id) só concede XP uma vez; repetir a
+        chamada não altera nada e retorna False.
+        """
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    XPEvent.objects.create(
+                        user=self,
+                        source_type=source_type,
+                        source_id=source_id,
+                        amount=points
+                    )
+            except IntegrityError:
+                return False
+            
+            # Incremento no banco, sem ler-modificar-gravar a linha do usuário
+            User.objects.filter(pk=self.pk).update(
+                xp_points=F('xp_points') + points,
+                total_xp=F('total_xp') + points,
+                level=1 + (F('xp_points') + points) / 100
+            )
+            self.xp_points, self.total_xp, self.level = User.objects.filter(pk=self.pk).values_list(
+                'xp_points', 'total_xp', 'level'
+            ).get()
         
-        if new_level > old_level:
-            self.level = new_level
-            self.save()
-            return True  # Indica que subiu de nível
+        # update() não dispara signals
+        from . import caching, leaderboards
+        caching.invalidate_on_commit('user-profile', scope=self.pk)
+        caching.invalidate_on_commit('user-stats', scope=self.pk)
+        leaderboards.record_xp(self.pk, points)
         
-        self.save()
-        return False
+        # Verificar se o usuário subiu de nível
+        old_level = 1 + (self.xp_points - points) // 100
+        return self.level > old_level
     
-    def update_streak(self):
-        """Atualizar streak ao completar um treino"""
-        today = timezone.now().date()
+    @classmethod
+    def add_xp_many(cls, points, source_type, grants):
+        """
+        Versão em lote de add_xp para jobs: grants é [(user_id, source_id)].
+        
+        Origens já registradas no ledger são ignoradas; retorna {user_id: xp}
+        efetivamente concedido. Chamar dentro de uma transação.
+        """
+        source_ids = [source_id for _, source_id in grants]
+        already = set(
+            XPEvent.objects.filter(source_type=source_type, source_id__in=source_ids)
+            .values_list('user_id', 'source_id')
+        )
+        new = [(user_id, source_id) for user_id, source_id in grants if (user_id, source_id) not in already]
+        if not new:
+            return {}
+        
+        XPEvent.objects.bulk_create(
+            [XPEvent(user_id=user_id, source_type=source_type, source_id=source_id, amount=points)
+             for user_id, source_id in new],
+            ignore_conflicts=True
+        )
+        
+        # Um UPDATE por multiplicidade (normalmente só uma)
+        granted = {}
+        for user_id, _ in new:
+            granted[user_id] = granted.get(user_id, 0) + points
+        by_amount = {}
+        for user_id, amount in granted.items():
+            by_amount.setdefault(amount, []).append(user_id)
+        for amount, user_ids in by_amount.items():
+            cls.objects.filter(pk__in=user_ids).update(
+                xp_points=F('xp_points') + amount,
+                total_xp=F('total_xp') + amount,
+                level=1 + (F('xp_points') + amount) / 100
+            )
+        
+        from . import caching, leaderboards
+        caching.invalidate_many_on_commit('user-profile', granted)
+        caching.invalidate_many_on_commit('user-stats', granted)
+        leaderboards.record_xp_many(granted)
+        return granted
+    
+    def update_streak(self, today=None):
+        """Atualizar streak ao completar um treino (today é o dia local do usuário)"""
+        from .days import local_date
+        today = today or local_date(self)
         
         # Se não tem data anterior ou é o primeiro treino
         if not self.streak_last_date:
@@ -84,9 +163,44 @@ class User(AbstractUser):
         else:
             self.streak_count = 1
         
+        self.max_streak = max(self.max_streak, self.streak_count)
         self.streak_last_date = today
         self.last_workout_date = today
-        self.save()
+        self.save(update_fields=['streak_count', 'max_streak', 'streak_last_date', 'last_workout_date'])
+        
+        from .leaderboards import record_streak
+        record_streak(self.pk, self.streak_count)
+
+
+class XPEvent(models.Model):
+    """Ledger de XP (somente inserções); os totais em User são derivados dele"""
+    SOURCE_TYPES = [
+        ('session', 'Sessão de treino'),
+        ('achievement', 'Conquista'),
+        ('challenge', 'Desafio'),
+        ('legacy', 'Saldo anterior ao ledger'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='xp_events')
+    source_type = models.CharField(max_length=20, choices=SOURCE_TYPES)
+    source_id = models.PositiveBigIntegerField()
+    amount = models.IntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Idempotência: cada origem concede XP uma única vez
+            models.UniqueConstraint(fields=['user', 'source_type', 'source_id'], name='xp_event_source_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='xp_event_user_created_idx'),
+            # Janelas semanais/mensais dos rankings
+            models.Index(fields=['created_at'], name='xp_event_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} +{self.amount} ({self.source_type}:{self.source_id})"
 
 
 class UserBodyMeasurement(models.Model):
@@ -104,6 +218,9 @@ class UserBodyMeasurement(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['user', '-date'], name='measurement_user_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.date}"
@@ -115,6 +232,10 @@ class MuscleGroup(models.Model):
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, blank=True, help_text=_("Icon identifier"))
     
+    class Meta:
+        # Ordem estável nos exercícios serializados (e igual à de builders.py)
+        ordering = ['id']
+    
     def __str__(self):
         return self.name
 
@@ -135,6 +256,7 @@ class Exercise(models.Model):
     equipment_needed = models.TextField(blank=True, help_text=_("Equipment needed for this exercise"))
     image = models.ImageField(upload_to='exercise_images/', null=True, blank=True)
     video_url = models.URLField(null=True, blank=True)
+    met_value = models.FloatField(null=True, blank=True, help_text=_("Metabolic equivalent (MET); defaults by difficulty when empty"))
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercises')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -154,12 +276,57 @@ class Workout(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Listagem de templates (is_template=True), compartilhada por todos os usuários
+            models.Index(fields=['-created_at'], name='workout_template_idx', condition=Q(is_template=True)),
+        ]
+    
     def __str__(self):
         return self.name
     
     @property
     def exercise_count(self):
+        # As listagens anotam exercise_total (Count) para não consultar treino a treino
+        annotated = getattr(self, 'exercise_total', None)
+        if annotated is not None:
+            return annotated
         return self.workout_exercises.count()
+    
+    def clone_for(self, user_ids, name=None, batch_size=1000):
+        """
+        Copiar o treino e seus exercícios para cada usuário informado.
+        
+        São sempre três comandos por lote, independente do número de
+        exercícios: a leitura dos exercícios e dois bulk_create.
+        """
+        exercises = list(self.workout_exercises.values(
+            'exercise_id', 'order', 'sets', 'target_reps', 'rest_duration', 'notes'
+        ))
+        user_ids = list(user_ids)
+        
+        copies = []
+        with transaction.atomic():
+            for start in range(0, len(user_ids), batch_size):
+                created = Workout.objects.bulk_create([
+                    Workout(
+                        user_id=user_id,
+                        name=name or self.name,
+                        description=self.description,
+                        is_template=False,
+                        estimated_duration=self.estimated_duration,
+                        difficulty=self.difficulty
+                    )
+                    for user_id in user_ids[start:start + batch_size]
+                ])
+                # Os exercícios de todas as cópias do lote num INSERT só (o SQLite ainda
+                # divide pelo limite de parâmetros)
+                WorkoutExercise.objects.bulk_create(
+                    [WorkoutExercise(workout=copy, **exercise) for copy in created for exercise in exercises],
+                    batch_size=batch_size * max(len(exercises), 1)
+                )
+                copies.extend(created)
+        return copies
 
 
 class WorkoutExercise(models.Model):
@@ -216,9 +383,19 @@ class WorkoutSession(models.Model):
     notes = models.TextField(blank=True)
     xp_earned = models.PositiveIntegerField(default=0)
     completed = models.BooleanField(default=False)
+    event_seq = models.PositiveIntegerField(default=0, help_text="Último número de sequência dos eventos de sincronização")
     
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            # Listagem e paginação por cursor de /workout-sessions/
+            models.Index(fields=['user', '-start_time', '-id'], name='session_user_start_idx'),
+            # Sessões concluídas: estatísticas, conquistas e /workout-sessions/recent/
+            models.Index(
+                fields=['user', '-end_time'], name='session_user_done_idx',
+                condition=Q(end_time__isnull=False)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.workout.name} - {self.start_time.date()}"
@@ -238,10 +415,10 @@ class WorkoutSession(models.Model):
         delta = self.end_time - self.start_time
         self.duration = int(delta.total_seconds())
         
-        # Calcular calorias (fórmula simplificada)
-        weight = self.user.weight or 70  # padrão de 70kg se não tiver peso cadastrado
+        # Calcular calorias por MET a partir das séries registradas
+        from .calories import estimate_session
         minutes = self.duration / 60
-        self.calories_burned = int((minutes * 8 * float(weight)) / 70)
+        self.calories_burned = estimate_session(self)
         
         # Calcular XP baseado na duração e exercícios
         base_xp = 50  # XP base por completar qualquer treino
@@ -254,14 +431,23 @@ class WorkoutSession(models.Model):
         self.xp_earned = base_xp + duration_xp + exercise_xp + randomness
         self.xp_earned = max(self.xp_earned, 10)  # Garantir pelo menos 10 XP
         
-        # Atualizar usuário
-        level_up = self.user.add_xp(self.xp_earned)
-        self.user.update_streak()
+        from .days import local_date
+        day = local_date(self.user, self.end_time)
         
-        self.save()
-        
-        # Verificar conquistas
-        self.check_achievements()
+        with transaction.atomic():
+            # Atualizar usuário
+            level_up = self.user.add_xp(self.xp_earned, 'session', self.pk)
+            self.user.update_streak(day)
+            
+            self.save()
+            DailyActivity.record(self, day)
+            
+            # Verificar conquistas
+            self.check_achievements()
+            
+            # Progresso dos desafios ativos, na mesma transação
+            from .challenges import update_challenge_progress
+            update_challenge_progress(self)
         
         return self.xp_earned, level_up
     
@@ -269,6 +455,112 @@ class WorkoutSession(models.Model):
         """Verificar e atribuir conquistas baseadas nesta sessão"""
         from .achievements import check_achievements_for_session
         check_achievements_for_session(self)
+    
+    def record_event(self, kind, data):
+        """Registrar um evento de sincronização com o próximo número de sequência"""
+        from .realtime import push_session_event
+        
+        with transaction.atomic():
+            # O UPDATE trava a linha da sessão até o commit, serializando as sequências
+            WorkoutSession.objects.filter(pk=self.pk).update(event_seq=F('event_seq') + 1)
+            self.event_seq = WorkoutSession.objects.filter(pk=self.pk).values_list('event_seq', flat=True).get()
+            event = WorkoutSessionEvent.objects.create(
+                session=self,
+                seq=self.event_seq,
+                kind=kind,
+                data=data
+            )
+        
+        push_session_event(event)
+        return event
+
+
+class WorkoutSessionEvent(models.Model):
+    """Deltas de uma sessão de treino, para sincronizar vários dispositivos"""
+    EVENT_KINDS = [
+        ('set_recorded', 'Série registrada'),
+        ('completed', 'Sessão finalizada'),
+    ]
+    
+    session = models.ForeignKey(WorkoutSession, on_delete=models.CASCADE, related_name='events')
+    seq = models.PositiveIntegerField()
+    kind = models.CharField(max_length=20, choices=EVENT_KINDS)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('session', 'seq')
+        ordering = ['seq']
+    
+    def __str__(self):
+        return f"{self.session_id} #{self.seq} {self.kind}"
+    
+    def as_message(self):
+        return {
+            'type': self.kind,
+            'session': self.session_id,
+            'seq': self.seq,
+            'data': self.data,
+        }
+
+
+class DailyActivity(models.Model):
+    """Rollup das sessões concluídas por dia local do usuário"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity')
+    date = models.DateField(help_text=_("Local date in the user's time zone when the sessions were completed"))
+    workouts = models.PositiveIntegerField(default=0)
+    duration = models.PositiveIntegerField(default=0, help_text="Duração em segundos")
+    calories_burned = models.PositiveIntegerField(default=0)
+    xp_earned = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='daily_activity_user_date_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.date} ({self.workouts} treinos)"
+    
+    @classmethod
+    def record(cls, session, day):
+        """Somar uma sessão concluída ao dia local, criando a linha se necessário"""
+        increments = dict(
+            workouts=F('workouts') + 1,
+            duration=F('duration') + (session.duration or 0),
+            calories_burned=F('calories_burned') + (session.calories_burned or 0),
+            xp_earned=F('xp_earned') + session.xp_earned,
+        )
+        updated = cls.objects.filter(user_id=session.user_id, date=day).update(**increments)
+        if not updated:
+            cls.objects.get_or_create(user_id=session.user_id, date=day)
+            cls.objects.filter(user_id=session.user_id, date=day).update(**increments)
+    
+    @classmethod
+    def rebuild(cls, users):
+        """Recalcular os rollups dos usuários a partir das sessões concluídas, no fuso de cada um"""
+        from .days import local_date
+        
+        by_id = {user.pk: user for user in users}
+        totals = {}
+        sessions = WorkoutSession.objects.filter(user_id__in=by_id, end_time__isnull=False).values_list(
+            'user_id', 'end_time', 'duration', 'calories_burned', 'xp_earned'
+        )
+        for user_id, end_time, duration, calories, xp in sessions.iterator():
+            row = totals.setdefault((user_id, local_date(by_id[user_id], end_time)), [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += duration or 0
+            row[2] += calories or 0
+            row[3] += xp
+        
+        with transaction.atomic():
+            cls.objects.filter(user_id__in=by_id).delete()
+            cls.objects.bulk_create([
+                cls(user_id=user_id, date=day, workouts=workouts, duration=duration,
+                    calories_burned=calories, xp_earned=xp)
+                for (user_id, day), (workouts, duration, calories, xp) in totals.items()
+            ])
+        return len(totals)
 
 
 class ExerciseRecord(models.Model):
@@ -317,6 +609,12 @@ class Supplement(models.Model):
     minutes_after_workout = models.PositiveIntegerField(null=True, blank=True)
     days = models.CharField(max_length=50, blank=True, help_text="Dias da semana separados por vírgula (0-6, 0=Segunda)")
     
+    class Meta:
+        indexes = [
+            # /supplements/today/ filtra por frequência
+            models.Index(fields=['user', 'frequency'], name='supplement_user_freq_idx'),
+        ]
+    
     def __str__(self):
         return self.name
 
@@ -327,6 +625,12 @@ class SupplementRecord(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     taken = models.BooleanField(default=True)
     
+    class Meta:
+        indexes = [
+            # Paginação por cursor de /supplement-records/
+            models.Index(fields=['supplement', '-timestamp', '-id'], name='supprecord_supp_ts_idx'),
+        ]
+    
     def __str__(self):
         status = "tomado" if self.taken else "pulado"
         return f"{self.supplement.name} - {status} em {self.timestamp}"
@@ -367,6 +671,7 @@ class Notification(models.Model):
         ('supplement', 'Suplemento'),
         ('workout', 'Treino'),
         ('system', 'Sistema'),
+        ('digest', 'Resumo'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
@@ -380,9 +685,93 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Listagem e paginação por cursor de /notifications/
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+            # Contagem e marcação de não lidas
+            models.Index(
+                fields=['user', '-created_at'], name='notif_user_unread_idx',
+                condition=Q(read=False)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
+    
+    def save(self, *args, **kwargs):
+        # Manter o contador de não lidas na mesma transação da inserção
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding and not self.read:
+                NotificationCounter.adjust(self.user_id, 1)
+    
+    def mark_read(self):
+        """Marcar como lida, decrementando o contador apenas se ainda não estava lida"""
+        with transaction.atomic():
+            changed = Notification.objects.filter(pk=self.pk, read=False).update(read=True)
+            if changed:
+                NotificationCounter.adjust(self.user_id, -1)
+        self.read = True
+    
+    @classmethod
+    def mark_all_read(cls, user):
+        """Marcar todas as não lidas do usuário (índice parcial de não lidas)"""
+        with transaction.atomic():
+            changed = cls.objects.filter(user=user, read=False).update(read=True)
+            if changed:
+                NotificationCounter.adjust(user.pk, -changed)
+        return changed
+
+
+class NotificationCounter(models.Model):
+    """Contador desnormalizado de notificações não lidas por usuário"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.unread} não lidas"
+    
+    @classmethod
+    def adjust(cls, user_id, delta):
+        """
+        Somar delta ao contador. Chamar depois da alteração nas notificações:
+        sem linha, o contador é criado a partir da contagem na tabela (que já
+        inclui a alteração), preservando as não lidas anteriores ao contador
+        """
+        updated = cls.objects.filter(pk=user_id).update(unread=Greatest(F('unread') + delta, 0))
+        if not updated:
+            cls.reconcile([user_id])
+    
+    @classmethod
+    def adjust_many(cls, user_ids, delta):
+        """Somar delta aos contadores existentes num único UPDATE; os ausentes são reconciliados na leitura"""
+        cls.objects.filter(pk__in=user_ids).update(unread=Greatest(F('unread') + delta, 0))
+    
+    @classmethod
+    def get_unread(cls, user_id):
+        """Leitura por chave primária; usuários sem linha são contados uma única vez"""
+        unread = cls.objects.filter(pk=user_id).values_list('unread', flat=True).first()
+        if unread is None:
+            cls.reconcile([user_id])
+            unread = cls.objects.filter(pk=user_id).values_list('unread', flat=True).first()
+        return unread
+    
+    @classmethod
+    def reconcile(cls, user_ids):
+        """Recalcular os contadores dos usuários informados a partir das notificações"""
+        counts = dict(
+            Notification.objects.filter(user_id__in=user_ids, read=False)
+            .values_list('user_id')
+            .annotate(total=Count('id'))
+        )
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, unread=counts.get(user_id, 0)) for user_id in user_ids],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['unread'],
+        )
+        return counts
 
 
 class Challenge(models.Model):
@@ -397,6 +786,12 @@ class Challenge(models.Model):
     required_exercises = models.ManyToManyField(Exercise, blank=True)
     is_active = models.BooleanField(default=True)
     
+    class Meta:
+        indexes = [
+            # Desafios ativos na data de uma sessão
+            models.Index(fields=['is_active', 'start_date', 'end_date'], name='challenge_active_window_idx'),
+        ]
+    
     def __str__(self):
         return self.name
 
@@ -408,9 +803,89 @@ class UserChallenge(models.Model):
     joined_at = models.DateTimeField(auto_now_add=True)
     completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
+    workouts_done = models.PositiveIntegerField(default=0, help_text=_("Completed sessions counted for this challenge"))
+    exercises_done = models.PositiveIntegerField(default=0, help_text=_("Distinct required exercises already performed"))
+    missed_notified_at = models.DateTimeField(null=True, blank=True, help_text=_("When the challenge closer notified this incomplete participation"))
     
     class Meta:
         unique_together = ('user', 'challenge')
     
     def __str__(self):
-        return f"{self.user.username} - {self.challenge.name}"
\ No newline at end of file
+        return f"{self.user.username} - {self.challenge.name}"
+    
+    def is_satisfied(self, required_exercise_count=None):
+        """Verifica os requisitos pelos contadores, sem consultar o histórico de sessões"""
+        if required_exercise_count is None:
+            required_exercise_count = self.challenge.required_exercises.count()
+        return (
+            self.workouts_done >= self.challenge.required_workouts
+            and self.exercises_done >= required_exercise_count
+        )
+    
+    def finish(self):
+        """Concluir o desafio: XP de recompensa e notificação. Retorna se o usuário subiu de nível"""
+        with transaction.atomic():
+            now = timezone.now()
+            changed = UserChallenge.objects.filter(pk=self.pk, completed=False).update(
+                completed=True,
+                completed_at=now
+            )
+            if not changed:
+                return False
+            self.completed = True
+            self.completed_at = now
+            
+            challenge = self.challenge
+            level_up = self.user.add_xp(challenge.xp_reward, 'challenge', self.pk)
+            
+            Notification.objects.create(
+                user=self.user,
+                title=f"Desafio Concluído: {challenge.name}",
+                message=f"Parabéns! Você concluiu o desafio '{challenge.name}' e ganhou {challenge.xp_reward} XP!",
+                type='achievement',
+                icon='challenge_complete',
+                action_url='/challenges'
+            )
+        return level_up
+
+
+class UserChallengeExercise(models.Model):
+    """Exercícios exigidos por um desafio que o participante já realizou"""
+    user_challenge = models.ForeignKey(UserChallenge, on_delete=models.CASCADE, related_name='done_exercises')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    
+    class Meta:
+        unique_together = ('user_challenge', 'exercise')
+    
+    def __str__(self):
+        return f"{self.user_challenge} - {self.exercise.name}"
+
+
+class TableVersion(models.Model):
+    """Contador de alterações por tabela, incrementado por signals e usado nos ETags dos catálogos"""
+    table = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+    
+    @classmethod
+    def bump(cls, model):
+        """Incrementar a versão da tabela do modelo informado"""
+        now = timezone.now()
+        row, created = cls.objects.get_or_create(
+            table=model._meta.db_table,
+            defaults={'version': 1, 'updated_at': now}
+        )
+        if not created:
+            cls.objects.filter(pk=row.pk).update(version=F('version') + 1, updated_at=now)
+    
+    @classmethod
+    def current(cls, models_list):
+        """Retorna {tabela: (versão, updated_at)} para os modelos informados em uma única consulta"""
+        tables = [model._meta.db_table for model in models_list]
+        rows = cls.objects.filter(table__in=tables).values_list('table', 'version', 'updated_at')
+        state = {table: (0, None) for table in tables}
+        state.update({table: (version, updated_at) for table, version, updated_at in rows})
+        return state
\ No newline at end of file
@@ -1,34 +1,18 @@
 # backend/califit/core/notifications.py
-from django.db import models
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from datetime import datetime, timedelta
 
+from .days import local_date, local_now
+from .models import Notification
 
-class Notification(models.Model):
-    """Modelo para armazenar notificações"""
-    NOTIFICATION_TYPES = [
-        ('achievement', 'Conquista'),
-        ('streak', 'Sequência de treinos'),
-        ('reminder', 'Lembrete'),
-        ('supplement', 'Suplemento'),
-        ('workout', 'Treino'),
-        ('system', 'Sistema'),
-    ]
-    
-    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='notifications')
-    title = models.CharField(max_length=100)
-    message = models.TextField()
-    type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
-    icon = models.CharField(max_length=50, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    read = models.BooleanField(default=False)
-    action_url = models.CharField(max_length=255, blank=True)
-    
-    class Meta:
-        ordering = ['-created_at']
-    
-    def __str__(self):
-        return f"{self.user.username} - {self.title}"
+logger = logging.getLogger(__name__)
 
 
 def send_achievement_notification(user, achievement):
@@ -92,7 +76,7 @@ def send_workout_reminder(user, workout=None):
 def send_streak_warning(user):
     """Avisar usuário que está prestes a perder streak"""
     last_workout = user.last_workout_date
-    today = timezone.now().date()
+    today = local_date(user)
     
     if last_workout and (today - last_workout).days == 1 and user.streak_count >= 3:
         Notification.objects.create(
@@ -110,18 +94,17 @@ def schedule_supplement_reminders():
     from .models import Supplement
     
     now = timezone.now()
-    today_weekday = now.weekday()  # 0-6, onde 0 é segunda-feira
     
-    # Suplementos diários com horário específico
+    # Suplementos diários com horário específico (no fuso de cada usuário)
     daily_supplements = Supplement.objects.filter(
         frequency='daily',
         time_type='time',
         time__isnull=False
-    )
+    ).select_related('user')
     
     for supplement in daily_supplements:
-        supplement_time = datetime.combine(now.date(), supplement.time)
-        supplement_time = timezone.make_aware(supplement_time)
+        user_now = local_now(supplement.user)
+        supplement_time = datetime.combine(user_now.date(), supplement.time, tzinfo=user_now.tzinfo)
         
         # Se ainda não passou do horário, agendar
         if supplement_time > now:
@@ -138,13 +121,13 @@ def schedule_supplement_reminders():
         frequency='custom',
         time_type='time',
         time__isnull=False
-    )
+    ).select_related('user')
     
     for supplement in custom_supplements:
-        # Verificar se hoje é um dia para tomar
-        if str(today_weekday) in supplement.days.split(','):
-            supplement_time = datetime.combine(now.date(), supplement.time)
-            supplement_time = timezone.make_aware(supplement_time)
+        user_now = local_now(supplement.user)
+        # Verificar se hoje é um dia para tomar (0-6, onde 0 é segunda-feira)
+        if str(user_now.weekday()) in supplement.days.split(','):
+            supplement_time = datetime.combine(user_now.date(), supplement.time, tzinfo=user_now.tzinfo)
             
             if supplement_time > now:
                 print(f"Agendando lembrete para {supplement.name} às {supplement.time}")
@@ -158,13 +141,180 @@ def check_streak_warnings():
     """Verificar e enviar avisos de perda de streak"""
     from .models import User
     
-    today = timezone.now().date()
+    today = timezone.localdate()
     
-    # Usuários com streak >= 3 que não treinaram hoje e treinaram ontem
+    # Usuários com streak >= 3 que não treinaram hoje e treinaram ontem. "Ontem"
+    # depende do fuso de cada um, então a faixa cobre os vizinhos do dia do
+    # servidor e send_streak_warning confere no dia local
     users = User.objects.filter(
         streak_count__gte=3,
-        last_workout_date=today - timedelta(days=1)
+        last_workout_date__gte=today - timedelta(days=2),
+        last_workout_date__lte=today
     )
     
     for user in users:
-        send_streak_warning(user)
\ No newline at end of file
+        send_streak_warning(user)
+
+def _delete_chunk(notification_ids):
+    """Excluir um lote, descontando as não lidas dos contadores na mesma transação"""
+    from .models import NotificationCounter
+    
+    with transaction.atomic():
+        unread_by_user = list(
+            Notification.objects.filter(pk__in=notification_ids, read=False)
+            .values_list('user_id')
+            .annotate(total=Count('id'))
+        )
+        
+        # Sem receivers de delete em Notification, o Django emite um único DELETE
+        deleted, _ = Notification.objects.filter(pk__in=notification_ids).delete()
+        
+        # Depois do DELETE: um contador ausente é recontado a partir da tabela
+        for user_id, total in unread_by_user:
+            NotificationCounter.adjust(user_id, -total)
+    return deleted
+
+
+def delete_expired_notifications(now, chunk_size, dry_run=False):
+    """Excluir notificações mais antigas que a retenção do seu tipo"""
+    deleted = {}
+    
+    for notification_type, days in settings.NOTIFICATION_RETENTION_DAYS.items():
+        expired = Notification.objects.filter(
+            type=notification_type,
+            created_at__lt=now - timedelta(days=days)
+        ).order_by('pk')
+        
+        if dry_run:
+            deleted[notification_type] = expired.count()
+            continue
+        
+        total = 0
+        while True:
+            chunk = list(expired.values_list('pk', flat=True)[:chunk_size])
+            if not chunk:
+                break
+            total += _delete_chunk(chunk)
+        deleted[notification_type] = total
+    
+    return deleted
+
+
+DIGEST_PREFIX = "Resumo de notificações antigas: "
+
+
+def _digest_message(type_counts):
+    type_labels = dict(Notification.NOTIFICATION_TYPES)
+    return DIGEST_PREFIX + ", ".join(
+        f"{type_labels.get(notification_type, notification_type)}: {total}"
+        for notification_type, total in type_counts.most_common()
+    )
+
+
+def _digest_counts(message):
+    """Inverso de _digest_message: contagens por tipo de um resumo existente"""
+    label_types = {label: notification_type for notification_type, label in Notification.NOTIFICATION_TYPES}
+    counts = Counter()
+    for item in message.removeprefix(DIGEST_PREFIX).split(", "):
+        label, _, total = item.rpartition(": ")
+        if label and total.isdigit():
+            counts[label_types.get(label, label)] += int(total)
+    return counts
+
+
+def compact_read_notifications(now, chunk_size, dry_run=False):
+    """
+    Substituir notificações lidas antigas por um único resumo por usuário.
+    
+    O resumo existente é atualizado (somando as contagens) em vez de criar
+    um novo a cada execução, e fica com a data da notificação mais recente
+    que resume, para aparecer junto do histórico e não acima das novas.
+    """
+    old_read = Notification.objects.filter(
+        read=True,
+        created_at__lt=now - timedelta(days=settings.NOTIFICATION_COMPACT_AFTER_DAYS)
+    ).exclude(type='digest').order_by('user_id', 'pk')
+    
+    if dry_run:
+        return {'compacted': old_read.count(), 'digests': 0}
+    
+    compacted = 0
+    digest_users = set()
+    while True:
+        chunk = list(old_read.values_list('pk', 'user_id', 'type', 'created_at')[:chunk_size])
+        if not chunk:
+            break
+        
+        counts = {}
+        newest = {}
+        for _, user_id, notification_type, created_at in chunk:
+            counts.setdefault(user_id, Counter())[notification_type] += 1
+            newest[user_id] = max(newest.get(user_id, created_at), created_at)
+        
+        with transaction.atomic():
+            existing = {}
+            duplicates = []
+            for digest in Notification.objects.filter(user_id__in=counts, type='digest').order_by('pk'):
+                if digest.user_id in existing:
+                    # Resumos repetidos de execuções antigas são fundidos no primeiro
+                    duplicates.append(digest.pk)
+                    primary = existing[digest.user_id]
+                    primary.created_at = max(primary.created_at, digest.created_at)
+                    counts[digest.user_id].update(_digest_counts(digest.message))
+                else:
+                    existing[digest.user_id] = digest
+                    counts[digest.user_id].update(_digest_counts(digest.message))
+            
+            created = Notification.objects.bulk_create([
+                Notification(
+                    user_id=user_id,
+                    title="Notificações arquivadas",
+                    message='',
+                    type='digest',
+                    icon='digest',
+                    read=True
+                )
+                for user_id in counts if user_id not in existing
+            ])
+            digests = list(existing.values()) + created
+            for digest in digests:
+                digest.message = _digest_message(counts[digest.user_id])
+                if digest.user_id in existing:
+                    digest.created_at = max(digest.created_at, newest[digest.user_id])
+                else:
+                    digest.created_at = newest[digest.user_id]
+            # created_at é auto_now_add: a data do histórico vai num UPDATE
+            Notification.objects.bulk_update(digests, ['message', 'created_at'])
+            
+            compacted += _delete_chunk([pk for pk, _, _, _ in chunk])
+            if duplicates:
+                _delete_chunk(duplicates)
+        digest_users.update(counts)
+    
+    return {'compacted': compacted, 'digests': len(digest_users)}
+
+
+def prune_notifications(dry_run=False, chunk_size=None):
+    """
+    Job de retenção: expira notificações por tipo e compacta as lidas antigas.
+    
+    Retorna as métricas da execução, que também ficam no log.
+    """
+    chunk_size = chunk_size or settings.NOTIFICATION_RETENTION_CHUNK_SIZE
+    started = time.monotonic()
+    now = timezone.now()
+    
+    expired = delete_expired_notifications(now, chunk_size, dry_run=dry_run)
+    compaction = compact_read_notifications(now, chunk_size, dry_run=dry_run)
+    
+    metrics = {
+        'dry_run': dry_run,
+        'expired': expired,
+        'expired_total': sum(expired.values()),
+        'compacted': compaction['compacted'],
+        'digests': compaction['digests'],
+        'remaining': Notification.objects.count(),
+        'duration_seconds': round(time.monotonic() - started, 3),
+    }
+    logger.info("Retenção de notificações: %s", metrics)
+    return metrics
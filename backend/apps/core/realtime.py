@@ -0,0 +1,96 @@
+"""
+Envio de eventos para os WebSockets dos usuários via channel layer.
+
+Os eventos só saem depois do commit da transação corrente, e falhas do
+channel layer (ex.: Redis indisponível) não interrompem a requisição.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    return f"user_{user_id}"
+
+
+def session_group(session_id):
+    return f"session_{session_id}"
+
+
+def _group_send(group, event):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(group, event)
+    except Exception:
+        logger.exception("Falha ao enviar evento para o grupo %s", group)
+
+
+def push_notification(notification):
+    from .models import NotificationCounter
+    from .serializers import NotificationSerializer
+
+    data = NotificationSerializer(notification).data
+    user_id = notification.user_id
+
+    def send():
+        _group_send(user_group(user_id), {
+            'type': 'notification.created',
+            'notification': dict(data),
+            'unread_count': NotificationCounter.get_unread(user_id),
+        })
+
+    transaction.on_commit(send)
+
+
+def push_notifications(notifications):
+    """push_notification para notificações gravadas com bulk_create, que não dispara post_save"""
+    from .models import NotificationCounter
+    from .serializers import NotificationSerializer
+
+    messages = [(notification.user_id, dict(data)) for notification, data in zip(
+        notifications, NotificationSerializer(notifications, many=True).data
+    )]
+    if not messages:
+        return
+
+    def send():
+        user_ids = {user_id for user_id, _ in messages}
+        unread = dict(NotificationCounter.objects.filter(pk__in=user_ids).values_list('pk', 'unread'))
+        missing = [user_id for user_id in user_ids if user_id not in unread]
+        if missing:
+            counts = NotificationCounter.reconcile(missing)
+            unread.update({user_id: counts.get(user_id, 0) for user_id in missing})
+        for user_id, data in messages:
+            _group_send(user_group(user_id), {
+                'type': 'notification.created',
+                'notification': data,
+                'unread_count': unread[user_id],
+            })
+
+    transaction.on_commit(send)
+
+
+def push_unread_count(user_id):
+    from .models import NotificationCounter
+
+    def send():
+        _group_send(user_group(user_id), {
+            'type': 'notification.unread',
+            'unread_count': NotificationCounter.get_unread(user_id),
+        })
+
+    transaction.on_commit(send)
+
+
+def push_session_event(event):
+    message = event.as_message()
+    transaction.on_commit(lambda: _group_send(session_group(event.session_id), {
+        'type': 'session.event',
+        'event': message,
+    }))
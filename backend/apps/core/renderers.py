@@ -0,0 +1,79 @@
+"""
+Renderers da API: JSON com orjson (padrão) e MessagePack (opcional).
+
+O ORJSONRenderer gera a mesma saída do JSONRenderer do DRF com as
+configurações padrão (compacto, UTF-8 sem escapes, datas ISO 8601 com "Z"
+em UTC), em uma fração do tempo. Clientes móveis podem pedir
+Accept: application/msgpack (ou ?format=msgpack) para um corpo binário menor.
+"""
+import datetime
+import decimal
+import uuid
+
+import msgpack
+import orjson
+from django.db.models.query import QuerySet
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def encode_default(obj):
+    """Tipos que o orjson/msgpack não conhecem, convertidos como no JSONEncoder do DRF"""
+    if isinstance(obj, (set, frozenset, QuerySet)):
+        return list(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = ORJSON_OPTIONS
+        # A API navegável e o Accept "application/json; indent=4" pedem indentação
+        renderer_context = renderer_context or {}
+        indent = renderer_context.get('indent')
+        if accepted_media_type and 'indent=' in accepted_media_type:
+            indent = True
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=encode_default, option=options)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
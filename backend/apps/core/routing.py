@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/notifications/', consumers.NotificationConsumer.as_asgi()),
+    path('ws/sessions/<int:session_id>/', consumers.WorkoutSessionConsumer.as_asgi()),
+]
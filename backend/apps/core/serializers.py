@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from . import caching
+from .fieldsets import DynamicFieldsModelSerializer
+from .days import is_valid_zone
 from .models import (
     User, UserBodyMeasurement,
     MuscleGroup, Exercise,
@@ -7,10 +10,10 @@ from .models import (
     Supplement, SupplementRecord,
     Achievement, UserAchievement,
     Challenge, UserChallenge,
-    Notification
+    Notification, XPEvent
 )
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsModelSerializer):
     password = serializers.CharField(write_only=True)
     username = serializers.CharField(required=False, allow_blank=True)
     
@@ -18,9 +21,14 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'password', 'first_name', 'last_name', 
                  'date_of_birth', 'height', 'weight', 'profile_image', 
-                 'level', 'xp_points', 'streak_count', 'last_workout_date']
+                 'level', 'xp_points', 'streak_count', 'last_workout_date', 'timezone']
         read_only_fields = ['level', 'xp_points', 'streak_count', 'last_workout_date']
     
+    def validate_timezone(self, value):
+        if not is_valid_zone(value):
+            raise serializers.ValidationError("Fuso horário inválido")
+        return value
+    
     def create(self, validated_data):
         password = validated_data.pop('password')
         # Remove o username se estiver vazio
@@ -33,7 +41,7 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(DynamicFieldsModelSerializer):
     xp_to_next_level = serializers.ReadOnlyField()
     level_progress_percentage = serializers.ReadOnlyField()
     
@@ -41,29 +49,35 @@ class UserProfileSerializer(serializers.ModelSerializer):
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 
-            'level', 'xp_points', 'total_xp', 'streak_count', 'last_workout_date',
-            'xp_to_next_level', 'level_progress_percentage', 'height', 'weight'
+            'level', 'xp_points', 'total_xp', 'streak_count', 'max_streak', 'last_workout_date',
+            'xp_to_next_level', 'level_progress_percentage', 'height', 'weight', 'timezone'
         ]
         read_only_fields = [
-            'level', 'xp_points', 'total_xp', 'streak_count', 'last_workout_date',
-            'xp_to_next_level', 'level_progress_percentage'
+            'level', 'xp_points', 'total_xp', 'streak_count', 'max_streak', 'last_workout_date',
+            'xp_to_next_level', 'level_progress_percentage', 'timezone'
         ]
 
 
-class UserBodyMeasurementSerializer(serializers.ModelSerializer):
+class XPEventSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = XPEvent
+        fields = ['id', 'source_type', 'source_id', 'amount', 'created_at']
+
+
+class UserBodyMeasurementSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = UserBodyMeasurement
         fields = '__all__'
         read_only_fields = ['user']
 
 
-class MuscleGroupSerializer(serializers.ModelSerializer):
+class MuscleGroupSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = MuscleGroup
         fields = ['id', 'name', 'description', 'icon']
 
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class ExerciseSerializer(DynamicFieldsModelSerializer):
     muscle_groups = MuscleGroupSerializer(many=True, read_only=True)
     muscle_group_ids = serializers.PrimaryKeyRelatedField(
         queryset=MuscleGroup.objects.all(),
@@ -76,7 +90,7 @@ class ExerciseSerializer(serializers.ModelSerializer):
         model = Exercise
         fields = [
             'id', 'name', 'description', 'instructions', 'difficulty',
-            'equipment_needed', 'image', 'video_url', 'muscle_groups',
+            'equipment_needed', 'image', 'video_url', 'met_value', 'muscle_groups',
             'muscle_group_ids', 'created_at'
         ]
         read_only_fields = ['created_at', 'user']
@@ -95,7 +109,7 @@ class ExerciseSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class WorkoutExerciseSerializer(serializers.ModelSerializer):
+class WorkoutExerciseSerializer(DynamicFieldsModelSerializer):
     exercise_id = serializers.PrimaryKeyRelatedField(
         queryset=Exercise.objects.all(),
         write_only=True,
@@ -111,7 +125,7 @@ class WorkoutExerciseSerializer(serializers.ModelSerializer):
         ]
 
 
-class WorkoutSerializer(serializers.ModelSerializer):
+class WorkoutSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Workout
         fields = ['id', 'name', 'description', 'is_template', 'estimated_duration',
@@ -119,7 +133,7 @@ class WorkoutSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'exercise_count']
 
 
-class WorkoutDetailSerializer(serializers.ModelSerializer):
+class WorkoutDetailSerializer(DynamicFieldsModelSerializer):
     workout_exercises = WorkoutExerciseSerializer(many=True, read_only=True)
     
     class Meta:
@@ -128,29 +142,38 @@ class WorkoutDetailSerializer(serializers.ModelSerializer):
                  'difficulty', 'created_at', 'workout_exercises']
         read_only_fields = ['created_at']
     
+    def _create_workout_exercises(self, workout, workout_exercises):
+        """Exercícios do treino com uma leitura e um único INSERT, em vez de dois comandos por item"""
+        rows = []
+        for i, exercise_data in enumerate(workout_exercises):
+            try:
+                rows.append((i, exercise_data, int(exercise_data.get('exercise_id'))))
+            except (TypeError, ValueError):
+                continue
+        exercises = Exercise.objects.in_bulk({exercise_id for _, _, exercise_id in rows})
+        
+        WorkoutExercise.objects.bulk_create([
+            WorkoutExercise(
+                workout=workout,
+                exercise=exercises[exercise_id],
+                order=exercise_data.get('order', i),
+                sets=exercise_data.get('sets', 3),
+                target_reps=exercise_data.get('target_reps', 12),
+                rest_duration=exercise_data.get('rest_duration', 60),
+                notes=exercise_data.get('notes', '')
+            )
+            for i, exercise_data, exercise_id in rows
+            if exercise_id in exercises
+        ])
+        
+        # bulk_create não dispara os signals: a contagem de exercícios dos templates muda
+        if workout.is_template:
+            caching.invalidate('workout-templates')
+    
     def create(self, validated_data):
         workout_exercises = self.context['request'].data.get('workout_exercises', [])
         workout = Workout.objects.create(**validated_data)
-        
-        for i, exercise_data in enumerate(workout_exercises):
-            exercise_id = exercise_data.get('exercise_id')
-            if not exercise_id:
-                continue
-                
-            try:
-                exercise = Exercise.objects.get(id=exercise_id)
-                WorkoutExercise.objects.create(
-                    workout=workout,
-                    exercise=exercise,
-                    order=exercise_data.get('order', i),
-                    sets=exercise_data.get('sets', 3),
-                    target_reps=exercise_data.get('target_reps', 12),
-                    rest_duration=exercise_data.get('rest_duration', 60),
-                    notes=exercise_data.get('notes', '')
-                )
-            except Exercise.DoesNotExist:
-                pass
-                
+        self._create_workout_exercises(workout, workout_exercises)
         return workout
     
     def update(self, instance, validated_data):
@@ -169,35 +192,18 @@ class WorkoutDetailSerializer(serializers.ModelSerializer):
             instance.workout_exercises.all().delete()
             
             # Adicionar novos exercícios
-            for i, exercise_data in enumerate(workout_exercises):
-                exercise_id = exercise_data.get('exercise_id')
-                if not exercise_id:
-                    continue
-                    
-                try:
-                    exercise = Exercise.objects.get(id=exercise_id)
-                    WorkoutExercise.objects.create(
-                        workout=instance,
-                        exercise=exercise,
-                        order=exercise_data.get('order', i),
-                        sets=exercise_data.get('sets', 3),
-                        target_reps=exercise_data.get('target_reps', 12),
-                        rest_duration=exercise_data.get('rest_duration', 60),
-                        notes=exercise_data.get('notes', '')
-                    )
-                except Exercise.DoesNotExist:
-                    pass
-                    
+            self._create_workout_exercises(instance, workout_exercises)
+        
         return instance
 
 
-class SetRecordSerializer(serializers.ModelSerializer):
+class SetRecordSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = SetRecord
         fields = ['id', 'set_number', 'actual_reps', 'weight', 'completed']
 
 
-class ExerciseRecordSerializer(serializers.ModelSerializer):
+class ExerciseRecordSerializer(DynamicFieldsModelSerializer):
     exercise_detail = ExerciseSerializer(source='exercise', read_only=True)
     workout_exercise_detail = WorkoutExerciseSerializer(source='workout_exercise', read_only=True)
     set_records = SetRecordSerializer(many=True, read_only=True)
@@ -207,7 +213,7 @@ class ExerciseRecordSerializer(serializers.ModelSerializer):
         fields = ['id', 'exercise_detail', 'workout_exercise_detail', 'set_records']
 
 
-class WorkoutSessionSerializer(serializers.ModelSerializer):
+class WorkoutSessionSerializer(DynamicFieldsModelSerializer):
     workout_detail = WorkoutSerializer(source='workout', read_only=True)
     
     class Meta:
@@ -219,7 +225,7 @@ class WorkoutSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['start_time', 'end_time', 'duration', 'calories_burned', 'xp_earned', 'completed']
 
 
-class WorkoutSessionDetailSerializer(serializers.ModelSerializer):
+class WorkoutSessionDetailSerializer(DynamicFieldsModelSerializer):
     workout_detail = WorkoutDetailSerializer(source='workout', read_only=True)
     exercise_records = ExerciseRecordSerializer(many=True, read_only=True)
     
@@ -232,7 +238,7 @@ class WorkoutSessionDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['start_time', 'end_time', 'duration', 'calories_burned', 'xp_earned', 'completed']
 
 
-class SupplementSerializer(serializers.ModelSerializer):
+class SupplementSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Supplement
         fields = [
@@ -242,7 +248,7 @@ class SupplementSerializer(serializers.ModelSerializer):
         read_only_fields = ['user']
 
 
-class SupplementRecordSerializer(serializers.ModelSerializer):
+class SupplementRecordSerializer(DynamicFieldsModelSerializer):
     supplement_detail = SupplementSerializer(source='supplement', read_only=True)
     
     class Meta:
@@ -251,14 +257,14 @@ class SupplementRecordSerializer(serializers.ModelSerializer):
         read_only_fields = ['timestamp']
 
 
-class AchievementSerializer(serializers.ModelSerializer):
+class AchievementSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Achievement
         fields = ['id', 'name', 'description', 'xp_reward', 'icon_name', 
                  'requirement_type', 'requirement_value']
 
 
-class UserAchievementSerializer(serializers.ModelSerializer):
+class UserAchievementSerializer(DynamicFieldsModelSerializer):
     achievement_detail = AchievementSerializer(source='achievement', read_only=True)
     
     class Meta:
@@ -267,23 +273,36 @@ class UserAchievementSerializer(serializers.ModelSerializer):
         read_only_fields = ['earned_date']
 
 
-class ChallengeSerializer(serializers.ModelSerializer):
+class ChallengeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Challenge
         fields = ['id', 'name', 'description', 'icon', 'start_date', 'end_date',
                  'xp_reward', 'required_workouts', 'required_exercises', 'is_active']
 
 
-class UserChallengeSerializer(serializers.ModelSerializer):
+class UserChallengeSerializer(DynamicFieldsModelSerializer):
     challenge_detail = ChallengeSerializer(source='challenge', read_only=True)
+    progress = serializers.SerializerMethodField()
     
     class Meta:
         model = UserChallenge
-        fields = ['id', 'challenge', 'challenge_detail', 'joined_at', 'completed', 'completed_at']
-        read_only_fields = ['joined_at', 'completed_at']
-
-
-class NotificationSerializer(serializers.ModelSerializer):
+        fields = ['id', 'challenge', 'challenge_detail', 'joined_at', 'completed', 'completed_at',
+                 'workouts_done', 'exercises_done', 'progress']
+        read_only_fields = ['joined_at', 'completed_at', 'workouts_done', 'exercises_done']
+    
+    def get_progress(self, obj):
+        """Fração dos requisitos atingida (0 a 1), a partir dos contadores"""
+        if obj.completed:
+            return 1.0
+        required_exercises = len(obj.challenge.required_exercises.all())
+        required = obj.challenge.required_workouts + required_exercises
+        if not required:
+            return 0.0
+        done = min(obj.workouts_done, obj.challenge.required_workouts) + min(obj.exercises_done, required_exercises)
+        return round(done / required, 3)
+
+
+class NotificationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'title', 'message', 'type', 'icon', 'created_at', 'read', 'action_url']
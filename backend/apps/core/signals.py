@@ -0,0 +1,93 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import caching, realtime, leaderboards
+from .models import (
+    User, MuscleGroup, Exercise,
+    Workout, WorkoutExercise, WorkoutSession,
+    Achievement, Challenge, Notification, TableVersion
+)
+
+# Tabelas de catálogo servidas com ETag (ver ConditionalGetMixin) e sua entidade de cache
+VERSIONED_MODELS = {
+    MuscleGroup: 'muscle-groups',
+    Achievement: 'achievements',
+    Challenge: 'challenges',
+}
+
+
+def bump_table_version(sender, **kwargs):
+    """Incrementar a versão da tabela quando um registro de catálogo muda"""
+    TableVersion.bump(sender)
+    caching.invalidate(VERSIONED_MODELS[sender])
+
+
+# Conectado por modelo: um receiver sem sender impediria o fast delete de todas as tabelas
+for _model in VERSIONED_MODELS:
+    post_save.connect(bump_table_version, sender=_model, dispatch_uid=f'bump_version_save_{_model.__name__}')
+    post_delete.connect(bump_table_version, sender=_model, dispatch_uid=f'bump_version_delete_{_model.__name__}')
+
+
+@receiver(m2m_changed, sender=Challenge.required_exercises.through)
+def bump_challenge_version(sender, action, **kwargs):
+    """Exercícios exigidos fazem parte do payload do desafio"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        TableVersion.bump(Challenge)
+        caching.invalidate('challenges')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Nível, XP e streak fazem parte do perfil e das estatísticas"""
+    caching.invalidate_on_commit('user-profile', scope=instance.pk)
+    caching.invalidate_on_commit('user-stats', scope=instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def remove_user_from_leaderboards(sender, instance, **kwargs):
+    leaderboards.remove_user(instance.pk)
+
+
+@receiver(post_save, sender=WorkoutSession)
+@receiver(post_delete, sender=WorkoutSession)
+def invalidate_session_cache(sender, instance, **kwargs):
+    caching.invalidate_on_commit('user-stats', scope=instance.user_id)
+
+
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+def invalidate_workout_templates(sender, instance, created=False, **kwargs):
+    # Uma atualização pode ter desmarcado is_template, então só a criação de
+    # treinos comuns dispensa a invalidação
+    if instance.is_template or not created:
+        caching.invalidate('workout-templates')
+
+
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+def invalidate_template_exercises(sender, instance, origin=None, **kwargs):
+    """A contagem de exercícios aparece na listagem de templates"""
+    if isinstance(origin, Workout):
+        # Exclusão em cascata: invalidate_workout_templates já cuida do treino
+        return
+    if WorkoutExercise.workout.is_cached(instance):
+        is_template = instance.workout.is_template
+    else:
+        is_template = Workout.objects.filter(pk=instance.workout_id, is_template=True).exists()
+    if is_template:
+        caching.invalidate('workout-templates')
+
+
+@receiver(m2m_changed, sender=Exercise.muscle_groups.through)
+def invalidate_exercise_muscle_groups(sender, action, **kwargs):
+    """As estatísticas por grupo muscular são chaveadas pela versão de 'muscle-groups'"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        caching.invalidate('muscle-groups')
+
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    """Enviar notificações novas pelo WebSocket do usuário"""
+    if created:
+        realtime.push_notification(instance)
@@ -0,0 +1,93 @@
+"""
+Sequências (streaks) históricas a partir dos dias treinados.
+
+Os dias vêm de DailyActivity, já gravados no dia local do usuário. Dias
+consecutivos formam uma "ilha" (gaps-and-islands): subtraindo de cada data o
+seu número de linha na ordem, dias consecutivos caem no mesmo grupo. No
+Postgres a consulta roda inteira no banco; nos demais bancos as datas são
+agrupadas em Python.
+"""
+from datetime import timedelta
+
+from django.db import connection
+
+from .models import DailyActivity
+
+ISLANDS_SQL = """
+    WITH grouped AS (
+        SELECT user_id, date AS day,
+               date - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY date))::int AS grp
+        FROM core_dailyactivity
+        WHERE user_id = ANY(%s)
+    )
+    SELECT user_id, MIN(day), MAX(day), COUNT(*)
+    FROM grouped
+    GROUP BY user_id, grp
+    ORDER BY user_id, MIN(day)
+"""
+
+
+def _islands_sql(user_ids):
+    with connection.cursor() as cursor:
+        cursor.execute(ISLANDS_SQL, [list(user_ids)])
+        return cursor.fetchall()
+
+
+def _islands_python(user_ids):
+    days = (
+        DailyActivity.objects.filter(user_id__in=user_ids)
+        .values_list('user_id', 'date')
+        .order_by('user_id', 'date')
+    )
+
+    islands = []
+    for user_id, day in days:
+        last = islands[-1] if islands else None
+        if last and last[0] == user_id and day - last[2] == timedelta(days=1):
+            islands[-1] = (user_id, last[1], day, last[3] + 1)
+        else:
+            islands.append((user_id, day, day, 1))
+    return islands
+
+
+def streak_islands(user_ids):
+    """Sequências dos usuários: [(user_id, início, fim, dias)] em ordem de usuário e data"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    if connection.vendor == 'postgresql':
+        return _islands_sql(user_ids)
+    return _islands_python(user_ids)
+
+
+def max_streaks(user_ids):
+    """Maior sequência histórica por usuário: {user_id: dias}"""
+    best = {}
+    for user_id, _, _, length in streak_islands(user_ids):
+        best[user_id] = max(best.get(user_id, 0), length)
+    return best
+
+
+def streak_calendar(user, start, end):
+    """Dias treinados e sequências que tocam o intervalo [start, end]"""
+    streaks = [
+        {'start': first, 'end': last, 'length': length}
+        for _, first, last, length in streak_islands([user.pk])
+        if last >= start and first <= end
+    ]
+
+    days = []
+    for streak in streaks:
+        day = max(streak['start'], start)
+        while day <= min(streak['end'], end):
+            days.append(day)
+            day += timedelta(days=1)
+
+    return {
+        'start': start,
+        'end': end,
+        'current_streak': user.streak_count,
+        'max_streak': user.max_streak,
+        'days': days,
+        'streaks': streaks,
+    }
@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from . import challenges, notifications
+
+
+@shared_task
+def prune_notifications():
+    """Retenção diária de notificações (ver CELERY_BEAT_SCHEDULE)"""
+    return notifications.prune_notifications()
+
+
+@shared_task
+def close_expired_challenges():
+    """Encerramento diário dos desafios expirados (ver CELERY_BEAT_SCHEDULE)"""
+    return challenges.close_expired_challenges()
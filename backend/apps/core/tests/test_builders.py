@@ -0,0 +1,47 @@
+from django.test import RequestFactory, TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.core import builders
+from apps.core.models import (
+    User, MuscleGroup, Exercise, Workout, WorkoutExercise, WorkoutSession, ExerciseRecord, SetRecord
+)
+from apps.core.serializers import WorkoutSessionDetailSerializer
+
+
+class SessionDetailParityTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='detalhe', email='detalhe@example.com', password='x')
+        groups = [MuscleGroup.objects.create(name=f'Grupo {index}') for index in range(4)]
+        workout = Workout.objects.create(name='Treino', user=user)
+        self.session = WorkoutSession.objects.create(user=user, workout=workout)
+
+        for order in range(3):
+            exercise = Exercise.objects.create(name=f'Exercício {order}', description='d', instructions='i', user=user)
+            # Vínculos gravados fora da ordem dos ids dos grupos
+            for group in reversed(groups[order:]):
+                exercise.muscle_groups.add(group)
+            workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=exercise, order=order)
+            record = ExerciseRecord.objects.create(
+                session=self.session, exercise=exercise, workout_exercise=workout_exercise
+            )
+            SetRecord.objects.create(exercise_record=record, set_number=1, actual_reps=10, weight='42.50')
+
+        self.request = Request(RequestFactory().get('/'))
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_nested_shape_matches_the_serializer(self):
+        session = WorkoutSession.objects.get(pk=self.session.pk)
+        expected = self.render(WorkoutSessionDetailSerializer(session, context={'request': self.request}).data)
+
+        self.assertEqual(self.render(builders.session_detail(session, self.request, 'nested')), expected)
+
+    def test_muscle_groups_are_ordered_by_id(self):
+        detail = builders.session_detail(self.session, self.request, 'nested')
+
+        for record in detail['exercise_records']:
+            ids = [group['id'] for group in record['exercise_detail']['muscle_groups']]
+            self.assertEqual(ids, sorted(ids))
@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core import caching
+
+
+class InvalidateManyTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_recreated_version_differs_from_the_deleted_one(self):
+        for _ in range(20):
+            version = caching.namespace_version('user-stats', 1)
+            caching.invalidate_many('user-stats', [1])
+            self.assertNotEqual(caching.namespace_version('user-stats', 1), version)
+
+    def test_stale_entries_are_not_served(self):
+        caching.get_or_set('user-stats', 'key', lambda: 'antigo', scope=1)
+        caching.invalidate_many('user-stats', [1, 2])
+
+        self.assertEqual(caching.get_or_set('user-stats', 'key', lambda: 'novo', scope=1), 'novo')
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.core import calories
+from apps.core.models import User, Exercise, Workout, WorkoutExercise, WorkoutSession, ExerciseRecord, SetRecord
+
+
+class EstimateTests(SimpleTestCase):
+
+    def test_without_sets_the_fallback_met_covers_the_whole_session(self):
+        # kcal = MET × kg × horas
+        self.assertEqual(calories.estimate(3600, 70, []), 350)
+        self.assertEqual(calories.estimate(1800, 80, [], fallback_met=6.0), 240)
+        self.assertEqual(calories.estimate(3600, None, [], fallback_met=3.5), 245)
+
+    def test_work_rest_and_light_time(self):
+        # 30 s de trabalho a MET 5, 60 s de descanso a MET 2 e 510 s leves a MET 3
+        sets = [(5.0, 10, None, 60)]
+        self.assertEqual(calories.estimate(600, 60, sets), int((5 * 30 + 2 * 60 + 3 * 510) * 60 / 3600))
+
+    def test_load_raises_the_met_up_to_twice_the_body_weight(self):
+        # 60 s de trabalho, sem descanso: MET 5 sem carga, 6 com o peso corporal, 7 no limite de 2×
+        self.assertEqual(calories.estimate(60, 60, [(5.0, 20, 0, 0)]), 5)
+        self.assertEqual(calories.estimate(60, 60, [(5.0, 20, 60, 0)]), 6)
+        self.assertEqual(calories.estimate(60, 60, [(5.0, 20, 500, 0)]), 7)
+
+    def test_logged_time_longer_than_the_session_is_scaled_down(self):
+        # 60 s de trabalho e 60 s de descanso registrados numa sessão de 60 s: metade de tudo
+        self.assertEqual(calories.estimate(60, 120, [(5.0, 20, 0, 60)]), int((5 * 60 + 2 * 60) / 2 * 120 / 3600))
+
+    def test_exercise_met_prefers_the_exercise_value(self):
+        self.assertEqual(calories.exercise_met(8.0, 'beginner'), 8.0)
+        self.assertEqual(calories.exercise_met(None, 'advanced'), 6.0)
+        self.assertEqual(calories.exercise_met(None, 'desconhecida'), 5.0)
+
+
+class RecomputeCaloriesTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='met', email='met@example.com', password='x', weight=60)
+        workout = Workout.objects.create(name='Treino', user=self.user)
+        self.heavy = Exercise.objects.create(
+            name='Agachamento', description='d', instructions='i', user=self.user, met_value=8.0
+        )
+        light = Exercise.objects.create(
+            name='Alongamento', description='d', instructions='i', user=self.user, difficulty='beginner'
+        )
+        self.workout_exercise = WorkoutExercise.objects.create(
+            workout=workout, exercise=self.heavy, order=0, rest_duration=0
+        )
+        WorkoutExercise.objects.create(workout=workout, exercise=light, order=1)
+
+        end = timezone.now()
+        self.with_sets = WorkoutSession.objects.create(
+            user=self.user, workout=workout, end_time=end, duration=60, completed=True, calories_burned=0
+        )
+        record = ExerciseRecord.objects.create(
+            session=self.with_sets, exercise=self.heavy, workout_exercise=self.workout_exercise
+        )
+        SetRecord.objects.create(exercise_record=record, set_number=1, actual_reps=20, weight=0, completed=True)
+        SetRecord.objects.create(exercise_record=record, set_number=2, actual_reps=20, weight=0, completed=False)
+
+        self.without_sets = WorkoutSession.objects.create(
+            user=self.user, workout=workout, end_time=end, duration=3600, completed=True, calories_burned=0
+        )
+        self.open_session = WorkoutSession.objects.create(user=self.user, workout=workout)
+
+    def recompute(self):
+        output = StringIO()
+        call_command('recompute_calories', '--chunk-size', '1', '--skip-rollups', stdout=output)
+        return output.getvalue()
+
+    def calories_of(self, session):
+        return WorkoutSession.objects.get(pk=session.pk).calories_burned
+
+    def test_known_met_values(self):
+        output = self.recompute()
+
+        self.assertIn('Processed 2 sessions, updated 2', output)
+        # Só a série concluída conta: 60 s a MET 8 com 60 kg
+        self.assertEqual(self.calories_of(self.with_sets), 8)
+        # Sem séries: média de MET 8 e 3,5 durante uma hora
+        self.assertEqual(self.calories_of(self.without_sets), int((8.0 + 3.5) / 2 * 60))
+        self.assertIsNone(self.calories_of(self.open_session))
+
+    def test_second_run_changes_nothing(self):
+        self.recompute()
+        self.assertIn('Processed 2 sessions, updated 0', self.recompute())
+
+    def test_complete_uses_the_same_engine(self):
+        session = WorkoutSession.objects.create(user=self.user, workout=self.with_sets.workout)
+        WorkoutSession.objects.filter(pk=session.pk).update(start_time=timezone.now() - timedelta(hours=1))
+        session.refresh_from_db()
+
+        session.complete_session()
+
+        self.assertEqual(session.calories_burned, calories.estimate(session.duration, 60, [], (8.0 + 3.5) / 2))
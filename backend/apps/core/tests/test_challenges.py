@@ -0,0 +1,133 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core import challenges
+from apps.core.models import (
+    User, Exercise, Workout, WorkoutExercise, Challenge, UserChallenge, Notification, NotificationCounter
+)
+
+
+class ChallengeProgressTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='atleta', email='atleta@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.exercises = [
+            Exercise.objects.create(name=f'Exercício {index}', description='d', instructions='i', user=self.user)
+            for index in range(2)
+        ]
+        self.workout = Workout.objects.create(name='Treino', user=self.user)
+        for order, exercise in enumerate(self.exercises):
+            WorkoutExercise.objects.create(workout=self.workout, exercise=exercise, order=order)
+
+        today = timezone.localdate()
+        challenge = Challenge.objects.create(
+            name='Desafio', description='d', icon='trophy', required_workouts=1,
+            start_date=today - timedelta(days=1), end_date=today + timedelta(days=7)
+        )
+        challenge.required_exercises.set(self.exercises)
+        self.participation = UserChallenge.objects.create(user=self.user, challenge=challenge)
+
+    def start_session(self):
+        response = self.client.post(f'/api/v1/workouts/{self.workout.pk}/start_session/')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def complete(self, session_id):
+        response = self.client.post(f'/api/v1/workout-sessions/{session_id}/complete/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_exercises_without_sets_do_not_count(self):
+        self.complete(self.start_session())
+
+        self.participation.refresh_from_db()
+        self.assertEqual(self.participation.workouts_done, 1)
+        self.assertEqual(self.participation.exercises_done, 0)
+        self.assertFalse(self.participation.completed)
+
+    def test_exercises_with_completed_sets_count(self):
+        session_id = self.start_session()
+        response = self.client.post(f'/api/v1/workout-sessions/{session_id}/record_set/', {
+            'exercise_id': self.exercises[0].pk, 'set_number': 1, 'actual_reps': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.complete(session_id)
+
+        self.participation.refresh_from_db()
+        self.assertEqual(self.participation.exercises_done, 1)
+        self.assertFalse(self.participation.completed)
+
+
+class CloseChallengeTests(TestCase):
+
+    def setUp(self):
+        today = timezone.localdate()
+        self.challenge = Challenge.objects.create(
+            name='Encerrado', description='d', icon='trophy', required_workouts=2,
+            start_date=today - timedelta(days=10), end_date=today - timedelta(days=1)
+        )
+        self.users = [
+            User.objects.create_user(username=f'p{index}', email=f'p{index}@example.com', password='x')
+            for index in range(3)
+        ]
+        for index, user in enumerate(self.users):
+            UserChallenge.objects.create(user=user, challenge=self.challenge, workouts_done=2 if index == 0 else 0)
+
+    def notifications(self, user, title):
+        return Notification.objects.filter(user=user, title=f'{title}: {self.challenge.name}').count()
+
+    def test_rerun_after_an_interrupted_job_does_not_notify_twice(self):
+        original = challenges._notify_missed_chunk
+        calls = []
+
+        def interrupted(*args):
+            if calls:
+                raise RuntimeError('job interrompido')
+            calls.append(args)
+            return original(*args)
+
+        with mock.patch.object(challenges, '_notify_missed_chunk', interrupted):
+            with self.assertRaises(RuntimeError):
+                challenges.close_challenge(self.challenge, chunk_size=1)
+
+        result = challenges.close_challenge(self.challenge, chunk_size=1)
+
+        self.assertEqual(result, {'completed': 0, 'missed': 1})
+        self.assertEqual(self.notifications(self.users[0], 'Desafio Concluído'), 1)
+        for user in self.users[1:]:
+            self.assertEqual(self.notifications(user, 'Desafio Encerrado'), 1)
+            self.assertEqual(NotificationCounter.get_unread(user.pk), 1)
+
+    def test_notifications_are_pushed_after_commit(self):
+        with mock.patch('apps.core.realtime._group_send') as group_send:
+            with self.captureOnCommitCallbacks(execute=True):
+                challenges.close_challenge(self.challenge)
+
+        pushed = {call.args[0]: call.args[1] for call in group_send.call_args_list}
+        self.assertEqual(set(pushed), {f'user_{user.pk}' for user in self.users})
+        self.assertEqual(pushed[f'user_{self.users[0].pk}']['notification']['type'], 'achievement')
+        self.assertEqual(pushed[f'user_{self.users[1].pk}']['notification']['type'], 'system')
+        self.assertEqual(pushed[f'user_{self.users[1].pk}']['unread_count'], 1)
+
+
+class EnrollUsersTests(TestCase):
+
+    def test_counts_only_users_not_yet_participating(self):
+        today = timezone.localdate()
+        challenge = Challenge.objects.create(
+            name='Aberto', description='d', icon='trophy', start_date=today, end_date=today + timedelta(days=7)
+        )
+        users = [
+            User.objects.create_user(username=f'e{index}', email=f'e{index}@example.com', password='x')
+            for index in range(3)
+        ]
+        UserChallenge.objects.create(user=users[0], challenge=challenge)
+
+        self.assertEqual(challenges.enroll_users(challenge, [user.pk for user in users] * 2, chunk_size=2), 2)
+        self.assertEqual(UserChallenge.objects.filter(challenge=challenge).count(), 3)
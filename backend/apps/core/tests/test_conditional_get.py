@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.models import User, MuscleGroup, Achievement, TableVersion
+
+URL = '/api/v1/muscle-groups/'
+
+
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='etag', email='etag@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.group = MuscleGroup.objects.create(name='Peito')
+
+    def get(self, url=URL, **extra):
+        return self.client.get(url, **extra)
+
+
+class ETagHeaderTests(ConditionalGetTestCase):
+
+    def test_list_and_retrieve_carry_validators(self):
+        for url in (URL, f'{URL}{self.group.pk}/'):
+            with self.subTest(url=url):
+                response = self.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('"'))
+                self.assertIn('Last-Modified', response)
+                self.assertIn('no-cache', response['Cache-Control'])
+                self.assertIn('private', response['Cache-Control'])
+
+    def test_etag_is_stable_between_requests(self):
+        self.assertEqual(self.get()['ETag'], self.get()['ETag'])
+
+    def test_etag_varies_with_query_and_accept(self):
+        etags = {
+            self.get()['ETag'],
+            self.get(f'{URL}?fields=id')['ETag'],
+            self.get(HTTP_ACCEPT='application/msgpack')['ETag'],
+        }
+        self.assertEqual(len(etags), 3)
+
+    def test_other_catalogs_do_not_change_the_etag(self):
+        etag = self.get()['ETag']
+        Achievement.objects.create(
+            name='Primeiro treino', description='x', requirement_type='workouts', requirement_value=1
+        )
+        self.assertEqual(self.get()['ETag'], etag)
+
+
+class IfNoneMatchTests(ConditionalGetTestCase):
+
+    def test_matching_etag_is_304_without_touching_the_catalog(self):
+        etag = self.get()['ETag']
+        # Só a leitura de TableVersion: nem o catálogo nem o cache são consultados
+        with self.assertNumQueries(1):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_unknown_etag_is_200(self):
+        response = self.get(HTTP_IF_NONE_MATCH='"outro"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_writes_ignore_if_none_match(self):
+        etag = self.get()['ETag']
+        response = self.client.post(URL, {'name': 'Costas'}, format='json', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 201)
+
+
+class VersionBumpTests(ConditionalGetTestCase):
+
+    def test_write_makes_the_etag_stale(self):
+        etag = self.get()['ETag']
+        version = TableVersion.current([MuscleGroup])[MuscleGroup._meta.db_table][0]
+
+        MuscleGroup.objects.create(name='Costas')
+
+        self.assertEqual(TableVersion.current([MuscleGroup])[MuscleGroup._meta.db_table][0], version + 1)
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_delete_makes_the_etag_stale(self):
+        etag = self.get()['ETag']
+        self.group.delete()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
@@ -0,0 +1,101 @@
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.models import User, Notification, Workout, WorkoutSession
+from califit.asgi import application
+
+ORIGIN = [(b'origin', b'http://testserver')]
+
+
+class ConsumerTestCase(TransactionTestCase):
+    """TransactionTestCase: os consumers acessam o banco em outra thread e os pushes saem no on_commit"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ws', email='ws@example.com', password='x')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def communicator(self, path, token=None, query=''):
+        token = self.token if token is None else token
+        return WebsocketCommunicator(application, f'{path}?token={token}{query}', headers=ORIGIN)
+
+
+class NotificationConsumerTests(ConsumerTestCase):
+
+    async def test_rejects_invalid_token(self):
+        communicator = self.communicator('/ws/notifications/', token='invalid')
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_rejects_missing_token(self):
+        communicator = WebsocketCommunicator(application, '/ws/notifications/', headers=ORIGIN)
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_sends_initial_unread_count(self):
+        for index in range(3):
+            await database_sync_to_async(Notification.objects.create)(
+                user=self.user, title=f'Aviso {index}', message='m', type='system'
+            )
+
+        communicator = self.communicator('/ws/notifications/')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 3})
+        await communicator.disconnect()
+
+    async def test_pushes_new_notification(self):
+        communicator = self.communicator('/ws/notifications/')
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        notification = await database_sync_to_async(Notification.objects.create)(
+            user=self.user, title='Nova conquista', message='m', type='achievement'
+        )
+
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['type'], 'notification')
+        self.assertEqual(message['notification']['id'], notification.pk)
+        self.assertEqual(message['unread_count'], 1)
+        await communicator.disconnect()
+
+
+class WorkoutSessionConsumerTests(ConsumerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        workout = Workout.objects.create(name='Treino', user=self.user)
+        self.session = WorkoutSession.objects.create(user=self.user, workout=workout)
+        for reps in (10, 8, 6):
+            self.session.record_event('set_recorded', {'actual_reps': reps})
+
+    async def test_rejects_invalid_token(self):
+        communicator = self.communicator(f'/ws/sessions/{self.session.pk}/', token='invalid')
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_replays_events_after_since(self):
+        communicator = self.communicator(f'/ws/sessions/{self.session.pk}/', query='&since=1')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        replayed = [await communicator.receive_json_from() for _ in range(3)]
+        self.assertEqual([message['seq'] for message in replayed[:2]], [2, 3])
+        self.assertEqual([message['data']['actual_reps'] for message in replayed[:2]], [8, 6])
+        self.assertEqual(replayed[2], {'type': 'synced', 'session': self.session.pk, 'seq': 3})
+        await communicator.disconnect()
+
+    async def test_pushes_new_events(self):
+        communicator = self.communicator(f'/ws/sessions/{self.session.pk}/', query='&since=3')
+        await communicator.connect()
+        self.assertEqual((await communicator.receive_json_from())['type'], 'synced')
+
+        await database_sync_to_async(self.session.record_event)('completed', {})
+
+        message = await communicator.receive_json_from()
+        self.assertEqual((message['type'], message['seq']), ('completed', 4))
+        await communicator.disconnect()
@@ -0,0 +1,57 @@
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.test import TestCase
+
+from apps.core import streaks
+from apps.core.models import User, Workout, WorkoutSession, DailyActivity
+
+UTC = ZoneInfo('UTC')
+
+
+class LocalDayTests(TestCase):
+
+    def make_user(self, name, zone='America/Sao_Paulo'):
+        return User.objects.create_user(username=name, email=f'{name}@example.com', password='x', timezone=zone)
+
+    def islands(self, user):
+        return [(first, last, length) for _, first, last, length in streaks.streak_islands([user.pk])]
+
+    def complete_at(self, user, *instants):
+        workout = Workout.objects.create(name='Treino', user=user)
+        for end_time in instants:
+            WorkoutSession.objects.create(user=user, workout=workout, end_time=end_time, duration=1800, completed=True)
+        DailyActivity.rebuild([user])
+
+    def test_days_follow_the_user_zone(self):
+        # 11:00 e 23:30 em São Paulo (o mesmo dia); 23:00 e 11:30 do dia seguinte em Tóquio
+        instants = (datetime(2024, 3, 9, 14, 0, tzinfo=UTC), datetime(2024, 3, 10, 2, 30, tzinfo=UTC))
+        sao_paulo, tokyo = self.make_user('saopaulo'), self.make_user('toquio', 'Asia/Tokyo')
+        self.complete_at(sao_paulo, *instants)
+        self.complete_at(tokyo, *instants)
+
+        self.assertEqual(self.islands(sao_paulo), [(date(2024, 3, 9), date(2024, 3, 9), 1)])
+        self.assertEqual(self.islands(tokyo), [(date(2024, 3, 9), date(2024, 3, 10), 2)])
+        self.assertEqual(DailyActivity.objects.get(user=sao_paulo).workouts, 2)
+
+    def test_daylight_saving_change_keeps_the_streak(self):
+        # 23:30 locais antes e depois da mudança para o horário de verão (10/03/2024)
+        user = self.make_user('novayork', 'America/New_York')
+        self.complete_at(
+            user,
+            datetime(2024, 3, 10, 4, 30, tzinfo=UTC),   # 09/03 23:30 EST
+            datetime(2024, 3, 11, 3, 30, tzinfo=UTC),   # 10/03 23:30 EDT
+            datetime(2024, 3, 12, 3, 30, tzinfo=UTC),   # 11/03 23:30 EDT
+        )
+
+        self.assertEqual(self.islands(user), [(date(2024, 3, 9), date(2024, 3, 11), 3)])
+
+    def test_update_streak_counts_local_days(self):
+        user = self.make_user('atual')
+        day = date(2024, 3, 9)
+        for offset, expected in ((0, 1), (0, 1), (1, 2), (2, 3), (5, 1)):
+            user.update_streak(day + timedelta(days=offset))
+            self.assertEqual(user.streak_count, expected)
+
+        user.refresh_from_db()
+        self.assertEqual((user.streak_count, user.max_streak, user.streak_last_date), (1, 3, date(2024, 3, 14)))
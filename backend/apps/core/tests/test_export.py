@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core import export
+from apps.core.models import (
+    User, Exercise, Workout, WorkoutExercise, WorkoutSession, ExerciseRecord, SetRecord,
+    UserBodyMeasurement, Supplement, SupplementRecord
+)
+
+TYPES = ['session', 'exercise_record', 'set', 'measurement', 'supplement', 'supplement_record']
+
+
+def create_history(user):
+    workout = Workout.objects.create(name='Treino', user=user)
+    exercise = Exercise.objects.create(name='Supino', description='d', instructions='i', user=user)
+    workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=exercise)
+    session = WorkoutSession.objects.create(user=user, workout=workout, notes='ótimo, "pesado"\nnova linha')
+    record = ExerciseRecord.objects.create(session=session, exercise=exercise, workout_exercise=workout_exercise)
+    for number in (1, 2):
+        SetRecord.objects.create(exercise_record=record, set_number=number, actual_reps=10, weight='42.50')
+    UserBodyMeasurement.objects.create(user=user, weight=80.5)
+    supplement = Supplement.objects.create(user=user, name='Creatina', days='0,2,4')
+    SupplementRecord.objects.create(supplement=supplement)
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporta', email='exporta@example.com', password='x')
+        self.other = User.objects.create_user(username='outro', email='outro@example.com', password='x')
+        create_history(self.user)
+        create_history(self.other)
+
+
+class ExportStreamTests(ExportTestCase):
+
+    def test_ndjson_has_every_record_type_in_order(self):
+        rows = [json.loads(line) for line in export.stream(self.user, 'ndjson')]
+
+        self.assertEqual([row['type'] for row in rows], TYPES[:2] + ['set', 'set'] + TYPES[3:])
+        session = rows[0]
+        self.assertEqual(session['notes'], 'ótimo, "pesado"\nnova linha')
+        self.assertEqual(session['workout__name'], 'Treino')
+        self.assertEqual(rows[2]['weight'], '42.50')
+        # Só os registros do próprio usuário, ligados pelos ids originais
+        self.assertEqual(rows[1]['session_id'], session['id'])
+        self.assertEqual(session['id'], WorkoutSession.objects.get(user=self.user).pk)
+
+    def test_csv_has_one_header_and_every_record_type(self):
+        rows = list(csv.DictReader(io.StringIO(''.join(export.stream(self.user, 'csv')))))
+
+        self.assertEqual(list(rows[0]), export.csv_columns())
+        self.assertEqual([row['type'] for row in rows], TYPES[:2] + ['set', 'set'] + TYPES[3:])
+        self.assertEqual(rows[0]['notes'], 'ótimo, "pesado"\nnova linha')
+        self.assertEqual(rows[-2]['days'], '0,2,4')
+
+    def test_rows_are_produced_lazily(self):
+        lines = export.stream(self.user, 'ndjson', chunk_size=1)
+        with CaptureQueriesContext(connection) as context:
+            first = next(lines)
+        # A primeira linha sai depois de uma única consulta
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(json.loads(first)['type'], 'session')
+        self.assertEqual(len(list(lines)), 6)
+
+
+class ExportEndpointTests(ExportTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_streams_with_attachment_headers(self):
+        for export_format, content_type in export.FORMATS.items():
+            with self.subTest(export_format=export_format):
+                response = self.client.get('/api/v1/users/export/', {'export_format': export_format})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response['Content-Type'], content_type)
+                self.assertIn(f'.{export_format}"', response['Content-Disposition'])
+                self.assertIn(b'Creatina', b''.join(response.streaming_content))
+
+    def test_unknown_format_is_400(self):
+        response = self.client.get('/api/v1/users/export/', {'export_format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportCommandTests(ExportTestCase):
+
+    def test_writes_the_same_lines_to_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.csv')
+            call_command('export_user_data', self.user.email, '--export-format', 'csv', '--output', path)
+            with open(path, encoding='utf-8', newline='') as output:
+                self.assertEqual(output.read(), ''.join(export.stream(self.user, 'csv')))
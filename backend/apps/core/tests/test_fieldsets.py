@@ -0,0 +1,117 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.fieldsets import ALL, parse_spec
+from apps.core.models import (
+    User, MuscleGroup, Exercise, Workout, WorkoutExercise, WorkoutSession, ExerciseRecord, SetRecord
+)
+
+
+class ParseSpecTests(SimpleTestCase):
+
+    def test_flat_and_nested_paths(self):
+        self.assertEqual(
+            parse_spec('id, workout_detail.name,workout_detail.id'),
+            {'id': ALL, 'workout_detail': {'name': ALL, 'id': ALL}}
+        )
+
+    def test_empty_parts_are_ignored(self):
+        self.assertEqual(parse_spec(''), {})
+        self.assertEqual(parse_spec(',id,,.,a..b'), {'id': ALL, 'a': {'b': ALL}})
+
+    def test_whole_object_wins_over_its_fields(self):
+        self.assertEqual(parse_spec('workout_detail,workout_detail.name'), {'workout_detail': ALL})
+        self.assertEqual(parse_spec('workout_detail.name,workout_detail'), {'workout_detail': ALL})
+
+
+class FieldsetTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='campos', email='campos@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        group = MuscleGroup.objects.create(name='Peito')
+        workout = Workout.objects.create(name='Treino', user=self.user)
+        for index in range(3):
+            session = WorkoutSession.objects.create(user=self.user, workout=workout, notes='anotação')
+            exercise = Exercise.objects.create(name=f'Exercício {index}', description='d', instructions='i', user=self.user)
+            exercise.muscle_groups.add(group)
+            workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=exercise, order=index)
+            record = ExerciseRecord.objects.create(session=session, exercise=exercise, workout_exercise=workout_exercise)
+            SetRecord.objects.create(exercise_record=record, set_number=1, actual_reps=10, weight='40.00')
+
+    def results(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+
+class TrimTests(FieldsetTestCase):
+
+    def test_fields_select_top_level_and_nested(self):
+        for item in self.results('/api/v1/workout-sessions/', {'fields': 'id,workout_detail.name'}):
+            self.assertEqual(set(item), {'id', 'workout_detail'})
+            self.assertEqual(dict(item['workout_detail']), {'name': 'Treino'})
+
+    def test_nested_fields_inside_lists(self):
+        for item in self.results('/api/v1/exercise-records/', {'fields': 'id,set_records.weight'}):
+            self.assertEqual(set(item), {'id', 'set_records'})
+            self.assertEqual([dict(row) for row in item['set_records']], [{'weight': '40.00'}])
+
+    def test_unknown_fields_are_ignored(self):
+        for item in self.results('/api/v1/workout-sessions/', {'fields': 'id,nope,workout_detail.nope'}):
+            self.assertEqual(set(item), {'id', 'workout_detail'})
+            self.assertEqual(dict(item['workout_detail']), {})
+
+        for item in self.results('/api/v1/workout-sessions/', {'fields': 'nope'}):
+            self.assertEqual(dict(item), {})
+
+    def test_empty_expand_drops_only_embedded_objects(self):
+        item = self.results('/api/v1/workout-sessions/', {'expand': ''})[0]
+        self.assertNotIn('workout_detail', item)
+        self.assertIn('notes', item)
+        self.assertIn('workout', item)
+
+    def test_writes_ignore_the_parameters(self):
+        response = self.client.post(
+            '/api/v1/body-measurements/?fields=id', {'weight': 80.0, 'body_fat': 18.0}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('body_fat', response.data)
+
+
+class SparseQueryTests(FieldsetTestCase):
+
+    def queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            self.results(url, params)
+        return context.captured_queries
+
+    def test_fewer_queries_when_relations_are_not_requested(self):
+        full = self.queries('/api/v1/exercise-records/')
+        sparse = self.queries('/api/v1/exercise-records/', {'fields': 'id'})
+        self.assertLess(len(sparse), len(full))
+        # Só COUNT(*) e a listagem: nenhum prefetch de exercícios, grupos ou séries
+        self.assertEqual(len(sparse), 2)
+
+    def test_only_requested_columns_are_selected(self):
+        sql = self.queries('/api/v1/workout-sessions/', {'fields': 'id,start_time'})[-1]['sql']
+        self.assertIn('start_time', sql)
+        self.assertNotIn('notes', sql)
+        self.assertNotIn('calories_burned', sql)
+
+    def test_nested_field_is_joined_without_the_other_prefetches(self):
+        sparse = self.queries('/api/v1/exercise-records/', {'fields': 'id,exercise_detail.name'})
+        self.assertEqual(len(sparse), 2)
+        self.assertIn('JOIN', sparse[-1]['sql'])
+        self.assertNotIn('instructions', sparse[-1]['sql'])
+
+    def test_existing_prefetch_is_kept_for_nested_fields(self):
+        # A listagem de sessões já busca o treino anotado com Prefetch; ele continua sendo usado
+        full = self.queries('/api/v1/workout-sessions/')
+        sparse = self.queries('/api/v1/workout-sessions/', {'fields': 'id,workout_detail.name'})
+        self.assertEqual(len(sparse), len(full))
+        self.assertNotIn('notes', sparse[1]['sql'])
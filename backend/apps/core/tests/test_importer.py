@@ -0,0 +1,99 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.core.importer import import_workouts
+from apps.core.models import User, WorkoutSession, SetRecord
+
+CSV = [
+    'start_time,end_time,workout,exercise,set_number,reps,weight\n',
+    '2024-03-10 07:00:00,2024-03-10 08:00:00,Treino A,Supino,1,10,40\n',
+    '2024-03-10 07:00:00+00:00,,Treino B,Supino,1,10,40\n',
+]
+
+
+class ImportTimezoneTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='importa', email='importa@example.com', password='x', timezone='Asia/Tokyo'
+        )
+
+    def test_naive_times_use_the_user_zone(self):
+        result = import_workouts(self.user, CSV, 'csv')
+        self.assertEqual(result['sessions'], 2)
+
+        tokyo = ZoneInfo('Asia/Tokyo')
+        session = WorkoutSession.objects.get(user=self.user, workout__name='Treino A')
+        self.assertEqual(session.start_time, datetime(2024, 3, 10, 7, tzinfo=tokyo))
+        self.assertEqual(session.end_time, datetime(2024, 3, 10, 8, tzinfo=tokyo))
+        self.assertEqual(session.duration, 3600)
+
+    def test_explicit_offsets_are_kept(self):
+        import_workouts(self.user, CSV, 'csv')
+
+        session = WorkoutSession.objects.get(user=self.user, workout__name='Treino B')
+        self.assertEqual(session.start_time, datetime(2024, 3, 10, 7, tzinfo=ZoneInfo('UTC')))
+
+
+class ImportValidationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='limites', email='limites@example.com', password='x')
+
+    def test_out_of_range_values_are_row_errors(self):
+        result = import_workouts(self.user, [
+            'start_time,workout,exercise,set_number,reps,weight\n',
+            '2024-03-10 07:00:00,Treino,Supino,1,10,40\n',
+            '2024-03-10 07:00:00,Treino,Supino,2,10,123456.78\n',
+            '2024-03-10 07:00:00,Treino,Supino,3,99999999999,40\n',
+            '2024-03-10 07:00:00,Treino,Supino,4,10,-5\n',
+            '2024-03-10 07:00:00,Treino,Supino,5,10,NaN\n',
+        ], 'csv')
+
+        self.assertEqual((result['sets'], result['errors']), (1, 4))
+        self.assertTrue(result['error_details'][0].startswith('linha 3: weight inválido'))
+        self.assertEqual(SetRecord.objects.filter(exercise_record__session__user=self.user).count(), 1)
+
+
+class ImportDuplicateTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='repete', email='repete@example.com', password='x')
+
+    def test_reimporting_the_same_file_skips_existing_sessions(self):
+        first = import_workouts(self.user, CSV, 'csv')
+        second = import_workouts(self.user, CSV + [
+            '2024-03-11 07:00:00,,Treino A,Supino,1,12,40\n',
+        ], 'csv', batch_size=1)
+
+        self.assertEqual(first['sessions'], 2)
+        self.assertEqual((second['sessions'], second['sets'], second['duplicates']), (1, 1, 2))
+        self.assertEqual(WorkoutSession.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(SetRecord.objects.filter(exercise_record__session__user=self.user).count(), 3)
+
+
+class ImportUploadTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='upload', email='upload@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, content):
+        upload = SimpleUploadedFile('history.csv', ''.join(content).encode())
+        return self.client.post('/api/v1/workout-sessions/import/', {'file': upload}, format='multipart')
+
+    def test_imports_an_upload(self):
+        response = self.post(CSV)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['sessions'], 2)
+
+    @override_settings(IMPORT_MAX_UPLOAD_SIZE=100)
+    def test_rejects_uploads_over_the_limit(self):
+        response = self.post(CSV)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(WorkoutSession.objects.filter(user=self.user).exists())
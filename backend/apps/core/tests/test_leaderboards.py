@@ -0,0 +1,183 @@
+import uuid
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import skipUnless
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.core import leaderboards
+from apps.core.models import User, XPEvent
+
+UTC = ZoneInfo('UTC')
+
+
+def redis_available():
+    try:
+        import redis
+        redis.Redis.from_url(settings.LEADERBOARD_REDIS_URL, socket_connect_timeout=0.2).ping()
+    except Exception:
+        return False
+    return True
+
+
+class SortedSetsContract:
+    """Mesma semântica nos dois backends; as subclasses definem make_backend()"""
+
+    def setUp(self):
+        self.backend = self.make_backend()
+        self.key = f'lb:test:{uuid.uuid4().hex}'
+
+    def test_incr_many_accumulates(self):
+        self.backend.incr_many([(self.key, 1, 10, None), (self.key, 2, 5, None), (self.key, 1, 3, None)])
+        self.assertEqual(self.backend.range(self.key, 0, -1), [(1, 13), (2, 5)])
+
+    def test_ties_are_ordered_like_zrevrange(self):
+        # Empate: membro lexicograficamente maior primeiro ("9" > "10" > "1")
+        self.backend.set_many(self.key, {1: 50, 9: 50, 10: 50, 2: 80})
+        self.assertEqual([member for member, _ in self.backend.range(self.key, 0, -1)], [2, 9, 10, 1])
+        self.assertEqual(self.backend.rank(self.key, 10), 2)
+
+    def test_set_many_overwrites(self):
+        self.backend.set_many(self.key, {1: 10, 2: 20})
+        self.backend.set_many(self.key, {1: 30})
+        self.assertEqual(self.backend.range(self.key, 0, -1), [(1, 30), (2, 20)])
+
+    def test_remove_and_missing_rank(self):
+        self.backend.set_many(self.key, {1: 10, 2: 20})
+        self.backend.remove(self.key, 2)
+        self.assertIsNone(self.backend.rank(self.key, 2))
+        self.assertEqual(self.backend.rank(self.key, 1), 0)
+
+    def test_replace_swaps_and_clears(self):
+        tmp_key = f'{self.key}:rebuild'
+        self.backend.set_many(self.key, {1: 10})
+        self.backend.set_many(tmp_key, {2: 20})
+        self.backend.replace(self.key, tmp_key)
+        self.assertEqual(self.backend.range(self.key, 0, -1), [(2, 20)])
+
+        self.backend.replace(self.key, tmp_key)
+        self.assertEqual(self.backend.range(self.key, 0, -1), [])
+
+
+class InMemorySortedSetsTests(SortedSetsContract, SimpleTestCase):
+
+    def make_backend(self):
+        return leaderboards.InMemorySortedSets()
+
+
+@skipUnless(redis_available(), 'Redis indisponível em LEADERBOARD_REDIS_URL')
+class RedisSortedSetsTests(SortedSetsContract, SimpleTestCase):
+
+    def make_backend(self):
+        return leaderboards.RedisSortedSets(settings.LEADERBOARD_REDIS_URL)
+
+    def tearDown(self):
+        self.backend.client.delete(self.key, f'{self.key}:rebuild')
+
+
+class BoardKeyTests(SimpleTestCase):
+
+    # Domingo 22:00 em São Paulo, já segunda-feira em UTC
+    sunday_night = datetime(2024, 3, 4, 1, 0, tzinfo=UTC)
+    # 31 de março em São Paulo, 1º de abril em UTC
+    month_end = datetime(2024, 4, 1, 1, 0, tzinfo=UTC)
+
+    @override_settings(LEADERBOARD_TIME_ZONE='America/Sao_Paulo')
+    def test_periods_turn_in_the_leaderboard_zone(self):
+        self.assertEqual(leaderboards.board_key('weekly', self.sunday_night), 'lb:xp:week:2024-W09')
+        self.assertEqual(leaderboards.board_key('monthly', self.month_end), 'lb:xp:month:2024-03')
+        self.assertEqual(
+            leaderboards.period_start('weekly', self.sunday_night),
+            datetime(2024, 2, 26, tzinfo=ZoneInfo('America/Sao_Paulo'))
+        )
+
+    @override_settings(LEADERBOARD_TIME_ZONE='UTC')
+    def test_zone_is_configurable(self):
+        self.assertEqual(leaderboards.board_key('weekly', self.sunday_night), 'lb:xp:week:2024-W10')
+        self.assertEqual(leaderboards.board_key('monthly', self.month_end), 'lb:xp:month:2024-04')
+        self.assertEqual(leaderboards.period_start('monthly', self.month_end), datetime(2024, 4, 1, tzinfo=UTC))
+
+    @override_settings(LEADERBOARD_TIME_ZONE='UTC')
+    def test_active_time_zone_does_not_matter(self):
+        with timezone.override('Asia/Tokyo'):
+            self.assertEqual(leaderboards.board_key('weekly', self.sunday_night), 'lb:xp:week:2024-W10')
+            self.assertEqual(leaderboards.period_start('weekly', self.sunday_night), datetime(2024, 3, 4, tzinfo=UTC))
+
+
+class LeaderboardTestCase(TestCase):
+
+    def setUp(self):
+        leaderboards._backend = None
+        self.addCleanup(setattr, leaderboards, '_backend', None)
+
+    def make_user(self, name):
+        return User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+
+    def scores(self, board):
+        return [(user_id, score) for _, user_id, score in leaderboards.top(board, 100)]
+
+
+class RecordXPTests(LeaderboardTestCase):
+
+    def test_boards_change_only_after_commit(self):
+        user = self.make_user('atleta')
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            user.add_xp(40, 'session', 1)
+            self.assertEqual(self.scores('all-time'), [])
+        for callback in callbacks:
+            callback()
+
+        for board in ('weekly', 'monthly', 'all-time'):
+            self.assertEqual(self.scores(board), [(user.pk, 40)])
+
+    def test_repeated_source_is_not_counted_twice(self):
+        user = self.make_user('atleta')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.add_xp(40, 'session', 1)
+            user.add_xp(40, 'session', 1)
+        self.assertEqual(self.scores('all-time'), [(user.pk, 40)])
+
+    def test_add_xp_many_updates_every_user(self):
+        first, second = self.make_user('um'), self.make_user('dois')
+        with self.captureOnCommitCallbacks(execute=True):
+            User.add_xp_many(25, 'challenge', [(first.pk, 1), (second.pk, 2), (second.pk, 3)])
+        self.assertEqual(self.scores('weekly'), [(second.pk, 50), (first.pk, 25)])
+
+    def test_deleted_user_leaves_the_board(self):
+        user = self.make_user('atleta')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.add_xp(40, 'session', 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertEqual(self.scores('all-time'), [])
+
+
+class RebuildLeaderboardsTests(LeaderboardTestCase):
+
+    def test_rebuild_matches_the_database(self):
+        first, second = self.make_user('um'), self.make_user('dois')
+        User.objects.filter(pk=first.pk).update(total_xp=500, streak_count=3)
+        User.objects.filter(pk=second.pk).update(total_xp=200, streak_count=7)
+        now = timezone.now()
+        period_start = min(leaderboards.period_start(board, now) for board in ('weekly', 'monthly'))
+        XPEvent.objects.bulk_create([
+            XPEvent(user=first, source_type='session', source_id=1, amount=30, created_at=now),
+            XPEvent(user=second, source_type='session', source_id=2, amount=80, created_at=now),
+            # Antes dos períodos atuais: conta só no geral (total_xp)
+            XPEvent(user=first, source_type='session', source_id=3, amount=90,
+                    created_at=period_start - timedelta(seconds=1)),
+        ])
+        # Dados antigos no ranking são descartados pela troca
+        leaderboards.get_backend().set_many(leaderboards.board_key('weekly'), {999: 1000})
+
+        call_command('rebuild_leaderboards', '--chunk-size', '1', stdout=StringIO())
+
+        self.assertEqual(self.scores('all-time'), [(first.pk, 500), (second.pk, 200)])
+        self.assertEqual(self.scores('streak'), [(second.pk, 7), (first.pk, 3)])
+        self.assertEqual(self.scores('weekly'), [(second.pk, 80), (first.pk, 30)])
+        self.assertEqual(self.scores('monthly'), [(second.pk, 80), (first.pk, 30)])
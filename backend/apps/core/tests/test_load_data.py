@@ -0,0 +1,30 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.core.models import User, XPEvent
+
+
+class GenerateLoadDataTests(TestCase):
+
+    def test_existing_users_keep_their_derived_data(self):
+        existing = User.objects.create_user(
+            username='veterano', email='veterano@example.com', password='x',
+            xp_points=750, total_xp=750, level=8, max_streak=12
+        )
+
+        call_command(
+            'generate_load_data', '--force', '--prefix', 'zz', '--users', '2', '--exercises', '10',
+            '--templates', '1', '--sessions-per-user', '3', '--notifications-per-user', '2', stdout=StringIO()
+        )
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.total_xp, existing.level, existing.max_streak), (750, 8, 12))
+        self.assertFalse(XPEvent.objects.filter(user=existing).exists())
+
+        generated = User.objects.filter(username__startswith='zz-user-')
+        self.assertEqual(generated.count(), 2)
+        for user in generated:
+            self.assertEqual(user.total_xp, sum(XPEvent.objects.filter(user=user).values_list('amount', flat=True)))
+            self.assertGreater(user.total_xp, 0)
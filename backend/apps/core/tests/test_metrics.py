@@ -0,0 +1,23 @@
+from django.test import TestCase, override_settings
+
+
+@override_settings(METRICS_TOKEN='')
+class MetricsAccessTests(TestCase):
+
+    def get(self, **headers):
+        return self.client.get('/metrics', headers=headers)
+
+    def test_without_a_token_production_is_closed(self):
+        self.assertEqual(self.get().status_code, 403)
+
+    @override_settings(DEBUG=True)
+    def test_without_a_token_debug_is_open(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'califit_http_request_duration_seconds', response.content)
+
+    @override_settings(METRICS_TOKEN='segredo')
+    def test_token_is_required(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(Authorization='Bearer outro').status_code, 403)
+        self.assertEqual(self.get(Authorization='Bearer segredo').status_code, 200)
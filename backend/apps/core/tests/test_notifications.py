@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.core.models import User, Notification, NotificationCounter
+from apps.core.notifications import compact_read_notifications, delete_expired_notifications
+
+
+class NotificationCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='counter', email='counter@example.com', password='x')
+
+    def create_unread(self, total):
+        # bulk_create não passa por save(): simula dados anteriores ao contador
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title='Aviso', message='m', type='system') for _ in range(total)
+        ])
+
+    def test_missing_counter_keeps_existing_unread_on_create(self):
+        self.create_unread(50)
+        Notification.objects.create(user=self.user, title='Nova', message='m', type='system')
+
+        self.assertEqual(NotificationCounter.get_unread(self.user.pk), 51)
+
+    def test_missing_counter_keeps_existing_unread_on_mark_read(self):
+        self.create_unread(5)
+        Notification.objects.filter(user=self.user).first().mark_read()
+
+        self.assertEqual(NotificationCounter.get_unread(self.user.pk), 4)
+
+    def test_adjust_existing_counter(self):
+        Notification.objects.create(user=self.user, title='Nova', message='m', type='system')
+        Notification.mark_all_read(self.user)
+
+        self.assertEqual(NotificationCounter.get_unread(self.user.pk), 0)
+
+
+class CompactReadNotificationsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='digest', email='digest@example.com', password='x')
+        self.now = timezone.now()
+
+    def create_read(self, days_ago, notification_type='system', total=1):
+        created = Notification.objects.bulk_create([
+            Notification(user=self.user, title='Antiga', message='m', type=notification_type, read=True)
+            for _ in range(total)
+        ])
+        Notification.objects.filter(pk__in=[item.pk for item in created]).update(
+            created_at=self.now - timedelta(days=days_ago)
+        )
+
+    def test_merges_runs_into_a_single_digest(self):
+        self.create_read(100, 'system', total=2)
+        compact_read_notifications(self.now, chunk_size=1)
+        self.create_read(95, 'achievement')
+        compact_read_notifications(self.now, chunk_size=1)
+
+        digest = Notification.objects.get(user=self.user)
+        self.assertEqual(digest.type, 'digest')
+        self.assertEqual(
+            digest.message,
+            'Resumo de notificações antigas: Sistema: 2, Conquista: 1'
+        )
+
+    def test_digest_sorts_with_the_compacted_history(self):
+        self.create_read(100)
+        self.create_read(90)
+        recent = Notification.objects.create(user=self.user, title='Nova', message='m', type='system')
+        compact_read_notifications(self.now, chunk_size=100)
+
+        digest = Notification.objects.get(user=self.user, type='digest')
+        self.assertEqual(digest.created_at, self.now - timedelta(days=90))
+        self.assertEqual(Notification.objects.filter(user=self.user).first(), recent)
+
+    def test_expiry_recounts_a_missing_counter_after_deleting(self):
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title='Lembrete', message='m', type='reminder') for _ in range(3)
+        ])
+        Notification.objects.filter(user=self.user).update(created_at=self.now - timedelta(days=30))
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title='Pendente', message='m', type='system') for _ in range(2)
+        ])
+        delete_expired_notifications(self.now, chunk_size=100)
+
+        self.assertEqual(NotificationCounter.get_unread(self.user.pk), 2)
@@ -0,0 +1,87 @@
+import base64
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.models import User, Notification
+
+URL = '/api/v1/notifications/'
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cursor', email='cursor@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, created_at_list):
+        notifications = Notification.objects.bulk_create([
+            Notification(user=self.user, title=f'n{index}', message='x', type='system')
+            for index in range(len(created_at_list))
+        ])
+        for notification, created_at in zip(notifications, created_at_list):
+            Notification.objects.filter(pk=notification.pk).update(created_at=created_at)
+        return [notification.pk for notification in notifications]
+
+    def walk(self, url):
+        """Segue os links next e devolve as páginas de ids"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            pages.append([item['id'] for item in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_cursor_moves_forward(self):
+        now = timezone.now()
+        ids = self.create([now - timedelta(minutes=index) for index in range(7)])
+
+        pages = self.walk(f'{URL}?cursor=&page_size=3')
+
+        self.assertEqual(pages, [ids[0:3], ids[3:6], ids[6:7]])
+
+    def test_ties_on_the_sort_key_are_broken_by_id(self):
+        now = timezone.now()
+        # Cinco registros com o mesmo created_at caem na fronteira das páginas
+        ids = self.create([now] * 5 + [now - timedelta(minutes=1)] * 2)
+
+        pages = self.walk(f'{URL}?cursor=&page_size=2')
+
+        flat = [pk for page in pages for pk in page]
+        self.assertEqual(flat, sorted(ids[:5], reverse=True) + sorted(ids[5:], reverse=True))
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+
+    def test_rows_inserted_after_the_first_page_are_not_repeated(self):
+        now = timezone.now()
+        ids = self.create([now - timedelta(minutes=index) for index in range(4)])
+
+        first = self.client.get(f'{URL}?cursor=&page_size=2').data
+        self.create([now + timedelta(minutes=1)])
+        second = self.client.get(first['next']).data
+
+        self.assertEqual([item['id'] for item in second['results']], ids[2:4])
+
+    def test_malformed_cursor_is_404(self):
+        self.create([timezone.now()])
+        not_json = base64.urlsafe_b64encode(b'lixo').decode()
+        without_value = base64.urlsafe_b64encode(b'{"id": 1}').decode()
+        bad_date = base64.urlsafe_b64encode(b'{"id": 1, "v": "ontem"}').decode()
+
+        for cursor in ('%%%', 'abc', not_json, without_value, bad_date):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(URL, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_without_cursor_page_numbers_are_kept(self):
+        now = timezone.now()
+        ids = self.create([now] * 3)
+
+        response = self.client.get(URL)
+
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([item['id'] for item in response.data['results']], sorted(ids, reverse=True))
@@ -0,0 +1,89 @@
+import io
+
+import msgpack
+import orjson
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from apps.core.models import User, UserBodyMeasurement
+from apps.core.parsers import MessagePackParser, ORJSONParser
+
+
+class ORJSONParserTests(SimpleTestCase):
+
+    def parse(self, body):
+        return ORJSONParser().parse(io.BytesIO(body))
+
+    def test_valid_body(self):
+        self.assertEqual(self.parse(b'{"weight": 80.5, "tags": [1, 2]}'), {'weight': 80.5, 'tags': [1, 2]})
+
+    def test_malformed_bodies_raise_parse_error(self):
+        for body in (b'', b'{"weight": ', b'{"a": 1} lixo', b'\xff\xfe', b'[' * 5000):
+            with self.subTest(body=body[:20]):
+                with self.assertRaises(ParseError):
+                    self.parse(body)
+
+
+class MessagePackParserTests(SimpleTestCase):
+
+    def parse(self, body):
+        return MessagePackParser().parse(io.BytesIO(body))
+
+    def test_valid_body(self):
+        body = msgpack.packb({'weight': 80.5, 'tags': [1, 2]})
+        self.assertEqual(self.parse(body), {'weight': 80.5, 'tags': [1, 2]})
+
+    def test_malformed_bodies_raise_parse_error(self):
+        bodies = {
+            'vazio': b'',
+            'incompleto': b'\x92\x01',
+            'dados extras': b'\x01\x02',
+            'byte reservado': b'\xc1',
+            'aninhamento profundo': b'\x91' * 5000,
+            'utf-8 inválido': b'\xa2\xff\xfe',
+            'chave lista': b'\x81\x91\x01\x01',
+            'chave mapa': b'\x81\x80\x01',
+        }
+        for name, body in bodies.items():
+            with self.subTest(name):
+                with self.assertRaises(ParseError):
+                    self.parse(body)
+
+    def test_unhashable_key_type_error_is_parse_error(self):
+        # Com strict_map_key desligado o msgpack levanta TypeError
+        original = msgpack.unpackb
+        try:
+            msgpack.unpackb = lambda data, **kwargs: original(data, strict_map_key=False, **kwargs)
+            with self.assertRaises(ParseError):
+                self.parse(b'\x81\x91\x01\x01')
+        finally:
+            msgpack.unpackb = original
+
+
+class ParserAPITests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='parser', email='parser@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, body, content_type):
+        return self.client.post('/api/v1/body-measurements/', body, content_type=content_type)
+
+    def test_both_formats_are_accepted(self):
+        payload = {'weight': 80.5, 'body_fat': 18.0}
+        self.assertEqual(self.post(orjson.dumps(payload), 'application/json').status_code, 201)
+        self.assertEqual(self.post(msgpack.packb(payload), 'application/msgpack').status_code, 201)
+        self.assertEqual(UserBodyMeasurement.objects.filter(user=self.user).count(), 2)
+
+    def test_malformed_bodies_are_400(self):
+        cases = [
+            (b'{"weight": ', 'application/json'),
+            (b'\x81\x91\x01\x01', 'application/msgpack'),
+            (b'\x81\xa6weight\xcb@T \x00\x00\x00\x00\x00\x01', 'application/msgpack'),
+            (b'\x91' * 5000, 'application/msgpack'),
+        ]
+        for body, content_type in cases:
+            with self.subTest(body=body[:20], content_type=content_type):
+                self.assertEqual(self.post(body, content_type).status_code, 400)
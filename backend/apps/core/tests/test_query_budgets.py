@@ -0,0 +1,20 @@
+from io import StringIO
+
+from django.test import TestCase, override_settings
+
+from apps.core import leaderboards
+from apps.core.benchmarking import ISOLATED_SETTINGS
+from apps.core.management.commands.check_query_budgets import Command
+
+
+@override_settings(**ISOLATED_SETTINGS)
+class QueryBudgetTests(TestCase):
+    """Os mesmos cenários de check_query_budgets, no banco da suíte de testes"""
+
+    def setUp(self):
+        leaderboards._backend = None
+        self.addCleanup(setattr, leaderboards, '_backend', None)
+
+    def test_every_route_is_within_its_budget(self):
+        command = Command(stdout=StringIO())
+        self.assertEqual(command.check_budgets(), [])
@@ -0,0 +1,18 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.core.management.commands.check_query_plans import Command
+from apps.core.models import Notification
+
+
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_use_an_index(self):
+        # CommandError (um índice faltando) derruba o teste
+        call_command('check_query_plans', stdout=StringIO())
+
+    def test_unindexed_filter_is_reported(self):
+        plan = Notification.objects.filter(message='m').explain()
+        self.assertTrue(Command().is_sequential_scan(plan, Notification._meta.db_table))
@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from apps.core import streaks
+from apps.core.models import User, DailyActivity
+
+
+class StreakTestCase(TestCase):
+
+    def make_user(self, name, zone='America/Sao_Paulo'):
+        return User.objects.create_user(username=name, email=f'{name}@example.com', password='x', timezone=zone)
+
+    def trained(self, user, *days):
+        DailyActivity.objects.bulk_create([DailyActivity(user=user, date=day, workouts=1) for day in days])
+
+    def islands(self, user):
+        return [(first, last, length) for _, first, last, length in streaks.streak_islands([user.pk])]
+
+
+class StreakIslandsTests(StreakTestCase):
+
+    def test_consecutive_days_form_one_island(self):
+        user = self.make_user('ilhas')
+        self.trained(user, date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 3), date(2024, 3, 5),
+                     date(2024, 3, 7), date(2024, 3, 8))
+
+        self.assertEqual(self.islands(user), [
+            (date(2024, 3, 1), date(2024, 3, 3), 3),
+            (date(2024, 3, 5), date(2024, 3, 5), 1),
+            (date(2024, 3, 7), date(2024, 3, 8), 2),
+        ])
+
+    def test_month_year_and_leap_day_boundaries(self):
+        user = self.make_user('calendario')
+        self.trained(user, date(2023, 12, 31), date(2024, 1, 1), date(2024, 2, 28), date(2024, 2, 29),
+                     date(2024, 3, 1), date(2025, 2, 28), date(2025, 3, 1))
+
+        self.assertEqual([length for _, _, length in self.islands(user)], [2, 3, 2])
+
+    def test_users_do_not_share_islands(self):
+        first, second = self.make_user('um'), self.make_user('dois')
+        self.trained(first, date(2024, 3, 1), date(2024, 3, 2))
+        self.trained(second, date(2024, 3, 3), date(2024, 3, 4), date(2024, 3, 5))
+
+        self.assertEqual(streaks.max_streaks([first.pk, second.pk]), {first.pk: 2, second.pk: 3})
+        self.assertEqual(streaks.streak_islands([]), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'A consulta SQL só roda no Postgres')
+    def test_sql_and_python_agree(self):
+        first, second = self.make_user('um'), self.make_user('dois')
+        self.trained(first, date(2023, 12, 31), date(2024, 1, 1), date(2024, 1, 3))
+        self.trained(second, date(2024, 1, 2), date(2024, 1, 3))
+        user_ids = [first.pk, second.pk]
+
+        self.assertEqual(
+            [tuple(row) for row in streaks._islands_sql(user_ids)], streaks._islands_python(user_ids)
+        )
+
+
+class MaxStreakTests(StreakTestCase):
+
+    def test_backfill_takes_the_longest_island(self):
+        user = self.make_user('historico')
+        self.trained(user, *(date(2024, 1, 1) + timedelta(days=offset) for offset in range(4)))
+        self.trained(user, date(2024, 2, 1))
+        User.objects.filter(pk=user.pk).update(streak_count=1, max_streak=1)
+
+        call_command('backfill_max_streaks', stdout=StringIO())
+
+        user.refresh_from_db()
+        self.assertEqual(user.max_streak, 4)
+
+    def test_calendar_clips_days_to_the_range(self):
+        user = self.make_user('agenda')
+        self.trained(user, date(2024, 2, 27), date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 2))
+
+        calendar = streaks.streak_calendar(user, date(2024, 2, 28), date(2024, 3, 1))
+
+        self.assertEqual(calendar['days'], [date(2024, 2, 28), date(2024, 2, 29)])
+        self.assertEqual(calendar['streaks'], [{'start': date(2024, 2, 27), 'end': date(2024, 2, 29), 'length': 3}])
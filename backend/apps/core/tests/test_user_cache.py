@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core import caching
+from apps.core.models import User, Workout, WorkoutSession
+
+
+class UserCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cache', email='cache@example.com', password='x')
+        self.client = APIClient()
+        # Token em vez de force_authenticate: cada requisição carrega o usuário do banco
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def get(self, action):
+        response = self.client.get(f'/api/v1/users/{action}/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def hits(self, entity):
+        return caching.stats()[entity]['hits']
+
+
+class UserProfileCacheTests(UserCacheTestCase):
+
+    def test_second_request_is_a_cache_hit(self):
+        self.get('me')
+        with self.assertNumQueries(1):  # só a autenticação
+            self.get('me')
+        self.assertEqual(self.hits('user-profile'), 1)
+
+    def test_profile_is_fresh_after_an_update(self):
+        self.get('me')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/v1/users/{self.user.pk}/', {'first_name': 'Novo'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get('me')['first_name'], 'Novo')
+
+    def test_invalidates_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Novo'
+            self.user.save()
+            # Leitura concorrente antes do commit: ainda vê o nome antigo
+            caching.get_or_set('user-profile', 'me', lambda: {'first_name': ''}, scope=self.user.pk)
+
+        self.assertEqual(self.get('me')['first_name'], 'Novo')
+
+
+class UserStatsCacheTests(UserCacheTestCase):
+
+    def test_second_request_is_a_cache_hit(self):
+        self.get('stats')
+        self.get('stats')
+        self.assertEqual(self.hits('user-stats'), 1)
+
+    def test_stats_are_fresh_after_a_session(self):
+        self.assertEqual(self.get('stats')['total_workouts'], 0)
+
+        workout = Workout.objects.create(name='Treino', user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            session = WorkoutSession.objects.create(user=self.user, workout=workout)
+            session.complete_session()
+
+        self.assertEqual(self.get('stats')['total_workouts'], 1)
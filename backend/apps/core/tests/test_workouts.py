@@ -0,0 +1,116 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.models import User, Exercise, Workout, WorkoutExercise
+
+
+class CloneTestCase(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='coach', email='coach@example.com', password='x', is_staff=True)
+        self.template = Workout.objects.create(
+            name='Template', description='Corpo todo', user=self.owner, is_template=True,
+            estimated_duration=45, difficulty='advanced'
+        )
+        # Criados fora de ordem: a cópia segue o campo order, não o id
+        for order, name in ((2, 'Agachamento'), (0, 'Supino'), (1, 'Remada')):
+            exercise = Exercise.objects.create(name=name, description='d', instructions='i', user=self.owner)
+            WorkoutExercise.objects.create(
+                workout=self.template, exercise=exercise, order=order, sets=order + 2, target_reps=8,
+                rest_duration=90, notes=f'nota {name}'
+            )
+        self.users = [
+            User.objects.create_user(username=f'aluno{index}', email=f'aluno{index}@example.com', password='x')
+            for index in range(3)
+        ]
+
+    def exercises(self, workout):
+        return list(workout.workout_exercises.values_list(
+            'exercise__name', 'order', 'sets', 'target_reps', 'rest_duration', 'notes'
+        ))
+
+
+class CloneForTests(CloneTestCase):
+
+    def test_copies_keep_exercise_order_and_get_the_new_owner(self):
+        copies = self.template.clone_for([user.pk for user in self.users])
+
+        self.assertEqual([copy.user_id for copy in copies], [user.pk for user in self.users])
+        for copy in copies:
+            copy = Workout.objects.get(pk=copy.pk)
+            self.assertFalse(copy.is_template)
+            self.assertEqual(
+                (copy.name, copy.description, copy.estimated_duration, copy.difficulty),
+                ('Template', 'Corpo todo', 45, 'advanced')
+            )
+            self.assertEqual(self.exercises(copy), self.exercises(self.template))
+        self.assertEqual([name for name, *_ in self.exercises(copies[0])], ['Supino', 'Remada', 'Agachamento'])
+
+    def test_name_override_and_source_untouched(self):
+        copy, = self.template.clone_for([self.users[0].pk], name='Meu treino')
+        self.assertEqual(copy.name, 'Meu treino')
+        self.assertEqual(self.template.workout_exercises.count(), 3)
+        self.assertTrue(Workout.objects.get(pk=self.template.pk).is_template)
+
+    def test_three_queries_per_batch(self):
+        user_ids = [user.pk for user in self.users]
+        # Leitura dos exercícios e dois INSERTs por lote, mais o savepoint do atomic
+        with self.assertNumQueries(1 + 2 * 3 + 2):
+            copies = self.template.clone_for(user_ids, batch_size=1)
+        self.assertEqual(len(copies), 3)
+        self.assertEqual(WorkoutExercise.objects.filter(workout__in=copies).count(), 9)
+
+
+class CloneEndpointTests(CloneTestCase):
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_clone_belongs_to_the_requesting_user(self):
+        user = self.users[0]
+        response = self.client_for(user).post(f'/api/v1/workouts/{self.template.pk}/clone/', {}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        copy = Workout.objects.get(pk=response.data['id'])
+        self.assertEqual(copy.user, user)
+        self.assertFalse(copy.is_template)
+        self.assertEqual(
+            [item['exercise_detail']['name'] for item in response.data['workout_exercises']],
+            ['Supino', 'Remada', 'Agachamento']
+        )
+
+    def test_other_users_private_workouts_cannot_be_cloned(self):
+        private = Workout.objects.create(name='Privado', user=self.users[1])
+        response = self.client_for(self.users[0]).post(f'/api/v1/workouts/{private.pk}/clone/', {}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_assign_is_for_staff_only(self):
+        response = self.client_for(self.users[0]).post(
+            f'/api/v1/workouts/{self.template.pk}/assign/', {'user_ids': [self.users[1].pk]}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_assign_skips_inactive_and_unknown_users(self):
+        User.objects.filter(pk=self.users[2].pk).update(is_active=False)
+        user_ids = [user.pk for user in self.users] + [999999]
+
+        response = self.client_for(self.owner).post(
+            f'/api/v1/workouts/{self.template.pk}/assign/', {'user_ids': user_ids, 'name': 'Semana 1'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['assigned'], 2)
+        for user in self.users[:2]:
+            copy = Workout.objects.get(pk=response.data['workouts'][user.pk])
+            self.assertEqual((copy.user_id, copy.name), (user.pk, 'Semana 1'))
+            self.assertEqual(self.exercises(copy), self.exercises(self.template))
+        self.assertFalse(Workout.objects.filter(user=self.users[2]).exists())
+
+    def test_assign_validates_user_ids(self):
+        client = self.client_for(self.owner)
+        for payload in ({}, {'user_ids': 'todos'}, {'user_ids': [1, '2']}):
+            with self.subTest(payload=payload):
+                response = client.post(f'/api/v1/workouts/{self.template.pk}/assign/', payload, format='json')
+                self.assertEqual(response.status_code, 400)
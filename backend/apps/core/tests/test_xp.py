@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.core import caching
+from apps.core.models import User, XPEvent
+
+
+class RebuildXPTotalsTests(TestCase):
+
+    def rebuild(self, *args):
+        call_command('rebuild_xp_totals', *args, stdout=StringIO())
+
+    def test_keeps_xp_earned_before_the_ledger(self):
+        user = User.objects.create_user(username='veteran', email='veteran@example.com', password='x')
+        User.objects.filter(pk=user.pk).update(xp_points=750, total_xp=750, level=8)
+        XPEvent.objects.create(user=user, source_type='session', source_id=1, amount=50)
+
+        self.rebuild()
+
+        user.refresh_from_db()
+        self.assertEqual((user.xp_points, user.total_xp, user.level), (750, 750, 8))
+        legacy = XPEvent.objects.get(user=user, source_type='legacy')
+        self.assertEqual(legacy.amount, 700)
+        self.assertEqual(legacy.created_at, user.date_joined)
+
+    def test_is_idempotent(self):
+        user = User.objects.create_user(username='veteran', email='veteran@example.com', password='x')
+        User.objects.filter(pk=user.pk).update(xp_points=300, total_xp=300, level=4)
+
+        self.rebuild()
+        self.rebuild()
+
+        user.refresh_from_db()
+        self.assertEqual(user.total_xp, 300)
+        self.assertEqual(XPEvent.objects.filter(user=user).count(), 1)
+
+    def test_discard_legacy_uses_the_ledger_sum(self):
+        user = User.objects.create_user(username='veteran', email='veteran@example.com', password='x')
+        User.objects.filter(pk=user.pk).update(xp_points=750, total_xp=750, level=8)
+        XPEvent.objects.create(user=user, source_type='session', source_id=1, amount=50)
+
+        self.rebuild('--discard-legacy')
+
+        user.refresh_from_db()
+        self.assertEqual((user.total_xp, user.level), (50, 1))
+        self.assertFalse(XPEvent.objects.filter(user=user, source_type='legacy').exists())
+
+
+class AddXPCacheTests(TestCase):
+    """Uma leitura entre o add_xp e o commit não pode deixar o total antigo no cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='xp', email='xp@example.com', password='x')
+
+    def cached_total(self, stale=None):
+        return caching.get_or_set(
+            'user-profile', 'me', lambda: stale or User.objects.get(pk=self.user.pk).total_xp, scope=self.user.pk
+        )
+
+    def test_add_xp_invalidates_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.add_xp(50, 'session', 1)
+            # Leitura concorrente: ainda vê o banco de antes do commit e grava no cache
+            self.assertEqual(self.cached_total(stale='antigo'), 'antigo')
+
+        self.assertEqual(self.cached_total(), 50)
+
+    def test_add_xp_many_invalidates_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.add_xp_many(30, 'challenge', [(self.user.pk, 1)])
+            self.assertEqual(self.cached_total(stale='antigo'), 'antigo')
+
+        self.assertEqual(self.cached_total(), 30)
@@ -8,7 +8,7 @@ from .views import (
     SupplementViewSet, SupplementRecordViewSet,
     AchievementViewSet, UserAchievementViewSet,
     ChallengeViewSet, UserChallengeViewSet,
-    NotificationViewSet
+    NotificationViewSet, LeaderboardViewSet
 )
 
 router = DefaultRouter()
@@ -37,6 +37,7 @@ router.register(r'achievements', AchievementViewSet)
 router.register(r'user-achievements', UserAchievementViewSet, basename='user-achievement')
 router.register(r'challenges', ChallengeViewSet)
 router.register(r'user-challenges', UserChallengeViewSet, basename='user-challenge')
+router.register(r'leaderboards', LeaderboardViewSet, basename='leaderboard')
 
 # Notificações
 router.register(r'notifications', NotificationViewSet, basename='notification')
@@ -1,8 +1,16 @@
+import io
+
 from rest_framework import viewsets, permissions, status, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Count, Sum, Q, Prefetch
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
 
 from .models import (
@@ -13,8 +21,11 @@ from .models import (
     Supplement, SupplementRecord,
     Achievement, UserAchievement,
     Challenge, UserChallenge,
-    Notification
+    Notification, NotificationCounter, XPEvent, DailyActivity
 )
+from .mixins import ConditionalGetMixin, SparseFieldsetMixin
+from .pagination import KeysetPagination, OptInKeysetPagination
+from . import budgets, builders, caching, challenges, days, export, fieldsets, importer, realtime, leaderboards, streaks
 
 from .serializers import (
     UserSerializer, UserProfileSerializer, UserBodyMeasurementSerializer,
@@ -24,18 +35,31 @@ from .serializers import (
     SupplementSerializer, SupplementRecordSerializer,
     AchievementSerializer, UserAchievementSerializer,
     ChallengeSerializer, UserChallengeSerializer,
-    NotificationSerializer, WorkoutDetailSerializer, WorkoutSessionDetailSerializer
+    NotificationSerializer, WorkoutDetailSerializer, WorkoutSessionDetailSerializer,
+    XPEventSerializer
 )
 
+
+def owned_parent(queryset, pk, message):
+    """Registro pai informado no corpo da requisição, restrito ao que o usuário pode ver"""
+    try:
+        return queryset.get(pk=pk)
+    except (queryset.model.DoesNotExist, ValueError, TypeError):
+        raise NotFound(message)
+
 # ViewSet para usuários
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 3, 'retrieve': 2, 'create': 4, 'update': 4, 'partial_update': 3, 'destroy': 20, 'me': 1,
+        'stats': 5, 'xp_history': 2, 'export': 7, 'streak_calendar': 2,
+    })
     
     def get_queryset(self):
         if self.request.user.is_staff:
-            return User.objects.all()
-        return User.objects.filter(id=self.request.user.id)
+            return User.objects.order_by('id')
+        return User.objects.filter(id=self.request.user.id).order_by('id')
     
     def get_permissions(self):
         if self.action == 'create':
@@ -44,60 +68,106 @@ class UserViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def me(self, request):
-        serializer = UserProfileSerializer(request.user)
-        return Response(serializer.data)
+        data = caching.get_or_set(
+            'user-profile', 'me',
+            lambda: UserProfileSerializer(request.user).data,
+            scope=request.user.pk
+        )
+        return Response(data)
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Obter estatísticas do usuário"""
-        user = request.user
+        # A chave inclui a data (últimos 30 dias) e a versão dos grupos musculares,
+        # que afetam o payload de todos os usuários
+        key = f"{days.local_date(request.user)}:{caching.namespace_version('muscle-groups')}"
+        data = caching.get_or_set(
+            'user-stats', key,
+            lambda: self._compute_stats(request.user),
+            scope=request.user.pk
+        )
+        return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def xp_history(self, request):
+        """Histórico de XP do usuário (ledger), paginado por cursor"""
+        paginator = KeysetPagination()
+        paginator.keyset_field = 'created_at'
+        events = paginator.paginate_queryset(XPEvent.objects.filter(user=request.user), request, view=self)
+        serializer = XPEventSerializer(events, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Histórico completo do usuário em streaming (?export_format=ndjson|csv)"""
+        # ?format= é reservado à negociação de conteúdo do DRF
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in export.FORMATS:
+            return Response(
+                {"error": "export_format deve ser ndjson ou csv"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        response = StreamingHttpResponse(
+            export.stream(request.user, export_format),
+            content_type=export.FORMATS[export_format]
+        )
+        filename = f"califit-{request.user.pk}-{days.local_date(request.user)}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def streak_calendar(self, request):
+        """Dias treinados e sequências num intervalo (?start=&end=, padrão: últimos 365 dias)"""
+        try:
+            end = parse_date(request.query_params.get('end') or '') or days.local_date(request.user)
+            start = parse_date(request.query_params.get('start') or '') or end - timedelta(days=364)
+        except ValueError:
+            start = end = None
+        if start is None or start > end:
+            return Response(
+                {"error": "Intervalo de datas inválido"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(streaks.streak_calendar(request.user, start, end))
+    
+    def _compute_stats(self, user):
         # Estatísticas básicas
-        total_workouts = WorkoutSession.objects.filter(
+        totals = WorkoutSession.objects.filter(
             user=user, 
             end_time__isnull=False
-        ).count()
-        
-        total_duration = WorkoutSession.objects.filter(
-            user=user,
-            end_time__isnull=False
-        ).aggregate(Sum('duration'))['duration__sum'] or 0
+        ).aggregate(total_workouts=Count('id'), total_duration=Sum('duration'))
+        total_workouts = totals['total_workouts']
+        total_duration = totals['total_duration'] or 0
         
         # Formatar em horas
         total_hours = total_duration / 3600
         
-        # Treinos por grupo muscular
-        muscle_groups = MuscleGroup.objects.all()
-        muscle_group_stats = []
-        
-        for group in muscle_groups:
-            count = ExerciseRecord.objects.filter(
+        # Treinos por grupo muscular: uma contagem agrupada em vez de uma por grupo
+        counts = dict(
+            ExerciseRecord.objects.filter(
                 session__user=user,
                 session__end_time__isnull=False,
-                exercise__muscle_groups=group
-            ).count()
-            
-            muscle_group_stats.append({
-                'name': group.name,
-                'count': count
-            })
+                exercise__muscle_groups__isnull=False
+            ).values_list('exercise__muscle_groups').annotate(count=Count('id')).order_by()
+        )
+        muscle_group_stats = [
+            {'name': name, 'count': counts.get(pk, 0)}
+            for pk, name in MuscleGroup.objects.values_list('pk', 'name')
+        ]
         
         # Estatísticas de streak
-        max_streak = user.streak_count  # Simplificação - em um app real, você rastrearia o máximo histórico
+        max_streak = max(user.max_streak, user.streak_count)
         current_streak = user.streak_count
         
         # Estatísticas de XP e nível
         next_level_xp = user.level * 100
         
         # Calcular número de dias treinados nos últimos 30 dias
-        thirty_days_ago = timezone.now().date() - timedelta(days=30)
-        workout_dates = WorkoutSession.objects.filter(
-            user=user,
-            end_time__isnull=False,
-            start_time__date__gte=thirty_days_ago
-        ).values('start_time__date').distinct().count()
+        thirty_days_ago = days.local_date(user) - timedelta(days=30)
+        workout_dates = DailyActivity.objects.filter(user=user, date__gte=thirty_days_ago).count()
         
-        return Response({
+        return {
             'total_workouts': total_workouts,
             'total_hours': round(total_hours, 1),
             'current_streak': current_streak,
@@ -108,35 +178,48 @@ class UserViewSet(viewsets.ModelViewSet):
             'level_progress': user.level_progress_percentage,
             'muscle_group_stats': muscle_group_stats,
             'days_trained_last_30': workout_dates
-        })
+        }
 
 
-class UserBodyMeasurementViewSet(viewsets.ModelViewSet):
+class UserBodyMeasurementViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = UserBodyMeasurementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 3, 'retrieve': 2, 'create': 2, 'update': 3, 'partial_update': 3, 'destroy': 3,
+    })
     
     def get_queryset(self):
-        return UserBodyMeasurement.objects.filter(user=self.request.user)
+        return UserBodyMeasurement.objects.filter(user=self.request.user).order_by('-date', '-id')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class MuscleGroupViewSet(viewsets.ModelViewSet):
+class MuscleGroupViewSet(SparseFieldsetMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    conditional_models = (MuscleGroup,)
+    cache_entity = 'muscle-groups'
     queryset = MuscleGroup.objects.all()
     serializer_class = MuscleGroupSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 4, 'retrieve': 3, 'create': 5, 'update': 6, 'partial_update': 5, 'destroy': 8,
+    })
 
 
-class ExerciseViewSet(viewsets.ModelViewSet):
+class ExerciseViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = ExerciseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 4, 'retrieve': 3, 'create': 11, 'update': 11, 'partial_update': 5, 'destroy': 11,
+        'by_muscle_group': 3,
+    })
     
     def get_queryset(self):
         user = self.request.user
+        exercises = Exercise.objects.prefetch_related('muscle_groups').order_by('id')
         if user.is_staff:
-            return Exercise.objects.all()
-        return Exercise.objects.filter(Q(user=user) | Q(user__is_staff=True))
+            return exercises
+        return exercises.filter(Q(user=user) | Q(user__is_staff=True))
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -161,8 +244,12 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class WorkoutViewSet(viewsets.ModelViewSet):
+class WorkoutViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 3, 'retrieve': 5, 'create': 10, 'update': 16, 'partial_update': 7, 'destroy': 10,
+        'templates': 2, 'clone': 11, 'assign': 7, 'start_session': 7,
+    })
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -173,10 +260,22 @@ class WorkoutViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        return Workout.objects.filter(Q(user=user) | Q(is_template=True))
+        workouts = Workout.objects.filter(Q(user=user) | Q(is_template=True)).order_by('id')
+        if self.action == 'retrieve':
+            return workouts.prefetch_related('workout_exercises__exercise__muscle_groups')
+        return workouts.annotate(exercise_total=Count('workout_exercises'))
+    
+    def _with_exercises(self, workout):
+        # A resposta (WorkoutDetailSerializer) lista os exercícios com seus grupos musculares
+        return Workout.objects.prefetch_related('workout_exercises__exercise__muscle_groups').get(pk=workout.pk)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        serializer.instance = self._with_exercises(serializer.instance)
+    
+    def perform_update(self, serializer):
+        serializer.save()
+        serializer.instance = self._with_exercises(serializer.instance)
     
     @action(detail=True, methods=['post'])
     def start_session(self, request, pk=None):
@@ -189,35 +288,91 @@ class WorkoutViewSet(viewsets.ModelViewSet):
             workout=workout
         )
         
-        # Inicializar registros de exercícios
-        for workout_exercise in workout.workout_exercises.all():
-            exercise_record = ExerciseRecord.objects.create(
+        # Inicializar registros de exercícios (um único INSERT)
+        ExerciseRecord.objects.bulk_create([
+            ExerciseRecord(
                 session=session,
-                exercise=workout_exercise.exercise,
+                exercise_id=workout_exercise.exercise_id,
                 workout_exercise=workout_exercise
             )
+            for workout_exercise in workout.workout_exercises.all()
+        ])
         
         serializer = WorkoutSessionSerializer(session)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """Copiar um template (ou treino próprio) para o usuário"""
+        workout = self.get_object()
+        copy, = workout.clone_for([request.user.pk], name=request.data.get('name'))
+        
+        serializer = WorkoutDetailSerializer(self._with_exercises(copy), context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def assign(self, request, pk=None):
+        """Atribuir o treino a vários usuários de uma vez: {"user_ids": [...]}"""
+        workout = self.get_object()
+        
+        user_ids = request.data.get('user_ids')
+        if not isinstance(user_ids, list) or not all(isinstance(user_id, int) for user_id in user_ids):
+            return Response(
+                {"error": "Informe user_ids (lista de ids)"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        user_ids = User.objects.filter(pk__in=user_ids, is_active=True).values_list('pk', flat=True)
+        copies = workout.clone_for(user_ids, name=request.data.get('name'))
+        return Response(
+            {"assigned": len(copies), "workouts": {copy.user_id: copy.pk for copy in copies}},
+            status=status.HTTP_201_CREATED
+        )
+    
     @action(detail=False, methods=['get'])
     def templates(self, request):
         """Listar treinos marcados como templates"""
-        templates = self.get_queryset().filter(is_template=True)
-        serializer = self.get_serializer(templates, many=True)
-        return Response(serializer.data)
+        # Templates são os mesmos para todos os usuários
+        data = caching.get_or_set(
+            'workout-templates', 'list',
+            lambda: self.get_serializer(
+                Workout.objects.filter(is_template=True).annotate(exercise_total=Count('workout_exercises')),
+                many=True
+            ).data
+        )
+        return Response(data)
 
 
-class WorkoutExerciseViewSet(viewsets.ModelViewSet):
+class WorkoutExerciseViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = WorkoutExerciseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 4, 'retrieve': 3, 'create': 5, 'update': 7, 'partial_update': 5, 'destroy': 8,
+    })
     
     def get_queryset(self):
-        return WorkoutExercise.objects.filter(workout__user=self.request.user)
+        return WorkoutExercise.objects.filter(workout__user=self.request.user).select_related(
+            'exercise'
+        ).prefetch_related('exercise__muscle_groups').order_by('workout_id', 'order', 'id')
+    
+    def perform_create(self, serializer):
+        workout = owned_parent(
+            Workout.objects.filter(user=self.request.user), self.request.data.get('workout'),
+            "Treino não encontrado."
+        )
+        serializer.save(workout=workout)
 
 
-class WorkoutSessionViewSet(viewsets.ModelViewSet):
+class WorkoutSessionViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    # complete se ramifica: a primeira sessão, subir de nível ou desbloquear uma
+    # conquista somam até 4 consultas às 35 medidas na fixture (39 observadas)
+    query_budgets = budgets.measured({
+        'list': 4, 'retrieve': 8, 'create': 4, 'update': 5, 'partial_update': 5, 'destroy': 9, 'recent': 3,
+        'events': 3, 'record_set': 14, 'complete': 35, 'import_history': 22,
+    }, extra={'complete': 4})
+    pagination_class = OptInKeysetPagination
+    keyset_field = 'start_time'
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -225,7 +380,33 @@ class WorkoutSessionViewSet(viewsets.ModelViewSet):
         return WorkoutSessionSerializer
     
     def get_queryset(self):
-        return WorkoutSession.objects.filter(user=self.request.user)
+        sessions = WorkoutSession.objects.filter(user=self.request.user).order_by('-start_time', '-id')
+        if self.action in ('list', 'recent'):
+            # workout_detail inclui exercise_count: o treino vem anotado numa consulta só
+            return sessions.prefetch_related(Prefetch(
+                'workout', queryset=Workout.objects.annotate(exercise_total=Count('workout_exercises'))
+            ))
+        return sessions
+    
+    def perform_create(self, serializer):
+        # Mesmos treinos de start_session: os próprios e os templates
+        workout = serializer.validated_data['workout']
+        if workout.user_id != self.request.user.pk and not workout.is_template:
+            raise NotFound("Treino não encontrado.")
+        serializer.save(user=self.request.user)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Detalhe montado com values() (ver builders.py); ?shape=flat lista cada exercício uma vez"""
+        if any(param in request.query_params for param in (fieldsets.FIELDS_PARAM, fieldsets.EXPAND_PARAM)):
+            # Recortes de campos passam pelo serializer, que sabe aplicá-los
+            return super().retrieve(request, *args, **kwargs)
+        shape = request.query_params.get('shape', 'nested')
+        if shape not in builders.SHAPES:
+            return Response(
+                {"error": "shape deve ser nested ou flat"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(builders.session_detail(self.get_object(), request, shape))
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
@@ -242,6 +423,11 @@ class WorkoutSessionViewSet(viewsets.ModelViewSet):
         xp_earned, level_up = session.complete_session()
         
         serializer = self.get_serializer(session)
+        session.record_event('completed', {
+            field: serializer.data[field]
+            for field in ('end_time', 'duration', 'calories_burned', 'xp_earned', 'completed')
+        })
+        
         return Response({
             "session": serializer.data,
             "xp_earned": xp_earned,
@@ -249,6 +435,33 @@ class WorkoutSessionViewSet(viewsets.ModelViewSet):
             "message": "Sessão finalizada com sucesso!"
         })
     
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_history(self, request):
+        """Importar histórico de outro app (arquivo csv ou ndjson no campo file)"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {"error": "Envie o arquivo no campo file"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if upload.size > settings.IMPORT_MAX_UPLOAD_SIZE:
+            return Response(
+                {"error": f"Arquivo maior que o limite de {settings.IMPORT_MAX_UPLOAD_SIZE // (1024 * 1024)} MB"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        input_format = request.data.get('input_format') or upload.name.rsplit('.', 1)[-1].lower()
+        if input_format not in importer.FORMATS:
+            return Response(
+                {"error": "input_format deve ser csv ou ndjson"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = importer.import_workouts(request.user, lines, input_format)
+        return Response(result, status=status.HTTP_201_CREATED)
+    
     @action(detail=True, methods=['post'])
     def record_set(self, request, pk=None):
         """Registrar série de exercício completada"""
@@ -285,6 +498,13 @@ class WorkoutSessionViewSet(viewsets.ModelViewSet):
             )
             
             serializer = SetRecordSerializer(set_record)
+            
+            # Delta para os outros dispositivos conectados à sessão
+            session.record_event('set_recorded', {
+                'exercise_id': exercise_record.exercise_id,
+                'exercise_record': exercise_record.id,
+                'set': serializer.data,
+            })
             return Response(serializer.data)
             
         except ExerciseRecord.DoesNotExist:
@@ -293,6 +513,22 @@ class WorkoutSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @action(detail=True, methods=['get'])
+    def events(self, request, pk=None):
+        """Deltas da sessão após ?since=<seq>, para clientes sem WebSocket"""
+        session = self.get_object()
+        
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            since = 0
+        
+        events = session.events.filter(seq__gt=since)
+        return Response({
+            'seq': session.event_seq,
+            'events': [event.as_message() for event in events]
+        })
+    
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Obter sessões recentes para o feed de atividades"""
@@ -312,28 +548,64 @@ class WorkoutSessionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ExerciseRecordViewSet(viewsets.ModelViewSet):
+class ExerciseRecordViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = ExerciseRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 6, 'retrieve': 5, 'create': 7, 'update': 7, 'partial_update': 7, 'destroy': 9,
+    })
     
     def get_queryset(self):
-        return ExerciseRecord.objects.filter(session__user=self.request.user)
+        return ExerciseRecord.objects.filter(session__user=self.request.user).select_related(
+            'exercise', 'workout_exercise__exercise'
+        ).prefetch_related(
+            'exercise__muscle_groups', 'workout_exercise__exercise__muscle_groups', 'set_records'
+        ).order_by('id')
+    
+    def perform_create(self, serializer):
+        session = owned_parent(
+            WorkoutSession.objects.filter(user=self.request.user), self.request.data.get('session'),
+            "Sessão não encontrada."
+        )
+        # O exercício precisa fazer parte do treino da sessão, como em start_session
+        workout_exercise = owned_parent(
+            WorkoutExercise.objects.filter(workout_id=session.workout_id).select_related('exercise'),
+            self.request.data.get('workout_exercise'), "Exercício não encontrado neste treino."
+        )
+        serializer.save(session=session, workout_exercise=workout_exercise, exercise=workout_exercise.exercise)
 
 
-class SetRecordViewSet(viewsets.ModelViewSet):
+class SetRecordViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = SetRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 3, 'retrieve': 2, 'create': 3, 'update': 3, 'partial_update': 3, 'destroy': 3,
+    })
+    pagination_class = OptInKeysetPagination
+    # SetRecord não tem timestamp; o id crescente preserva a ordem de inserção
+    keyset_field = None
     
     def get_queryset(self):
-        return SetRecord.objects.filter(exercise_record__session__user=self.request.user)
+        return SetRecord.objects.filter(exercise_record__session__user=self.request.user).order_by('id')
+    
+    def perform_create(self, serializer):
+        exercise_record = owned_parent(
+            ExerciseRecord.objects.filter(session__user=self.request.user), self.request.data.get('exercise_record'),
+            "Registro de exercício não encontrado."
+        )
+        serializer.save(exercise_record=exercise_record)
 
 
-class SupplementViewSet(viewsets.ModelViewSet):
+class SupplementViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = SupplementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 3, 'retrieve': 2, 'create': 2, 'update': 3, 'partial_update': 3, 'destroy': 6, 'today': 5,
+        'take': 3, 'skip': 3,
+    })
     
     def get_queryset(self):
-        return Supplement.objects.filter(user=self.request.user)
+        return Supplement.objects.filter(user=self.request.user).order_by('id')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -367,7 +639,7 @@ class SupplementViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def today(self, request):
         """Listar suplementos para hoje"""
-        today = timezone.now().date()
+        today = days.local_date(request.user)
         weekday = today.weekday()  # 0-6 (segunda a domingo)
         
         # Suplementos diários
@@ -383,9 +655,11 @@ class SupplementViewSet(viewsets.ModelViewSet):
         workout_day_supplements = []
         
         # Verificar se há alguma sessão de treino para hoje
+        day_start, day_end = days.day_bounds(request.user, today)
         has_workout_today = WorkoutSession.objects.filter(
             user=request.user,
-            start_time__date=today
+            start_time__gte=day_start,
+            start_time__lt=day_end
         ).exists()
         
         if has_workout_today:
@@ -398,12 +672,19 @@ class SupplementViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SupplementRecordViewSet(viewsets.ModelViewSet):
+class SupplementRecordViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = SupplementRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 3, 'retrieve': 2, 'create': 4, 'update': 4, 'partial_update': 3, 'destroy': 3,
+    })
+    pagination_class = OptInKeysetPagination
+    keyset_field = 'timestamp'
     
     def get_queryset(self):
-        return SupplementRecord.objects.filter(supplement__user=self.request.user)
+        return SupplementRecord.objects.filter(supplement__user=self.request.user).select_related(
+            'supplement'
+        ).order_by('-timestamp', '-id')
     
     def perform_create(self, serializer):
         supplement_id = self.request.data.get('supplement')
@@ -411,31 +692,45 @@ class SupplementRecordViewSet(viewsets.ModelViewSet):
         serializer.save(supplement=supplement)
 
 
-class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Achievement.objects.all()
+class AchievementViewSet(SparseFieldsetMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    conditional_models = (Achievement,)
+    cache_entity = 'achievements'
+    queryset = Achievement.objects.order_by('id')
     serializer_class = AchievementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({'list': 4, 'retrieve': 3, 'my_achievements': 2})
     
     @action(detail=False, methods=['get'])
     def my_achievements(self, request):
         """Listar conquistas do usuário atual"""
-        user_achievements = UserAchievement.objects.filter(user=request.user)
-        serializer = UserAchievementSerializer(user_achievements, many=True)
+        user_achievements = self.sparse_queryset(
+            UserAchievement.objects.filter(user=request.user).select_related('achievement'),
+            UserAchievementSerializer
+        )
+        serializer = UserAchievementSerializer(
+            user_achievements, many=True, context=self.get_serializer_context()
+        )
         return Response(serializer.data)
 
 
-class UserAchievementViewSet(viewsets.ReadOnlyModelViewSet):
+class UserAchievementViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = UserAchievementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({'list': 3, 'retrieve': 2})
     
     def get_queryset(self):
-        return UserAchievement.objects.filter(user=self.request.user)
+        return UserAchievement.objects.filter(user=self.request.user).select_related('achievement').order_by(
+            '-earned_date', '-id'
+        )
 
 
-class ChallengeViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Challenge.objects.filter(is_active=True)
+class ChallengeViewSet(SparseFieldsetMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    conditional_models = (Challenge,)
+    cache_entity = 'challenges'
+    queryset = Challenge.objects.filter(is_active=True).order_by('id')
     serializer_class = ChallengeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({'list': 7, 'retrieve': 4, 'join': 7, 'enroll': 4})
     
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
@@ -443,40 +738,65 @@ class ChallengeViewSet(viewsets.ReadOnlyModelViewSet):
         challenge = self.get_object()
         
         # Verificar se o desafio ainda está aberto
-        today = timezone.now().date()
+        today = days.local_date(request.user)
         if today > challenge.end_date:
             return Response(
                 {"error": "Este desafio já terminou"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Verificar se o usuário já participa
-        if UserChallenge.objects.filter(user=request.user, challenge=challenge).exists():
+        # Criar participação; o unique_together recusa a repetida
+        try:
+            with transaction.atomic():
+                user_challenge = UserChallenge.objects.create(
+                    user=request.user,
+                    challenge=challenge
+                )
+        except IntegrityError:
             return Response(
                 {"error": "Você já está participando deste desafio"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Criar participação
-        user_challenge = UserChallenge.objects.create(
-            user=request.user,
-            challenge=challenge
-        )
-        
         serializer = UserChallengeSerializer(user_challenge)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def enroll(self, request, pk=None):
+        """Inscrever usuários em lote: {"user_ids": [...]} ou {"all_users": true}"""
+        challenge = self.get_object()
+        
+        if request.data.get('all_users'):
+            user_ids = User.objects.filter(is_active=True).values_list('pk', flat=True)
+        else:
+            user_ids = request.data.get('user_ids')
+            if not isinstance(user_ids, list) or not all(isinstance(user_id, int) for user_id in user_ids):
+                return Response(
+                    {"error": "Informe user_ids (lista de ids) ou all_users"}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            user_ids = User.objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+        
+        enrolled = challenges.enroll_users(challenge, user_ids)
+        return Response({"enrolled": enrolled})
 
 
-class UserChallengeViewSet(viewsets.ReadOnlyModelViewSet):
+class UserChallengeViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = UserChallengeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({'list': 4, 'retrieve': 3, 'complete': 19})
     
     def get_queryset(self):
-        return UserChallenge.objects.filter(user=self.request.user)
+        return (
+            UserChallenge.objects.filter(user=self.request.user)
+            .select_related('challenge')
+            .prefetch_related('challenge__required_exercises')
+            .order_by('-joined_at', '-id')
+        )
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
-        """Marcar um desafio como concluído"""
+        """Marcar um desafio como concluído (se os requisitos foram atingidos)"""
         user_challenge = self.get_object()
         
         if user_challenge.completed:
@@ -485,23 +805,14 @@ class UserChallengeViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        user_challenge.completed = True
-        user_challenge.completed_at = timezone.now()
-        user_challenge.save()
+        if not user_challenge.is_satisfied(len(user_challenge.challenge.required_exercises.all())):
+            return Response(
+                {"error": "Os requisitos deste desafio ainda não foram atingidos"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Adicionar XP ao usuário
         challenge = user_challenge.challenge
-        level_up = request.user.add_xp(challenge.xp_reward)
-        
-        # Enviar notificação
-        Notification.objects.create(
-            user=request.user,
-            title=f"Desafio Concluído: {challenge.name}",
-            message=f"Parabéns! Você concluiu o desafio '{challenge.name}' e ganhou {challenge.xp_reward} XP!",
-            type='achievement',
-            icon='challenge_complete',
-            action_url='/challenges'
-        )
+        level_up = user_challenge.finish()
         
         serializer = self.get_serializer(user_challenge)
         return Response({
@@ -511,19 +822,24 @@ class UserChallengeViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
-class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+class NotificationViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({
+        'list': 3, 'retrieve': 2, 'unread_count': 2, 'mark_read': 7, 'mark_all_read': 6,
+    })
+    pagination_class = OptInKeysetPagination
+    keyset_field = 'created_at'
     
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        return Notification.objects.filter(user=self.request.user).order_by('-created_at', '-id')
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Marcar notificação como lida"""
         notification = self.get_object()
-        notification.read = True
-        notification.save()
+        notification.mark_read()
+        realtime.push_unread_count(request.user.pk)
         
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
@@ -531,11 +847,68 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Marcar todas as notificações como lidas"""
-        self.get_queryset().update(read=True)
+        Notification.mark_all_read(request.user)
+        realtime.push_unread_count(request.user.pk)
         return Response({"message": "Todas as notificações foram marcadas como lidas"})
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Contar notificações não lidas"""
-        count = self.get_queryset().filter(read=False).count()
-        return Response({"unread_count": count})
\ No newline at end of file
+        count = NotificationCounter.get_unread(request.user.pk)
+        return Response({"unread_count": count})
+
+class LeaderboardViewSet(viewsets.ViewSet):
+    """Rankings semanal, mensal e geral de XP e ranking de streak"""
+    permission_classes = [permissions.IsAuthenticated]
+    query_budgets = budgets.measured({'list': 1, 'retrieve': 2, 'me': 2})
+    
+    def _get_board(self, pk):
+        if pk not in leaderboards.BOARDS:
+            raise NotFound("Ranking não encontrado")
+        return pk
+    
+    def _int_param(self, request, name, default, maximum):
+        try:
+            value = int(request.query_params.get(name, default))
+        except ValueError:
+            value = default
+        return max(1, min(value, maximum))
+    
+    def _entries(self, ranked):
+        """Completar (posição, user_id, pontuação) com os dados públicos dos usuários"""
+        users = User.objects.in_bulk([user_id for _, user_id, _ in ranked])
+        return [
+            {
+                'rank': rank,
+                'user_id': user_id,
+                'username': users[user_id].username,
+                'level': users[user_id].level,
+                'score': int(score)
+            }
+            for rank, user_id, score in ranked
+            if user_id in users
+        ]
+    
+    def list(self, request):
+        return Response({'boards': list(leaderboards.BOARDS)})
+    
+    def retrieve(self, request, pk=None):
+        """Primeiras posições (?limit=, máximo 100)"""
+        board = self._get_board(pk)
+        limit = self._int_param(request, 'limit', 10, 100)
+        return Response({
+            'board': board,
+            'results': self._entries(leaderboards.top(board, limit))
+        })
+    
+    @action(detail=True, methods=['get'])
+    def me(self, request, pk=None):
+        """Posição do usuário e ?k= vizinhos acima e abaixo"""
+        board = self._get_board(pk)
+        k = self._int_param(request, 'k', 5, 50)
+        rank, ranked = leaderboards.around(board, request.user.pk, k)
+        return Response({
+            'board': board,
+            'rank': rank,
+            'results': self._entries(ranked)
+        })
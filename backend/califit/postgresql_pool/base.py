@@ -0,0 +1,100 @@
+"""
+Backend PostgreSQL com pool de conexões do psycopg 3 (psycopg_pool).
+
+O Django 5.0 não tem pool nativo (chegou no 5.1 com OPTIONS['pool']). Este
+backend segue a mesma interface: OPTIONS['pool'] recebe os argumentos do
+ConnectionPool (min_size, max_size, timeout...), então a atualização para o
+5.1 é só trocar o ENGINE.
+
+Com o pool, CONN_MAX_AGE deve ser 0: ao fim de cada requisição o Django
+"fecha" a conexão, que na verdade volta para o pool já autenticada. O pool
+verifica a conexão antes de entregá-la (check_connection), descarta as que
+ficaram ociosas demais e recria as que caíram.
+
+Há um pool por processo: depois de um fork (workers do gunicorn, processos
+filhos do Celery) o processo filho cria o seu, em vez de herdar sockets e
+threads do pai.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # {(alias, pid, banco): ConnectionPool}, compartilhado entre as threads do processo
+    _pools = {}
+
+    def _pool_key(self):
+        return (self.alias, os.getpid(), self.settings_dict['NAME'])
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        # Conexões sem banco (criação do banco de testes) não usam o pool
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured('Com o pool de conexões, CONN_MAX_AGE precisa ser 0')
+
+        key = self._pool_key()
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                kwargs=self.get_connection_params(),
+                open=False,
+                check=ConnectionPool.check_connection,
+                name=f'{self.alias}-{os.getpid()}',
+                **options,
+            )
+            # Outra thread pode ter criado o pool ao mesmo tempo; o que não
+            # entrou no dicionário nunca foi aberto
+            pool = self._pools.setdefault(key, pool)
+        return pool
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(
+                IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+
+        # Idempotente: só o primeiro uso no processo abre o pool
+        pool.open()
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # Devolver ao pool de origem (o de antes de um fork, se for o caso)
+            self.connection._pool.putconn(self.connection)
+        # Mesmo dentro de um atomic() a conexão já não é mais nossa
+        self.connection = None
+
+    def close_pool(self):
+        """Fechar as conexões do pool deste processo (encerramento do worker)"""
+        self.close()
+        pool = self._pools.pop(self._pool_key(), None)
+        if pool is not None:
+            pool.close()
@@ -1,7 +1,9 @@
 from pathlib import Path
 import os
+import sys
 from datetime import timedelta
 from dotenv import load_dotenv
+from celery.schedules import crontab
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -9,6 +11,9 @@ load_dotenv()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Execução da suíte de testes (manage.py test)
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
@@ -42,7 +47,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro, para medir a requisição inteira
+    'apps.core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Antes de tudo que lê ou altera o corpo da resposta
+    'apps.core.middleware.CompressionMiddleware',
+    'apps.core.middleware.QueryInspectionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,16 +86,64 @@ ASGI_APPLICATION = 'califit.asgi.application'
 # Configuração do banco de dados
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('DB_NAME', 'califit'),
-        'USER': os.getenv('DB_USER', 'postgres'),
-        'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
-        'HOST': os.getenv('DB_HOST', 'db'),
-        'PORT': os.getenv('DB_PORT', '5434'),
+# DB_ENGINE=sqlite roda sem PostgreSQL (benchmarks e desenvolvimento local)
+DB_ENGINE = os.getenv('DB_ENGINE', 'postgresql')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'califit'),
+            'USER': os.getenv('DB_USER', 'postgres'),
+            'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
+            'HOST': os.getenv('DB_HOST', 'db'),
+            'PORT': os.getenv('DB_PORT', '5434'),
+            # Reaproveitar a conexão entre requisições (segundos; 0 = uma por requisição)
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            # Testar uma conexão reaproveitada antes da primeira consulta de cada requisição
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
+
+# Pool de conexões (psycopg_pool) por tipo de processo, definido em DB_PROCESS_TYPE
+# pelo gunicorn.conf.py (web), celery-entrypoint.sh (celery) e docker-compose
+# (websocket). Comandos avulsos (wait_for_db, migrate, shell) ficam sem pool.
+# (mínimo, máximo) por processo: um worker síncrono do gunicorn ou um processo
+# filho do Celery atende uma coisa por vez; o daphne atende várias.
+DB_PROCESS_TYPE = os.getenv('DB_PROCESS_TYPE', 'command')
+DB_POOL_SIZES = {
+    'web': (1, 4),
+    'celery': (1, 2),
+    'websocket': (2, 10),
 }
+DB_POOL = (
+    os.getenv('DB_POOL', 'True') == 'True'
+    and DB_ENGINE != 'sqlite'
+    and DB_PROCESS_TYPE in DB_POOL_SIZES
+)
+
+if DB_POOL:
+    _pool_min, _pool_max = DB_POOL_SIZES[DB_PROCESS_TYPE]
+    DATABASES['default'].update({
+        'ENGINE': 'califit.postgresql_pool',
+        # Com pool, "fechar" ao fim da requisição devolve a conexão ao pool
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', _pool_min)),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', _pool_max)),
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+                'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+            },
+        },
+    })
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -138,6 +196,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.core.renderers.ORJSONRenderer',
+        'apps.core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.core.parsers.ORJSONParser',
+        'apps.core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -147,6 +216,20 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Compressão das respostas (apps.core.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+# Métricas do Prometheus (apps.core.metrics); o endpoint exige "Bearer <METRICS_TOKEN>" e,
+# sem token configurado, só responde com DEBUG ligado
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_PATH = '/metrics'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Orçamento de consultas e detecção de N+1 em staging (apps.core.budgets)
+QUERY_INSPECTION = os.getenv('QUERY_INSPECTION', 'False') == 'True'
+QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', '5'))
+
 # Configurações JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
@@ -184,9 +267,82 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Nos testes, channel layer em memória (sem Redis)
+if TESTING:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+# Configuração de cache
+# Redis compartilhado entre os workers; memória local nos testes
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem' if TESTING else 'redis')
+
+if CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'califit',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', '6381')}/1",
+            'KEY_PREFIX': 'califit',
+        },
+    }
+
+# Tempo de vida padrão (segundos) das entradas da camada de cache da aplicação
+APP_CACHE_TIMEOUT = int(os.getenv('APP_CACHE_TIMEOUT', '300'))
+
+# Rankings (sorted sets no Redis; em memória nos testes)
+LEADERBOARD_BACKEND = os.getenv('LEADERBOARD_BACKEND', 'memory' if TESTING else 'redis')
+LEADERBOARD_REDIS_URL = f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', '6381')}/2"
+# Fuso em que os rankings semanal (segunda, 00:00) e mensal (dia 1, 00:00) viram;
+# é um só para todos os usuários, independente do fuso de cada um
+LEADERBOARD_TIME_ZONE = os.getenv('LEADERBOARD_TIME_ZONE', TIME_ZONE)
+
 # Configuração do Celery
 CELERY_BROKER_URL = f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', '6381')}/0"
 CELERY_RESULT_BACKEND = f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', '6381')}/0"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
-CELERY_TASK_TIME_LIMIT = 30 * 60
\ No newline at end of file
+CELERY_TASK_TIME_LIMIT = 30 * 60
+
+CELERY_BEAT_SCHEDULE = {
+    'prune-notifications': {
+        'task': 'apps.core.tasks.prune_notifications',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'close-expired-challenges': {
+        'task': 'apps.core.tasks.close_expired_challenges',
+        'schedule': crontab(hour=0, minute=15),
+    },
+}
+
+# Tamanho dos lotes de inscrição e encerramento de desafios
+CHALLENGE_BATCH_SIZE = 1000
+
+# Séries gravadas por transação na importação de históricos
+IMPORT_BATCH_SIZE = 5000
+# Maior arquivo aceito por POST /workout-sessions/import/ (a importação roda na requisição)
+IMPORT_MAX_UPLOAD_SIZE = int(os.getenv('IMPORT_MAX_UPLOAD_SIZE', str(20 * 1024 * 1024)))
+
+# Retenção de notificações
+# Dias que cada tipo de notificação é mantido (lida ou não)
+NOTIFICATION_RETENTION_DAYS = {
+    'reminder': 7,
+    'supplement': 7,
+    'workout': 14,
+    'streak': 30,
+    'system': 90,
+    'achievement': 365,
+    'digest': 365,
+}
+# Notificações lidas mais antigas que isso são compactadas em um resumo por usuário
+NOTIFICATION_COMPACT_AFTER_DAYS = int(os.getenv('NOTIFICATION_COMPACT_AFTER_DAYS', '30'))
+# Linhas por lote nas exclusões (cada lote é uma transação curta)
+NOTIFICATION_RETENTION_CHUNK_SIZE = int(os.getenv('NOTIFICATION_RETENTION_CHUNK_SIZE', '1000'))
\ No newline at end of file
@@ -10,6 +10,8 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 
+from apps.core.metrics import metrics_view
+
 # API Schema
 schema_view = get_schema_view(
     openapi.Info(
@@ -28,6 +30,7 @@ urlpatterns = [
     path('api/v1/', include('apps.core.urls')),
     path('api/v1/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/v1/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path(settings.METRICS_PATH.lstrip('/'), metrics_view, name='metrics'),
     
     # Documentação
     path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
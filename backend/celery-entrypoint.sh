@@ -9,5 +9,6 @@ until PGPASSWORD=$DB_PASSWORD psql -h $DB_HOST -U $DB_USER -d postgres -c '\q';
 done
 echo "Banco de dados disponível!"
 
-# Iniciar Celery Worker
+# Iniciar Celery Worker (pool de conexões dimensionado para os processos filhos)
+export DB_PROCESS_TYPE=celery
 exec celery -A califit worker -l INFO
\ No newline at end of file
@@ -17,4 +17,5 @@ python manage.py migrate
 python manage.py collectstatic --noinput
 
 # Iniciar Gunicorn
-exec gunicorn --bind 0.0.0.0:8000 --workers 4 --timeout 120 califit.wsgi:application
\ No newline at end of file
+# Bind, workers e timeout em gunicorn.conf.py
+exec gunicorn califit.wsgi:application
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Configuração do gunicorn (lida automaticamente a partir do diretório da app).
+
+As métricas do Prometheus de cada worker ficam em arquivos em
+PROMETHEUS_MULTIPROC_DIR; o endpoint /metrics de qualquer worker agrega
+todos. O diretório é limpo na subida do master e os arquivos de workers
+encerrados são marcados como mortos.
+
+DB_PROCESS_TYPE=web dimensiona o pool de conexões de cada worker (ver
+DB_POOL_SIZES em settings.py); ao sair, o worker fecha as conexões do pool.
+"""
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+
+# Precisa existir antes de os workers importarem o prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+os.environ.setdefault('DB_PROCESS_TYPE', 'web')
+
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    from django.db import connections
+    for connection in connections.all(initialized_only=True):
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
@@ -60,12 +60,16 @@ const Progress = () => {
       try {
         // Buscar sessões de treino
         const sessionsResponse = await axios.get(`${apiBaseUrl}/workout-sessions/`, {
-          headers: { Authorization: `Bearer ${token}` }
+          headers: { Authorization: `Bearer ${token}` },
+          params: { fields: 'id,start_time,duration,calories_burned,workout_detail.name' }
         });
         
         // Buscar conquistas
         const achievementsResponse = await axios.get(`${apiBaseUrl}/achievements/my_achievements/`, {
-          headers: { Authorization: `Bearer ${token}` }
+          headers: { Authorization: `Bearer ${token}` },
+          params: {
+            fields: 'id,earned_date,achievement_detail.name,achievement_detail.description,achievement_detail.icon_name'
+          }
         });
         
         // Buscar medidas corporais
@@ -115,7 +119,7 @@ const Progress = () => {
           achievements,
           streak: {
             current: user?.streak_count || 0,
-            best: stats.bestStreak || user?.streak_count || 0
+            best: stats.max_streak || user?.streak_count || 0
           },
           bodyMeasurements: {
             weight: weightData,